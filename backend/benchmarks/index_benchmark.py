@@ -0,0 +1,271 @@
+"""
+Query plan and latency benchmark for the hot-path indexes (migration c41d8e2f7a93)
+
+Seeds a scratch `bench` schema with synthetic users, vaccination records, reminders,
+drive participants and doctor relationships, then runs each hot query with
+EXPLAIN (ANALYZE, BUFFERS) before and after creating the indexes:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.index_benchmark --users 50000
+
+The scratch tables carry only the columns the queries touch and no foreign keys, so
+the benchmark runs against any Postgres database without touching application data.
+The schema is dropped afterwards unless --keep is given.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench"
+
+SCHEMA_DDL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.user_profiles (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        user_id uuid NOT NULL UNIQUE,
+        username varchar(50) NOT NULL,
+        city varchar(100)
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.vaccination_records (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        user_id uuid NOT NULL,
+        vaccine_template_id integer NOT NULL,
+        dose_number integer NOT NULL,
+        due_date timestamptz NOT NULL,
+        is_administered boolean NOT NULL DEFAULT false,
+        CONSTRAINT unique_user_vaccine_dose UNIQUE (user_id, vaccine_template_id, dose_number)
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.vaccination_reminders (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        vaccination_record_id uuid NOT NULL,
+        user_id uuid NOT NULL,
+        due_date timestamptz NOT NULL,
+        reminder_type varchar(20) NOT NULL,
+        email_sent boolean NOT NULL DEFAULT false,
+        sms_sent boolean NOT NULL DEFAULT false,
+        CONSTRAINT unique_vaccination_reminder UNIQUE (vaccination_record_id, reminder_type)
+    )
+    """,
+    f"CREATE INDEX idx_vaccination_reminders_due_date ON {SCHEMA}.vaccination_reminders (due_date)",
+    f"CREATE INDEX idx_vaccination_reminders_user_type ON {SCHEMA}.vaccination_reminders (user_id, reminder_type)",
+    f"""
+    CREATE TABLE {SCHEMA}.drive_participants (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        vaccination_drive_id integer NOT NULL,
+        user_id uuid NOT NULL,
+        CONSTRAINT unique_drive_user_participant UNIQUE (vaccination_drive_id, user_id)
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.doctor_patient_relationships (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        user_id uuid NOT NULL,
+        doctor_id integer NOT NULL,
+        CONSTRAINT unique_doctor_patient UNIQUE (user_id, doctor_id)
+    )
+    """,
+]
+
+# Same definitions as the migration, against the scratch schema
+INDEX_DDL = [
+    f"CREATE INDEX idx_vaccination_records_user_administered_due ON {SCHEMA}.vaccination_records (user_id, is_administered, due_date)",
+    f"CREATE INDEX idx_drive_participants_user_id ON {SCHEMA}.drive_participants (user_id)",
+    f"CREATE INDEX idx_doctor_patient_relationships_doctor_id ON {SCHEMA}.doctor_patient_relationships (doctor_id)",
+    f"CREATE INDEX idx_user_profiles_city ON {SCHEMA}.user_profiles (city)",
+    f"CREATE INDEX idx_vaccination_reminders_unsent_type_due ON {SCHEMA}.vaccination_reminders (reminder_type, due_date) WHERE NOT email_sent AND NOT sms_sent",
+]
+
+
+def seed(conn, users: int, vaccines: int, cities: int, drives: int, doctors: int):
+    """Fill the scratch tables with generate_series data"""
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.user_profiles (user_id, username, city)
+        SELECT gen_random_uuid(), 'user_' || g, 'City ' || (g % :cities)
+        FROM generate_series(1, :users) AS g
+    """), {"users": users, "cities": cities})
+
+    # One record per vaccine per user, due dates spread over two years; older ones administered
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.vaccination_records (user_id, vaccine_template_id, dose_number, due_date, is_administered)
+        SELECT p.user_id, v, 1, d.due_date, d.due_date < now()
+        FROM {SCHEMA}.user_profiles p
+        CROSS JOIN generate_series(1, :vaccines) AS v
+        CROSS JOIN LATERAL (
+            SELECT now() - interval '365 days' + (random() * 730) * interval '1 day' AS due_date
+        ) d
+    """), {"vaccines": vaccines})
+
+    # Four reminders per upcoming record; everything with a past send date is marked sent
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.vaccination_reminders (vaccination_record_id, user_id, due_date, reminder_type, email_sent, sms_sent)
+        SELECT r.id, r.user_id, r.due_date, t.reminder_type,
+               r.due_date - t.days * interval '1 day' < now(),
+               r.due_date - t.days * interval '1 day' < now()
+        FROM {SCHEMA}.vaccination_records r
+        CROSS JOIN (VALUES ('THIRTY_DAYS', 30), ('FIFTEEN_DAYS', 15), ('SEVEN_DAYS', 7), ('ONE_DAY', 1)) AS t(reminder_type, days)
+        WHERE NOT r.is_administered
+    """))
+
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.drive_participants (vaccination_drive_id, user_id)
+        SELECT d, p.user_id
+        FROM {SCHEMA}.user_profiles p
+        CROSS JOIN generate_series(1, :drives) AS d
+        WHERE (hashtext(p.user_id::text || d) % 4) = 0
+    """), {"drives": drives})
+
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.doctor_patient_relationships (user_id, doctor_id)
+        SELECT user_id, 1 + abs(hashtext(user_id::text)) % :doctors
+        FROM {SCHEMA}.user_profiles
+    """), {"doctors": doctors})
+
+
+def hot_queries(conn):
+    """The application's hot filters, with parameters picked from the seeded data"""
+    sample_user = conn.execute(text(f"SELECT user_id FROM {SCHEMA}.user_profiles LIMIT 1 OFFSET 1000")).scalar()
+
+    return [
+        (
+            "vaccination schedule (/vaccination/due)",
+            f"""
+            SELECT * FROM {SCHEMA}.vaccination_records
+            WHERE user_id = :user_id AND is_administered = false
+            ORDER BY due_date
+            """,
+            {"user_id": sample_user}
+        ),
+        (
+            "vaccination history (/vaccination/history)",
+            f"""
+            SELECT * FROM {SCHEMA}.vaccination_records
+            WHERE user_id = :user_id AND is_administered = true
+            ORDER BY due_date DESC
+            """,
+            {"user_id": sample_user}
+        ),
+        (
+            "user's drives (/users/active-drives)",
+            f"SELECT * FROM {SCHEMA}.drive_participants WHERE user_id = :user_id",
+            {"user_id": sample_user}
+        ),
+        (
+            "doctor's patients (/doctors/my-patients)",
+            f"SELECT * FROM {SCHEMA}.doctor_patient_relationships WHERE doctor_id = :doctor_id",
+            {"doctor_id": 7}
+        ),
+        (
+            "drive enrollment by city",
+            f"SELECT user_id FROM {SCHEMA}.user_profiles WHERE city = :city",
+            {"city": "City 3"}
+        ),
+        (
+            "due reminders (reminder service)",
+            f"""
+            SELECT * FROM {SCHEMA}.vaccination_reminders
+            WHERE NOT email_sent AND NOT sms_sent
+              AND reminder_type = 'SEVEN_DAYS'
+              AND due_date >= current_date + 7 AND due_date < current_date + 8
+            """,
+            {}
+        ),
+    ]
+
+
+def plan_nodes(plan: dict) -> list:
+    """Scan node descriptions of a JSON plan, e.g. 'Index Scan using idx_x'"""
+    nodes = []
+    node_type = plan["Node Type"]
+    if "Scan" in node_type:
+        index = plan.get("Index Name")
+        nodes.append(f"{node_type} using {index}" if index else node_type)
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(conn, sql: str, params: dict, repeat: int) -> dict:
+    """Run EXPLAIN ANALYZE `repeat` times and report the plan and median execution time"""
+    timings = []
+    plan = None
+    for _ in range(repeat):
+        result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+        output = result if isinstance(result, list) else json.loads(result)
+        plan = output[0]
+        timings.append(plan["Execution Time"])
+
+    root = plan["Plan"]
+    return {
+        "scan": ", ".join(plan_nodes(root)),
+        "ms": statistics.median(timings),
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+    }
+
+
+def run_all(conn, repeat: int) -> list:
+    return [(name, explain(conn, sql, params, repeat)) for name, sql, params in hot_queries(conn)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot-path indexes on a seeded dataset")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--vaccines", type=int, default=20, help="Vaccination records per user")
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--drives", type=int, default=40)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema afterwards")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL environment variable is required")
+    engine = create_engine(database_url.replace("postgresql+asyncpg://", "postgresql://"))
+
+    try:
+        with engine.begin() as conn:
+            for statement in SCHEMA_DDL:
+                conn.execute(text(statement))
+
+            started = time.perf_counter()
+            seed(conn, args.users, args.vaccines, args.cities, args.drives, args.doctors)
+            print(f"Seeded {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        with engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {SCHEMA}.user_profiles, {SCHEMA}.vaccination_records, "
+                              f"{SCHEMA}.vaccination_reminders, {SCHEMA}.drive_participants, "
+                              f"{SCHEMA}.doctor_patient_relationships"))
+            before = run_all(conn, args.repeat)
+
+            for statement in INDEX_DDL:
+                conn.execute(text(statement))
+            conn.execute(text(f"ANALYZE {SCHEMA}.user_profiles, {SCHEMA}.vaccination_records, "
+                              f"{SCHEMA}.vaccination_reminders, {SCHEMA}.drive_participants, "
+                              f"{SCHEMA}.doctor_patient_relationships"))
+            after = run_all(conn, args.repeat)
+
+        for (name, old), (_, new) in zip(before, after):
+            speedup = old["ms"] / new["ms"] if new["ms"] else float("inf")
+            print(f"\n{name}")
+            print(f"  before: {old['ms']:9.3f} ms  {old['buffers']:7d} buffers  {old['scan']}")
+            print(f"  after:  {new['ms']:9.3f} ms  {new['buffers']:7d} buffers  {new['scan']}")
+            print(f"  speedup: {speedup:.1f}x")
+
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import os
+import uuid
+from typing import Optional
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from models import Base, UserProfile
 from supabase import create_client, Client
 
@@ -20,6 +23,24 @@ JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 30
 JWT_REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Access token verification.
+# "local" checks signature, expiry and audience in-process; "remote" asks Supabase
+# (one HTTP round-trip per request). AUTH_REMOTE_FALLBACK lets local mode defer to
+# Supabase when it has no key material for a token (e.g. an unknown JWKS kid).
+AUTH_VERIFICATION_MODE = os.getenv("AUTH_VERIFICATION_MODE", "local" if JWT_SECRET_KEY else "remote").lower()
+AUTH_REMOTE_FALLBACK = os.getenv("AUTH_REMOTE_FALLBACK", "false").lower() == "true"
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "10"))
+# Asymmetric signing keys; set AUTH_USE_JWKS=true to verify RS256/ES256 tokens
+AUTH_USE_JWKS = os.getenv("AUTH_USE_JWKS", "false").lower() == "true"
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL",
+    f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", "600"))
+# How often the banned/deleted user list is reloaded from auth.users
+AUTH_REVOCATION_REFRESH_SECONDS = int(os.getenv("AUTH_REVOCATION_REFRESH_SECONDS", "60"))
+
 
 _supabase_client = None
 _supabase_admin_client = None
@@ -49,33 +70,126 @@ def get_supabase_storage():
     client = get_supabase_admin_client()
     return client.storage
 
-if DATABASE_URL:
-    # Using Session pooler (port 6543) - better support for prepared statements
-    sync_engine = create_engine(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"))
+# Deployment-aware connection pooling.
+# "queue" keeps a pool of warm asyncpg connections (uvicorn / long-running hosts),
+# "null" opens a fresh connection per session (Lambda, where the process is frozen
+# between invocations and pooled sockets go stale). Defaults to "null" on Lambda.
+IS_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "null" if IS_LAMBDA else "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_COMMAND_TIMEOUT = int(os.getenv("DB_COMMAND_TIMEOUT", "60"))
+# Set when connecting through pgbouncer / Supabase pooler in transaction mode (port 6543),
+# which cannot keep server-side prepared statements across transactions.
+DB_PGBOUNCER_TRANSACTION_MODE = os.getenv("DB_PGBOUNCER_TRANSACTION_MODE", "false").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "0" if DB_PGBOUNCER_TRANSACTION_MODE else "100"))
+
+
+def create_db_engine(
+    database_url: str,
+    pool_mode: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    application_name: str = "SureShot_api",
+):
+    """
+    Build the async engine for the current deployment.
     
-    print(f"Using Session pooler connection: {DATABASE_URL.split('@')[0]}@...")
-    asyncpg_url = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+    Args:
+        database_url: Postgres URL (plain or postgresql+asyncpg://)
+        pool_mode: "queue" or "null"; defaults to DB_POOL_MODE
+        pool_size: Pool size override (queue mode only)
+        max_overflow: Overflow override (queue mode only)
+        application_name: Reported to Postgres in pg_stat_activity
+        
+    Returns:
+        AsyncEngine configured with the matching pool class
+    """
+    pool_mode = (pool_mode or DB_POOL_MODE).lower()
+    asyncpg_url = make_url(
+        database_url.replace("postgresql://", "postgresql+asyncpg://")
+    ).update_query_dict({
+        # SQLAlchemy's own prepared statement cache on top of asyncpg
+        "prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)
+    })
     
-    # Session pooler connection - allows prepared statements
-    async_engine = create_async_engine(
-        asyncpg_url,
-        echo=False,
-        poolclass=NullPool,  # Let Supabase handle pooling
-        connect_args={
-            "command_timeout": 60,
-            "server_settings": {
-                "application_name": "SureShot_session_pool"
-            }
+    connect_args = {
+        "command_timeout": DB_COMMAND_TIMEOUT,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "application_name": application_name
         }
-    )
+    }
+    if DB_PGBOUNCER_TRANSACTION_MODE:
+        # Unique names so statements prepared on one backend never collide on another
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    
+    engine_kwargs = {
+        "echo": False,
+        "connect_args": connect_args,
+    }
+    
+    if pool_mode == "null":
+        engine_kwargs["poolclass"] = NullPool
+    elif pool_mode == "queue":
+        engine_kwargs.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size if pool_size is not None else DB_POOL_SIZE,
+            max_overflow=max_overflow if max_overflow is not None else DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    else:
+        raise ValueError(f"Unsupported DB_POOL_MODE '{pool_mode}', expected 'queue' or 'null'")
+    
+    return create_async_engine(asyncpg_url, **engine_kwargs)
 
-    AsyncSessionLocal = sessionmaker(
-        bind=async_engine,
+
+def create_session_factory(engine):
+    """Session factory bound to an engine, with the app's session defaults"""
+    return sessionmaker(
+        bind=engine,
         class_=AsyncSession,
         expire_on_commit=False,
         autoflush=False,     # Manual flush control
         autocommit=False
     )
+
+
+def get_pool_status(engine=None) -> dict:
+    """Snapshot of connection pool metrics for health checks and dashboards"""
+    engine = engine or async_engine
+    if engine is None:
+        return {"configured": False}
+    
+    pool = engine.sync_engine.pool
+    status = {
+        "configured": True,
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    return status
+
+
+if DATABASE_URL:
+    sync_engine = create_engine(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"))
+    
+    print(f"Using {DB_POOL_MODE} pool connection: {DATABASE_URL.split('@')[0]}@...")
+    async_engine = create_db_engine(DATABASE_URL)
+    AsyncSessionLocal = create_session_factory(async_engine)
 else:
     sync_engine = None
     async_engine = None
@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from fastapi.responses import HTMLResponse, Response
-from fastapi import Request, HTTPException
+from fastapi import Request, HTTPException, Depends
 import os
 import asyncio
 from datetime import datetime, date, timedelta
@@ -14,21 +14,37 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 from routers.auth.auth import router as auth_router
 from routers.users.users import router as users_router
-from routers.admin.admin import router as admin_router
+from routers.admin.admin import router as admin_router, get_admin_user
 from routers.workers.workers import router as workers_router
 from routers.vaccines.vaccines import router as vaccines_router
 from routers.doctors.doctors import router as doctors_router
 from routers.demo.demo import router as demo_router
-from config import async_engine, get_db
+from config import async_engine, get_db, get_pool_status, IS_LAMBDA
 from models import VaccineTemplate, AccountType
 from vaccine_data import BABY_VACCINE_TEMPLATES
 from utils.reminder_service import send_vaccination_reminders
+from routers.auth.helpers import auth_helpers
+from utils.outbox import OutboxWorker
+from utils.smtp import smtp_service
+from utils.twilio import twilio_service
+from utils.vaccine_catalog import vaccine_catalog
+from utils.leader import LeaderElection, leader_only
+from utils.job_runner import run_pending_jobs, JOB_POLL_SECONDS
 
 ENVIRONMENT = os.getenv("ENVIRONMENT", "dev")
 IS_PRODUCTION = ENVIRONMENT == "prod"
+# Run an outbox worker inside the API process; disable when workers run separately (python -m utils.outbox)
+# (off by default on Lambda, where worker.scheduled_handler drains the outbox)
+OUTBOX_WORKER_ENABLED = os.getenv("OUTBOX_WORKER_ENABLED", str(not IS_LAMBDA)).lower() == "true"
+# Run the reminder scheduler inside the API process; disable when python worker.py runs it
+# (always off on Lambda, which freezes the process between requests)
+RUN_SCHEDULER_IN_API = not IS_LAMBDA and os.getenv("RUN_SCHEDULER_IN_API", "true").lower() == "true"
 
 # Initialize APScheduler
 scheduler = AsyncIOScheduler()
+# Every process runs the scheduler, but only the elected leader executes its jobs
+scheduler_leader = LeaderElection("scheduler")
+outbox_worker = OutboxWorker()
 
 app = FastAPI(
     title="SureShot API - Baby Vaccination Tracker",
@@ -84,6 +100,7 @@ async def populate_vaccine_templates():
                         continue
             
             if new_count > 0:
+                vaccine_catalog.invalidate()
                 print(f"Successfully created {new_count} new vaccine templates")
             else:
                 print("All vaccine templates already exist - no new templates added")
@@ -137,20 +154,47 @@ async def startup_event():
     print("Starting SureShot API...")
     await populate_vaccine_templates()
     
-    # Start the vaccination reminder scheduler
+    # Warm the vaccine template cache used by schedule generation and lookups
     try:
-        scheduler.add_job(
-            send_vaccination_reminders,
-            IntervalTrigger(minutes=30),  # Run every 30 minutes
-            id="vaccination_reminders",
-            name="Vaccination Reminder Job",
-            max_instances=1,  # Prevent overlapping jobs
-            replace_existing=True
-        )
-        scheduler.start()
-        print("✅ Vaccination reminder scheduler started (runs every 30 minutes)")
+        async with AsyncSession(async_engine) as session:
+            catalog = await vaccine_catalog.load(session)
+        print(f"✅ Vaccine catalog loaded ({len(catalog)} templates)")
     except Exception as e:
-        print(f"❌ Failed to start vaccination reminder scheduler: {e}")
+        print(f"❌ Failed to load vaccine catalog: {e}")
+    
+    # Keep the banned/deleted user list warm for local token verification
+    auth_helpers.revocation_list.start()
+    
+    # Start the vaccination reminder scheduler
+    if RUN_SCHEDULER_IN_API:
+        try:
+            scheduler_leader.start()
+            scheduler.add_job(
+                leader_only(scheduler_leader, send_vaccination_reminders),
+                IntervalTrigger(minutes=30),  # Run every 30 minutes
+                id="vaccination_reminders",
+                name="Vaccination Reminder Job",
+                max_instances=1,  # Prevent overlapping jobs
+                replace_existing=True
+            )
+            # Picks up background jobs left PENDING or abandoned by a restart
+            scheduler.add_job(
+                run_pending_jobs,
+                IntervalTrigger(seconds=JOB_POLL_SECONDS),
+                id="background_jobs",
+                name="Background Job Runner",
+                max_instances=1,
+                replace_existing=True
+            )
+            scheduler.start()
+            print("✅ Vaccination reminder scheduler started (runs every 30 minutes)")
+        except Exception as e:
+            print(f"❌ Failed to start vaccination reminder scheduler: {e}")
+    
+    # Start delivering queued notifications
+    if OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+        print("✅ Notification outbox worker started")
     
     print("SureShot API startup completed")
 
@@ -158,15 +202,30 @@ async def startup_event():
 async def shutdown_event():
     """Clean up on shutdown"""
     # Shutdown scheduler
-    try:
-        scheduler.shutdown(wait=False)
-        print("✅ Vaccination reminder scheduler shutdown")
-    except Exception as e:
-        print(f"❌ Error shutting down scheduler: {e}")
+    if RUN_SCHEDULER_IN_API:
+        try:
+            scheduler.shutdown(wait=False)
+            print("✅ Vaccination reminder scheduler shutdown")
+        except Exception as e:
+            print(f"❌ Error shutting down scheduler: {e}")
+        
+        await scheduler_leader.stop()
     
+    if OUTBOX_WORKER_ENABLED:
+        await outbox_worker.stop()
+        print("✅ Notification outbox worker stopped")
+    
+    await auth_helpers.revocation_list.stop()
+    smtp_service.close()
+    await twilio_service.aclose()
     await async_engine.dispose()
     print("SureShot API shutdown completed")
 
+@app.get("/health/db-pool", include_in_schema=False)
+async def db_pool_health(current_admin=Depends(get_admin_user)):
+    """Connection pool metrics (size, checked out, overflow) for monitoring, admins only"""
+    return get_pool_status()
+
 @app.get("/docs", include_in_schema=False)
 async def api_documentation(request: Request):
     openapi_url = "/Prod/openapi.json" if IS_PRODUCTION else "/openapi.json"
@@ -0,0 +1,31 @@
+"""add job watermarks table
+
+Revision ID: 5d2c9b7e1f08
+Revises: e83f1a6b2d40
+Create Date: 2026-10-17 16:27:03.518240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c9b7e1f08'
+down_revision: Union[str, None] = 'e83f1a6b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job_watermarks',
+    sa.Column('job_name', sa.String(length=100), nullable=False),
+    sa.Column('watermark', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('job_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_watermarks')
@@ -0,0 +1,40 @@
+"""add notification outbox priority
+
+Revision ID: a94e3c7d2b51
+Revises: 5d2c9b7e1f08
+Create Date: 2026-10-17 18:42:15.207631
+
+Adding a NOT NULL column with a constant default is a metadata-only change on
+Postgres 11+, so existing rows are not rewritten. The lane index is built
+CONCURRENTLY, outside a transaction, so the outbox stays writable.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a94e3c7d2b51'
+down_revision: Union[str, None] = '5d2c9b7e1f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox', sa.Column('priority', sa.SmallInteger(), server_default=sa.text('2'), nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_notification_outbox_lane_claim',
+            'notification_outbox',
+            ['priority', 'status', 'available_at'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_notification_outbox_lane_claim', table_name='notification_outbox', postgresql_concurrently=True)
+    op.drop_column('notification_outbox', 'priority')
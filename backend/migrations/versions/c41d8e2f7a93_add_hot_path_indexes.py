@@ -0,0 +1,72 @@
+"""add hot path indexes
+
+Revision ID: c41d8e2f7a93
+Revises: 7b2e4d9a6c15
+Create Date: 2026-10-17 12:20:07.553912
+
+Indexes are built CONCURRENTLY so the tables stay writable during the upgrade.
+CREATE INDEX CONCURRENTLY cannot run inside a transaction, hence autocommit_block.
+If a build is interrupted, Postgres leaves an INVALID index behind; drop it and
+re-run the upgrade.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e2f7a93'
+down_revision: Union[str, None] = '7b2e4d9a6c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_vaccination_records_user_administered_due',
+            'vaccination_records',
+            ['user_id', 'is_administered', 'due_date'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_drive_participants_user_id',
+            'drive_participants',
+            ['user_id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_doctor_patient_relationships_doctor_id',
+            'doctor_patient_relationships',
+            ['doctor_id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_user_profiles_city',
+            'user_profiles',
+            ['city'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_vaccination_reminders_unsent_type_due',
+            'vaccination_reminders',
+            ['reminder_type', 'due_date'],
+            unique=False,
+            postgresql_where=sa.text('NOT email_sent AND NOT sms_sent'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_vaccination_reminders_unsent_type_due', table_name='vaccination_reminders', postgresql_concurrently=True)
+        op.drop_index('idx_user_profiles_city', table_name='user_profiles', postgresql_concurrently=True)
+        op.drop_index('idx_doctor_patient_relationships_doctor_id', table_name='doctor_patient_relationships', postgresql_concurrently=True)
+        op.drop_index('idx_drive_participants_user_id', table_name='drive_participants', postgresql_concurrently=True)
+        op.drop_index('idx_vaccination_records_user_administered_due', table_name='vaccination_records', postgresql_concurrently=True)
@@ -0,0 +1,39 @@
+"""add drive participant page index
+
+Revision ID: e5b19d4c7a28
+Revises: c47e2a9f1d63
+Create Date: 2026-10-17 22:14:36.284517
+
+Serves the keyset pages of /workers/drive-participants: the index expression
+matches the endpoint's sort key, coalesce(baby_name, ''), so a page is read off
+the index instead of sorting the whole drive. Built CONCURRENTLY, outside a
+transaction, so drive_participants stays writable.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b19d4c7a28'
+down_revision: Union[str, None] = 'c47e2a9f1d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_drive_participants_drive_page',
+            'drive_participants',
+            ['vaccination_drive_id', 'is_vaccinated', sa.text("coalesce(baby_name, '')"), 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_drive_participants_drive_page', table_name='drive_participants', postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""add pending due index for lazy reminders
+
+Revision ID: e83f1a6b2d40
+Revises: c41d8e2f7a93
+Create Date: 2026-10-17 15:42:18.204117
+
+Supports REMINDER_MATERIALIZATION=lazy, where due reminders are derived from
+vaccination_records by due date. Built CONCURRENTLY, like c41d8e2f7a93.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83f1a6b2d40'
+down_revision: Union[str, None] = 'c41d8e2f7a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_vaccination_records_pending_due',
+            'vaccination_records',
+            ['due_date'],
+            unique=False,
+            postgresql_where=sa.text('NOT is_administered'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_vaccination_records_pending_due', table_name='vaccination_records', postgresql_concurrently=True)
@@ -3,6 +3,7 @@ from sqlalchemy import (
     String, 
     Text, 
     DateTime, 
+    Date,
     SmallInteger,
     CheckConstraint,
     PrimaryKeyConstraint,
@@ -219,6 +220,10 @@ class UserProfile(Base):
         foreign_keys="[DoctorPatientRelationship.user_id]",
         viewonly=True
     )
+    
+    __table_args__ = (
+        Index('idx_user_profiles_city', 'city'),  # Drive enrollment by city
+    )
 
 
 class WorkerDetails(Base):
@@ -259,6 +264,12 @@ class WorkerDetails(Base):
     )
       # Relationships
     user: Mapped["Users"] = relationship("Users", back_populates="worker_details")
+    profile: Mapped[Optional["UserProfile"]] = relationship(
+        "UserProfile",
+        primaryjoin="WorkerDetails.user_id == UserProfile.user_id",
+        foreign_keys="[WorkerDetails.user_id]",
+        viewonly=True
+    )
     
     # Many-to-many relationship with vaccination drives through assignments
     vaccination_drives: Mapped[List["VaccinationDrive"]] = relationship(
@@ -304,6 +315,12 @@ class DoctorDetails(Base):
         nullable=False
     )      # Relationships
     user: Mapped["Users"] = relationship("Users", back_populates="doctor_details")
+    profile: Mapped[Optional["UserProfile"]] = relationship(
+        "UserProfile",
+        primaryjoin="DoctorDetails.user_id == UserProfile.user_id",
+        foreign_keys="[DoctorDetails.user_id]",
+        viewonly=True
+    )
     vaccination_records: Mapped[List["VaccinationRecord"]] = relationship(
         "VaccinationRecord", 
         back_populates="doctor",
@@ -455,6 +472,12 @@ class DriveParticipant(Base):
     # Unique constraint
     __table_args__ = (
         UniqueConstraint('vaccination_drive_id', 'user_id', name='unique_drive_user_participant'),
+        Index('idx_drive_participants_user_id', 'user_id'),  # A user's drives (/users/active-drives)
+        # Keyset pages of a drive's participants (/workers/drive-participants)
+        Index(
+            'idx_drive_participants_drive_page',
+            'vaccination_drive_id', 'is_vaccinated', text("coalesce(baby_name, '')"), 'id'
+        ),
     )
 
 
@@ -544,6 +567,10 @@ class VaccinationRecord(Base):
     # Ensure unique dose per vaccine per user
     __table_args__ = (
         UniqueConstraint('user_id', 'vaccine_template_id', 'dose_number', name='unique_user_vaccine_dose'),
+        # Schedule, due and history lookups filter by user and status, ordered by due date
+        Index('idx_vaccination_records_user_administered_due', 'user_id', 'is_administered', 'due_date'),
+        # Lazy reminder mode scans pending doses by due date
+        Index('idx_vaccination_records_pending_due', 'due_date', postgresql_where=text("NOT is_administered")),
     )
 
 
@@ -584,6 +611,7 @@ class DoctorPatientRelationship(Base):
     # Ensure unique doctor-patient relationship
     __table_args__ = (
         UniqueConstraint('user_id', 'doctor_id', name='unique_doctor_patient'),
+        Index('idx_doctor_patient_relationships_doctor_id', 'doctor_id'),  # A doctor's patients
     )
 
 
@@ -643,4 +671,180 @@ class VaccinationReminder(Base):
         UniqueConstraint('vaccination_record_id', 'reminder_type', name='unique_vaccination_reminder'),
         Index('idx_vaccination_reminders_due_date', 'due_date'),
         Index('idx_vaccination_reminders_user_type', 'user_id', 'reminder_type'),
+        # Due-reminder selection only ever looks at unsent rows
+        Index(
+            'idx_vaccination_reminders_unsent_type_due',
+            'reminder_type',
+            'due_date',
+            postgresql_where=text("NOT email_sent AND NOT sms_sent")
+        ),
+    )
+
+
+class NotificationChannel(enum.Enum):
+    EMAIL = "EMAIL"
+    SMS = "SMS"
+
+
+class NotificationPriority(enum.IntEnum):
+    """Outbox delivery lanes, most urgent first (stored as a small integer)"""
+    CRITICAL = 0  # Transactional confirmations
+    HIGH = 1      # 1-day reminders
+    NORMAL = 2    # 7-day reminders, operational notices
+    LOW = 3       # 15/30-day reminders
+    BULK = 4      # Drive announcements and other fan-outs
+
+
+class OutboxStatus(enum.Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
+class NotificationOutbox(Base):
+    """
+    Durable queue of outgoing email/SMS notifications
+    Rows are written alongside the change that triggers them and delivered by outbox workers,
+    which claim batches with SELECT ... FOR UPDATE SKIP LOCKED so several processes can share the queue
+    """
+    __tablename__ = "notification_outbox"
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    channel: Mapped[NotificationChannel] = mapped_column(
+        SQLAlchemyEnum(NotificationChannel, name='notificationchannel'),
+        nullable=False
+    )
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[Optional[str]] = mapped_column(String(255))
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    # Delivery lane (NotificationPriority); workers claim lanes by weight, lowest value first
+    priority: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+        default=NotificationPriority.NORMAL.value,
+        server_default=text(str(NotificationPriority.NORMAL.value))
+    )
+    
+    # Delivery state
+    status: Mapped[OutboxStatus] = mapped_column(
+        SQLAlchemyEnum(OutboxStatus, name='outboxstatus'),
+        nullable=False,
+        default=OutboxStatus.PENDING,
+        server_default=OutboxStatus.PENDING.value
+    )
+    attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0, server_default=text("0"))
+    max_attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=5, server_default=text("5"))
+    available_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False
+    )
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100))
+    locked_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(True))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    sent_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(True))
+    
+    # Idempotency key (e.g. "reminder:<id>:email") and grouping key for progress tracking
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(200), unique=True)
+    correlation_id: Mapped[Optional[str]] = mapped_column(String(100), index=True)
+    
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+        nullable=False
+    )
+    
+    __table_args__ = (
+        Index('idx_notification_outbox_claim', 'status', 'available_at'),
+        Index('idx_notification_outbox_lane_claim', 'priority', 'status', 'available_at'),
+    )
+
+
+class JobStatus(enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class BackgroundJob(Base):
+    """
+    Long-running work started from an API request (e.g. vaccination drive fan-out)
+    Progress counters and a resume cursor are stored as JSON so each job type defines its own
+    """
+    __tablename__ = "background_jobs"
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[JobStatus] = mapped_column(
+        SQLAlchemyEnum(JobStatus, name='jobstatus'),
+        nullable=False,
+        default=JobStatus.PENDING,
+        server_default=JobStatus.PENDING.value
+    )
+    params: Mapped[Optional[dict]] = mapped_column(JSONB)
+    counters: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
+    cursor: Mapped[Optional[dict]] = mapped_column(JSONB)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    created_by: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), 
+        ForeignKey("auth.users.id", ondelete="SET NULL")
+    )
+    started_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(True))
+    finished_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(True))
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+        nullable=False
+    )
+    
+    __table_args__ = (
+        Index('idx_background_jobs_type_status', 'job_type', 'status'),
+    )
+
+
+class JobWatermark(Base):
+    """
+    Last period a recurring job finished successfully
+    Lets each run process only the work that appeared since the previous one
+    """
+    __tablename__ = "job_watermarks"
+    
+    job_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    watermark: Mapped[Date] = mapped_column(Date, nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+        nullable=False
+    )
+
+
+class RevokedSession(Base):
+    """
+    Sessions signed out before their access tokens expire
+    Every API process loads these into its revocation list (routers/auth/helpers.py)
+    """
+    __tablename__ = "revoked_sessions"
+    
+    session_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True))
+    expires_at: Mapped[DateTime] = mapped_column(DateTime(True), nullable=False, index=True)
+    revoked_at: Mapped[DateTime] = mapped_column(
+        DateTime(True), 
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False
     )
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, delete
-from sqlalchemy.orm import selectinload, joinedload
-from config import get_db, get_supabase_client
-from models import UserProfile, WorkerDetails, DoctorDetails, VaccinationDrive, DriveWorkerAssignment, DriveParticipant, AccountType, Users
+from sqlalchemy import select, and_, delete, func
+from sqlalchemy.orm import selectinload, raiseload
+from config import get_db, get_supabase_client, IS_LAMBDA
+from models import UserProfile, WorkerDetails, DoctorDetails, VaccinationDrive, DriveWorkerAssignment, DriveParticipant, AccountType, BackgroundJob, JobStatus
 from routers.auth.auth import get_current_user
 from .schemas import (
     CreateWorkerRequest, 
@@ -17,9 +17,15 @@ from .schemas import (
     WorkerListResponse,
     DoctorListResponse,
     VaccinationDriveListResponse,
+    DriveJobProgressResponse,
+    ScheduleBackfillProgressResponse,
     DocumentUploadResponse
 )
-from .helpers import upload_worker_document, upload_doctor_document, create_drive_participants, notify_assigned_workers, notify_drive_participants
+from .helpers import upload_worker_document, upload_doctor_document, build_worker_response
+from utils.jobs import create_job, spawn_job, mark_job_running, requeue_job
+from utils.pagination import paginate_query, split_page
+from utils.drive_fanout import DRIVE_FANOUT_JOB, run_drive_fanout, get_drive_job_progress
+from utils.schedule_backfill import SCHEDULE_BACKFILL_JOB, run_schedule_backfill, get_schedule_backfill_progress
 from typing import Optional, List
 from datetime import datetime
 import logging
@@ -35,12 +41,9 @@ supabase = get_supabase_client()
 
 
 async def get_admin_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    current_user=Depends(get_current_user)
 ):
     """Get current admin user and verify admin privileges"""
-    current_user = await get_current_user(credentials, db)
-    
     if current_user["profile"].account_type != AccountType.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -212,57 +215,49 @@ async def create_worker(
 
 @router.get("/workers", response_model=WorkerListResponse)
 async def get_workers(
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset, ignored when cursor is given"),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     city: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),    current_admin=Depends(get_admin_user)
 ):
-    """Get all workers with optional city filter"""
+    """Get all workers with optional city filter, paginated by (created_at, id)"""
     try:
-        query = select(WorkerDetails).options(
-            joinedload(WorkerDetails.user).joinedload(Users.user_profile)
-        )
-        
+        filters = []
         if city:
-            query = query.where(WorkerDetails.city_name.ilike(f"%{city}%"))
+            filters.append(WorkerDetails.city_name.ilike(f"%{city}%"))
         
         # Get total count
-        count_query = select(WorkerDetails)
-        if city:
-            count_query = count_query.where(WorkerDetails.city_name.ilike(f"%{city}%"))
-        
-        total_result = await db.execute(count_query)
-        total = len(total_result.scalars().all())
-        
-        # Get paginated results
-        query = query.offset(skip).limit(limit)
+        total_result = await db.execute(
+            select(func.count()).select_from(WorkerDetails).where(*filters)
+        )
+        total = total_result.scalar_one()
+        
+        # Get paginated results with profiles in one extra query
+        query = paginate_query(
+            select(WorkerDetails)
+            .where(*filters)
+            .options(
+                raiseload(WorkerDetails.vaccination_drives),
+                selectinload(WorkerDetails.profile)
+            ),
+            [WorkerDetails.created_at, WorkerDetails.id],
+            limit,
+            cursor=cursor,
+            skip=skip
+        )
         result = await db.execute(query)
-        workers = result.scalars().all()
+        workers, next_cursor = split_page(
+            result.scalars().all(), limit, lambda worker: (worker.created_at, worker.id)
+        )
         
-        worker_responses = []
-        for worker in workers:            # Get user profile
-            profile_result = await db.execute(
-                select(UserProfile).where(UserProfile.user_id == worker.user_id)
-            )
-            profile = profile_result.scalar_one_or_none()
-            
-            worker_responses.append(WorkerResponse(
-                id=str(worker.id),
-                user_id=str(worker.user_id),
-                city_name=worker.city_name,
-                government_id_url=worker.government_id_url,
-                specialization=worker.specialization,
-                experience_years=worker.experience_years,
-                is_active=worker.is_active,
-                created_at=worker.created_at,
-                username=profile.username if profile else None,
-                first_name=profile.first_name if profile else None,
-                last_name=profile.last_name if profile else None
-            ))
+        worker_responses = [build_worker_response(worker) for worker in workers]
         
-        return WorkerListResponse(workers=worker_responses, total=total)
+        return WorkerListResponse(workers=worker_responses, total=total, next_cursor=next_cursor)
         
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         logger.error(f"Failed to get workers: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -357,29 +352,34 @@ async def create_doctor(
 
 @router.get("/doctors", response_model=DoctorListResponse)
 async def get_doctors(
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset, ignored when cursor is given"),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
     current_admin=Depends(get_admin_user)
 ):
-    """Get all doctors"""
+    """Get all doctors, paginated by (created_at, id)"""
     try:
         # Get total count
-        total_result = await db.execute(select(DoctorDetails))
-        total = len(total_result.scalars().all())
-        
-        # Get paginated results
-        query = select(DoctorDetails).offset(skip).limit(limit)
+        total_result = await db.execute(select(func.count()).select_from(DoctorDetails))
+        total = total_result.scalar_one()
+        
+        # Get paginated results with profiles in one extra query
+        query = paginate_query(
+            select(DoctorDetails).options(selectinload(DoctorDetails.profile)),
+            [DoctorDetails.created_at, DoctorDetails.id],
+            limit,
+            cursor=cursor,
+            skip=skip
+        )
         result = await db.execute(query)
-        doctors = result.scalars().all()
+        doctors, next_cursor = split_page(
+            result.scalars().all(), limit, lambda doctor: (doctor.created_at, doctor.id)
+        )
         
         doctor_responses = []
         for doctor in doctors:
-            # Get user profile
-            profile_result = await db.execute(
-                select(UserProfile).where(UserProfile.user_id == doctor.user_id)
-            )
-            profile = profile_result.scalar_one_or_none()
+            profile = doctor.profile
             doctor_responses.append(DoctorResponse(
                 id=str(doctor.id),
                 user_id=str(doctor.user_id),
@@ -394,9 +394,11 @@ async def get_doctors(
                 last_name=profile.last_name if profile else None
             ))
         
-        return DoctorListResponse(doctors=doctor_responses, total=total)
+        return DoctorListResponse(doctors=doctor_responses, total=total, next_cursor=next_cursor)
         
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         logger.error(f"Failed to get doctors: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -434,64 +436,59 @@ async def create_vaccination_drive(
         # Assign workers if provided
         assigned_workers = []
         if drive_data.assigned_worker_ids:
+            worker_ids = []
             for worker_id_str in drive_data.assigned_worker_ids:
                 try:
-                    worker_id = uuid.UUID(worker_id_str)
-                    
-                    # Verify worker exists
-                    worker_result = await db.execute(
-                        select(WorkerDetails).where(WorkerDetails.id == worker_id)
-                    )
-                    worker = worker_result.scalar_one_or_none()
-                    
-                    if not worker:
-                        logger.warning(f"Worker {worker_id} not found, skipping assignment")
-                        continue
-                      # Create assignment
-                    assignment = DriveWorkerAssignment(
-                        drive_id=vaccination_drive.id,
-                        worker_id=worker_id
-                    )
-                    db.add(assignment)
-                    assigned_workers.append(worker)
-                    
+                    worker_ids.append(uuid.UUID(worker_id_str))
                 except ValueError:
                     logger.warning(f"Invalid worker ID format: {worker_id_str}")
+            
+            # Verify workers exist, loading their profiles for the response
+            workers_result = await db.execute(
+                select(WorkerDetails)
+                .where(WorkerDetails.id.in_(worker_ids))
+                .options(
+                    raiseload(WorkerDetails.vaccination_drives),
+                    selectinload(WorkerDetails.profile)
+                )
+            )
+            workers_by_id = {worker.id: worker for worker in workers_result.scalars().all()}
+            
+            for worker_id in dict.fromkeys(worker_ids):
+                worker = workers_by_id.get(worker_id)
+                if not worker:
+                    logger.warning(f"Worker {worker_id} not found, skipping assignment")
                     continue
+                # Create assignment
+                assignment = DriveWorkerAssignment(
+                    drive_id=vaccination_drive.id,
+                    worker_id=worker_id
+                )
+                db.add(assignment)
+                assigned_workers.append(worker)
+        
+        # Enrollment and notifications run as a background job tracked alongside the drive
+        job = await create_job(
+            db,
+            DRIVE_FANOUT_JOB,
+            params={
+                "drive_id": str(vaccination_drive.id),
+                "worker_ids": [str(worker.id) for worker in assigned_workers]
+            },
+            created_by=current_admin["supabase_user"].id,
+            running=not IS_LAMBDA
+        )
         
         await db.commit()
         await db.refresh(vaccination_drive)
         
-        # Auto-create drive participants for all users in the same city
-        await create_drive_participants(db, vaccination_drive)
-        
-        # Send notifications to assigned workers
-        if assigned_workers:
-            await notify_assigned_workers(db, vaccination_drive, assigned_workers)
-        
-        # Send notifications to participants
-        await notify_drive_participants(db, vaccination_drive)
+        # Lambda freezes the process once the response is returned, so there the job
+        # stays PENDING for the scheduled worker (worker.scheduled_handler) to run
+        if not IS_LAMBDA:
+            spawn_job(run_drive_fanout(job.id, vaccination_drive.id, [worker.id for worker in assigned_workers]))
         
         # Prepare worker responses
-        worker_responses = []
-        for worker in assigned_workers:
-            profile_result = await db.execute(
-                select(UserProfile).where(UserProfile.user_id == worker.user_id)
-            )
-            profile = profile_result.scalar_one_or_none()
-            
-            worker_responses.append(WorkerResponse(
-                id=str(worker.id),
-                user_id=str(worker.user_id),
-                city_name=worker.city_name,
-                government_id_url=worker.government_id_url,
-                specialization=worker.specialization,
-                experience_years=worker.experience_years,
-                is_active=worker.is_active,
-                created_at=worker.created_at,
-                username=profile.username if profile else None,
-                first_name=profile.first_name if profile else None,
-                last_name=profile.last_name if profile else None            ))
+        worker_responses = [build_worker_response(worker) for worker in assigned_workers]
         
         return VaccinationDriveResponse(
             id=str(vaccination_drive.id),
@@ -504,7 +501,8 @@ async def create_vaccination_drive(
             created_by=str(vaccination_drive.created_by),
             created_at=vaccination_drive.created_at,
             updated_at=vaccination_drive.updated_at,
-            assigned_workers=worker_responses
+            assigned_workers=worker_responses,
+            job_id=str(job.id)
         )
         
     except Exception as e:
@@ -517,66 +515,79 @@ async def create_vaccination_drive(
             detail="Vaccination drive creation failed"
         )
 
+@router.get("/vaccination-drives/jobs/{job_id}", response_model=DriveJobProgressResponse)
+async def get_vaccination_drive_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_admin=Depends(get_admin_user)
+):
+    """Get enrollment and notification progress for a vaccination drive job"""
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID format"
+        )
+    
+    progress = await get_drive_job_progress(db, job_uuid)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return DriveJobProgressResponse(**progress)
+
 @router.get("/vaccination-drives", response_model=VaccinationDriveListResponse)
 async def get_vaccination_drives(
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset, ignored when cursor is given"),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     city: Optional[str] = Query(None),
     active_only: bool = Query(True),
     db: AsyncSession = Depends(get_db),
     current_admin=Depends(get_admin_user)
 ):
-    """Get all vaccination drives with optional filters"""
+    """Get all vaccination drives with optional filters, newest first"""
     try:
-        query = select(VaccinationDrive)
-        
+        filters = []
         if city:
-            query = query.where(VaccinationDrive.vaccination_city.ilike(f"%{city}%"))
+            filters.append(VaccinationDrive.vaccination_city.ilike(f"%{city}%"))
         
         if active_only:
-            query = query.where(VaccinationDrive.is_active == True)
+            filters.append(VaccinationDrive.is_active == True)
         
         # Get total count
-        count_result = await db.execute(query)
-        total = len(count_result.scalars().all())
-        
-        # Get paginated results
-        query = query.offset(skip).limit(limit).order_by(VaccinationDrive.created_at.desc())
+        count_result = await db.execute(
+            select(func.count()).select_from(VaccinationDrive).where(*filters)
+        )
+        total = count_result.scalar_one()
+        
+        # Get paginated results; assigned workers and their profiles load in one query per level
+        query = paginate_query(
+            select(VaccinationDrive)
+            .where(*filters)
+            .options(
+                selectinload(VaccinationDrive.assigned_workers).options(
+                    raiseload(WorkerDetails.vaccination_drives),
+                    selectinload(WorkerDetails.profile)
+                )
+            ),
+            [VaccinationDrive.created_at, VaccinationDrive.id],
+            limit,
+            cursor=cursor,
+            skip=skip,
+            descending=True
+        )
         result = await db.execute(query)
-        drives = result.scalars().all()
+        drives, next_cursor = split_page(
+            result.scalars().all(), limit, lambda drive: (drive.created_at, drive.id)
+        )
         
         drive_responses = []
         for drive in drives:
-            # Get assigned workers
-            assignments_result = await db.execute(
-                select(DriveWorkerAssignment).where(DriveWorkerAssignment.drive_id == drive.id)
-            )
-            assignments = assignments_result.scalars().all()
-            
-            worker_responses = []
-            for assignment in assignments:
-                worker_result = await db.execute(
-                    select(WorkerDetails).where(WorkerDetails.id == assignment.worker_id)
-                )
-                worker = worker_result.scalar_one_or_none()
-                if worker:
-                    profile_result = await db.execute(
-                        select(UserProfile).where(UserProfile.user_id == worker.user_id)
-                    )
-                    profile = profile_result.scalar_one_or_none()
-                    
-                    worker_responses.append(WorkerResponse(
-                        id=str(worker.id),
-                        user_id=str(worker.user_id),
-                        city_name=worker.city_name,
-                        government_id_url=worker.government_id_url,
-                        specialization=worker.specialization,
-                        experience_years=worker.experience_years,
-                        is_active=worker.is_active,
-                        created_at=worker.created_at,
-                        username=profile.username if profile else None,
-                        first_name=profile.first_name if profile else None,
-                        last_name=profile.last_name if profile else None                    ))
+            worker_responses = [build_worker_response(worker) for worker in drive.assigned_workers]
             
             drive_responses.append(VaccinationDriveResponse(
                 id=str(drive.id),
@@ -592,9 +603,11 @@ async def get_vaccination_drives(
                 assigned_workers=worker_responses
             ))
         
-        return VaccinationDriveListResponse(drives=drive_responses, total=total)
+        return VaccinationDriveListResponse(drives=drive_responses, total=total, next_cursor=next_cursor)
         
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         logger.error(f"Failed to get vaccination drives: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -603,70 +616,70 @@ async def get_vaccination_drives(
 
 @router.post("/generate-all-vaccination-schedules")
 async def generate_vaccination_schedules_for_all_users(
+    resume_job_id: Optional[str] = Query(None, description="Resume a failed or interrupted generation job"),
     current_admin = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Admin endpoint to generate vaccination schedules for all users who don't have them
     This is useful for existing users who were created before the auto-generation feature
+    
+    Runs as a background job that processes users in chunks and commits per chunk;
+    poll /admin/vaccination-schedules/jobs/{job_id} for progress.
     """
     try:
-        from routers.vaccines.vaccines import generate_vaccination_schedule_for_user
-        
-        # Get all user profiles with baby birth dates
-        profiles_query = select(UserProfile).where(
-            UserProfile.baby_date_of_birth.isnot(None)
-        )
-        result = await db.execute(profiles_query)
-        profiles = result.scalars().all()
-        
-        total_users = len(profiles)
-        processed_users = 0
-        total_records_created = 0
-        errors = []
-        
-        logger.info(f"Starting vaccination schedule generation for {total_users} users")
-        
-        for profile in profiles:
+        if resume_job_id:
             try:
-                created_count = await generate_vaccination_schedule_for_user(
-                    db, 
-                    profile.user_id, 
-                    profile.baby_date_of_birth
+                job_uuid = uuid.UUID(resume_job_id)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid job ID format"
                 )
-                
-                if created_count > 0:
-                    total_records_created += created_count
-                    logger.info(f"Created {created_count} records for user {profile.baby_name}")
-                
-                processed_users += 1
-                
-            except Exception as e:
-                error_msg = f"Failed to create schedule for user {profile.baby_name} ({profile.user_id}): {str(e)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
-                continue
-        
-        await db.commit()
-        
-        result_message = f"Processed {processed_users}/{total_users} users. Created {total_records_created} vaccination records."
+            job = (await db.execute(
+                select(BackgroundJob).where(
+                    BackgroundJob.id == job_uuid,
+                    BackgroundJob.job_type == SCHEDULE_BACKFILL_JOB
+                )
+            )).scalar_one_or_none()
+            if not job:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Job not found"
+                )
+            if job.status in (JobStatus.RUNNING, JobStatus.COMPLETED):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Job is already {job.status.value.lower()}"
+                )
+        else:
+            job = await create_job(
+                db,
+                SCHEDULE_BACKFILL_JOB,
+                created_by=current_admin["supabase_user"].id,
+                running=not IS_LAMBDA
+            )
+            await db.commit()
         
-        if errors:
-            result_message += f" {len(errors)} errors occurred."
+        # On Lambda the job is left PENDING for the scheduled worker, which also
+        # resumes it from its cursor if an invocation times out
+        if IS_LAMBDA:
+            if resume_job_id:
+                await requeue_job(db, job.id)
+        else:
+            if resume_job_id:
+                await mark_job_running(db, job.id)
+            spawn_job(run_schedule_backfill(job.id))
         
-        logger.info(f"Vaccination schedule generation completed: {result_message}")
+        logger.info(f"Vaccination schedule generation job {job.id} started")
         
         return {
-            "message": "Vaccination schedule generation completed",
-            "summary": {
-                "total_users_found": total_users,
-                "users_processed": processed_users,
-                "total_records_created": total_records_created,
-                "errors_count": len(errors)
-            },
-            "errors": errors if errors else None
+            "message": "Vaccination schedule generation started",
+            "job_id": str(job.id)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Error in bulk vaccination schedule generation: {str(e)}")
@@ -674,3 +687,27 @@ async def generate_vaccination_schedules_for_all_users(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate vaccination schedules: {str(e)}"
         )
+
+@router.get("/vaccination-schedules/jobs/{job_id}", response_model=ScheduleBackfillProgressResponse)
+async def get_vaccination_schedule_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_admin=Depends(get_admin_user)
+):
+    """Get progress of a bulk vaccination schedule generation job"""
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID format"
+        )
+    
+    progress = await get_schedule_backfill_progress(db, job_uuid)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return ScheduleBackfillProgressResponse(**progress)
@@ -1,10 +1,11 @@
 from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, func, literal, false
+from sqlalchemy.dialects.postgresql import insert, UUID
 from config import get_supabase_storage
-from models import UserProfile, DriveParticipant, VaccinationDrive, Users
-from utils.smtp import smtp_service
-from utils.twilio import twilio_service
+from models import UserProfile, DriveParticipant, VaccinationDrive, WorkerDetails, Users, NotificationChannel, NotificationPriority
+from utils.outbox import build_outbox_message, enqueue_notifications
+from .schemas import WorkerResponse
 import uuid
 import os
 from typing import Optional
@@ -20,6 +21,27 @@ ALLOWED_DOCUMENT_TYPES = [
 ]
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+NOTIFY_CHUNK_SIZE = 1000  # Drive participants notified per transaction
+
+def build_worker_response(worker: WorkerDetails) -> WorkerResponse:
+    """
+    Build a WorkerResponse from a worker loaded with its profile
+    (selectinload(WorkerDetails.profile)), without further queries
+    """
+    profile = worker.profile
+    return WorkerResponse(
+        id=str(worker.id),
+        user_id=str(worker.user_id),
+        city_name=worker.city_name,
+        government_id_url=worker.government_id_url,
+        specialization=worker.specialization,
+        experience_years=worker.experience_years,
+        is_active=worker.is_active,
+        created_at=worker.created_at,
+        username=profile.username if profile else None,
+        first_name=profile.first_name if profile else None,
+        last_name=profile.last_name if profile else None
+    )
 
 async def upload_worker_document(file: UploadFile, document_type: str) -> dict:
     """
@@ -177,64 +199,99 @@ async def upload_doctor_document(file: UploadFile, document_type: str) -> dict:
             detail="Document upload failed"
         )
 
-async def create_drive_participants(db: AsyncSession, vaccination_drive: VaccinationDrive):
+async def create_drive_participants(db: AsyncSession, vaccination_drive: VaccinationDrive, raise_errors: bool = False) -> int:
     """
     Auto-create drive participants for all users in the vaccination drive's city
+    
+    Enrollment is a single INSERT ... SELECT over user_profiles; users already enrolled
+    (a re-run) are skipped by ON CONFLICT on unique_drive_user_participant.
+    
+    Args:
+        db: Database session
+        vaccination_drive: The vaccination drive
+        raise_errors: Re-raise after rolling back instead of returning 0, so a
+            background job can record the failure
+    
+    Returns:
+        Number of participants created
     """
     try:
-        # Get all users in the same city as the vaccination drive
-        users_in_city_query = select(UserProfile).where(
-            UserProfile.city == vaccination_drive.vaccination_city
+        users_in_city = (
+            select(
+                func.gen_random_uuid(),
+                literal(vaccination_drive.id, UUID(as_uuid=True)),
+                UserProfile.user_id,
+                UserProfile.baby_name,
+                UserProfile.parent_name,
+                UserProfile.parent_mobile,
+                func.concat(
+                    UserProfile.address, ", ",
+                    UserProfile.city, ", ",
+                    UserProfile.state, " - ",
+                    UserProfile.pin_code
+                ),
+                false()
+            )
+            .where(UserProfile.city == vaccination_drive.vaccination_city)
         )
         
-        users_result = await db.execute(users_in_city_query)
-        users_in_city = users_result.scalars().all()
-        
-        # Create participant records for each user
-        participants_created = 0
-        for user_profile in users_in_city:
-            # Check if participant already exists (in case of re-run)
-            existing_participant = await db.execute(
-                select(DriveParticipant).where(
-                    and_(
-                        DriveParticipant.vaccination_drive_id == vaccination_drive.id,
-                        DriveParticipant.user_id == user_profile.user_id
-                    )
-                )
-            )
-            
-            if existing_participant.scalar_one_or_none():
-                continue  # Skip if already exists
-            
-            # Create new participant record
-            participant = DriveParticipant(
-                vaccination_drive_id=vaccination_drive.id,
-                user_id=user_profile.user_id,
-                baby_name=user_profile.baby_name,
-                parent_name=user_profile.parent_name,
-                parent_mobile=user_profile.parent_mobile,
-                address=f"{user_profile.address}, {user_profile.city}, {user_profile.state} - {user_profile.pin_code}",
-                is_vaccinated=False
+        enroll = (
+            insert(DriveParticipant)
+            .from_select(
+                [
+                    DriveParticipant.id,
+                    DriveParticipant.vaccination_drive_id,
+                    DriveParticipant.user_id,
+                    DriveParticipant.baby_name,
+                    DriveParticipant.parent_name,
+                    DriveParticipant.parent_mobile,
+                    DriveParticipant.address,
+                    DriveParticipant.is_vaccinated
+                ],
+                users_in_city
             )
-            
-            db.add(participant)
-            participants_created += 1
+            .on_conflict_do_nothing(constraint="unique_drive_user_participant")
+            .returning(DriveParticipant.id)
+            .cte("enrolled")
+        )
+        
+        # Count inserted rows server-side instead of returning every id
+        result = await db.execute(select(func.count()).select_from(enroll))
+        participants_created = result.scalar_one()
+        await db.commit()
         
         if participants_created > 0:
-            await db.commit()
             logger.info(f"Created {participants_created} drive participants for drive {vaccination_drive.id}")
         else:
             logger.info(f"No new participants created for drive {vaccination_drive.id}")
+        
+        return participants_created
             
     except Exception as e:
         logger.error(f"Error creating drive participants: {str(e)}")
         await db.rollback()
+        if raise_errors:
+            raise
         # Don't raise the exception - participant creation is supplementary
+        return 0
 
-async def notify_assigned_workers(db: AsyncSession, vaccination_drive: VaccinationDrive, assigned_workers: list):
+async def notify_assigned_workers(
+    db: AsyncSession, 
+    vaccination_drive: VaccinationDrive, 
+    assigned_workers: list,
+    correlation_id: Optional[str] = None,
+    raise_errors: bool = False
+) -> int:
     """
-    Send email and SMS notifications to workers assigned to a vaccination drive
+    Queue email and SMS notifications to workers assigned to a vaccination drive
+    
+    Args:
+        raise_errors: Re-raise a failed enqueue after rolling back instead of returning 0
+    
+    Returns:
+        Number of messages queued
     """
+    messages = []
     for worker in assigned_workers:
         try:
             # Get worker's profile for contact information
@@ -295,8 +352,15 @@ async def notify_assigned_workers(db: AsyncSession, vaccination_drive: Vaccinati
                 </html>
                 """
                 
-                smtp_service.send_html_email(user.email, email_subject, email_html)
-                logger.info(f"Assignment email sent to worker {worker.id} at {user.email}")
+                messages.append(build_outbox_message(
+                    NotificationChannel.EMAIL,
+                    user.email,
+                    email_html,
+                    subject=email_subject,
+                    dedupe_key=f"drive-assignment:{vaccination_drive.id}:{worker.id}:email",
+                    correlation_id=correlation_id,
+                    priority=NotificationPriority.NORMAL
+                ))
             
             # Send SMS Notification (use parent_mobile as contact number)
             contact_number = None
@@ -310,98 +374,156 @@ async def notify_assigned_workers(db: AsyncSession, vaccination_drive: Vaccinati
                     f"starting {start_date}. Please be prepared for your duties. - SureShot"
                 )
                 
-                twilio_service.send_sms(contact_number, sms_message)
-                logger.info(f"Assignment SMS sent to worker {worker.id} at {contact_number}")
+                messages.append(build_outbox_message(
+                    NotificationChannel.SMS,
+                    contact_number,
+                    sms_message,
+                    dedupe_key=f"drive-assignment:{vaccination_drive.id}:{worker.id}:sms",
+                    correlation_id=correlation_id,
+                    priority=NotificationPriority.NORMAL
+                ))
                 
         except Exception as e:
-            logger.error(f"Error sending notification to worker {worker.id}: {str(e)}")
+            logger.error(f"Error preparing notification for worker {worker.id}: {str(e)}")
             # Continue with other workers even if one fails
+    
+    try:
+        await enqueue_notifications(db, messages)
+        await db.commit()
+        logger.info(f"Queued {len(messages)} assignment notifications for drive {vaccination_drive.id}")
+        return len(messages)
+    except Exception as e:
+        logger.error(f"Error queueing worker notifications for drive {vaccination_drive.id}: {str(e)}")
+        await db.rollback()
+        if raise_errors:
+            raise
+        return 0
 
-async def notify_drive_participants(db: AsyncSession, vaccination_drive: VaccinationDrive):
+async def notify_drive_participants(
+    db: AsyncSession, 
+    vaccination_drive: VaccinationDrive,
+    correlation_id: Optional[str] = None,
+    raise_errors: bool = False
+) -> int:
     """
-    Send email and SMS notifications to all participants in a vaccination drive
+    Queue email and SMS notifications to all participants in a vaccination drive
+    
+    Participants are read in NOTIFY_CHUNK_SIZE keyset pages and each page is committed
+    on its own, so a city-wide drive never holds every participant in memory at once.
+    
+    Args:
+        raise_errors: Re-raise after rolling back instead of returning the count so far
+    
+    Returns:
+        Number of messages queued
     """
+    queued = 0
     try:
-        # Get all participants for this drive
-        participants_result = await db.execute(
-            select(DriveParticipant).where(
-                DriveParticipant.vaccination_drive_id == vaccination_drive.id
-            )
-        )
-        participants = participants_result.scalars().all()
-        
         # Format dates for display
         start_date = vaccination_drive.start_date.strftime("%B %d, %Y")
         end_date = vaccination_drive.end_date.strftime("%B %d, %Y")
         
-        for participant in participants:
-            try:
-                # Get user's email from auth.users table
-                user_result = await db.execute(
-                    select(Users).where(Users.id == participant.user_id)
-                )
-                user = user_result.scalar_one_or_none()
-                
-                if not user:
-                    logger.warning(f"User not found for participant {participant.id}")
-                    continue
-                
-                parent_name = participant.parent_name or "Parent"
-                baby_name = participant.baby_name or "your child"
+        last_id = None
+        while True:
+            # Next page of participants with their auth emails in one query
+            page_query = (
+                select(DriveParticipant, Users.email)
+                .join(Users, Users.id == DriveParticipant.user_id)
+                .where(DriveParticipant.vaccination_drive_id == vaccination_drive.id)
+                .order_by(DriveParticipant.id)
+                .limit(NOTIFY_CHUNK_SIZE)
+            )
+            if last_id is not None:
+                page_query = page_query.where(DriveParticipant.id > last_id)
+            
+            participants = (await db.execute(page_query)).all()
+            if not participants:
+                break
+            last_id = participants[-1][0].id
+            
+            messages = []
+            for participant, email in participants:
+                try:
+                    parent_name = participant.parent_name or "Parent"
+                    baby_name = participant.baby_name or "your child"
                 
-                # Send Email Notification
-                if user.email:
-                    email_subject = f"New Vaccination Drive in {vaccination_drive.vaccination_city} - SureShot"
+                    # Send Email Notification
+                    if email:
+                        email_subject = f"New Vaccination Drive in {vaccination_drive.vaccination_city} - SureShot"
                     
-                    email_html = f"""
-                    <html>
-                        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                                <h2 style="color: #2c5aa0;">SureShot - New Vaccination Drive</h2>
+                        email_html = f"""
+                        <html>
+                            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+                                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                                    <h2 style="color: #2c5aa0;">SureShot - New Vaccination Drive</h2>
                                 
-                                <p>Dear {parent_name},</p>
+                                    <p>Dear {parent_name},</p>
                                 
-                                <p>A new vaccination drive has started in your city that may benefit {baby_name}:</p>
+                                    <p>A new vaccination drive has started in your city that may benefit {baby_name}:</p>
                                 
-                                <div style="background-color: #f8f9fa; padding: 20px; border-left: 4px solid #2c5aa0; margin: 20px 0;">
-                                    <h3 style="margin: 0 0 10px 0; color: #2c5aa0;">{vaccination_drive.vaccination_name}</h3>
-                                    <p style="margin: 5px 0;"><strong>Location:</strong> {vaccination_drive.vaccination_city}</p>
-                                    <p style="margin: 5px 0;"><strong>Duration:</strong> {start_date} to {end_date}</p>
-                                    {f'<p style="margin: 5px 0;"><strong>Description:</strong> {vaccination_drive.description}</p>' if vaccination_drive.description else ''}
-                                </div>
+                                    <div style="background-color: #f8f9fa; padding: 20px; border-left: 4px solid #2c5aa0; margin: 20px 0;">
+                                        <h3 style="margin: 0 0 10px 0; color: #2c5aa0;">{vaccination_drive.vaccination_name}</h3>
+                                        <p style="margin: 5px 0;"><strong>Location:</strong> {vaccination_drive.vaccination_city}</p>
+                                        <p style="margin: 5px 0;"><strong>Duration:</strong> {start_date} to {end_date}</p>
+                                        {f'<p style="margin: 5px 0;"><strong>Description:</strong> {vaccination_drive.description}</p>' if vaccination_drive.description else ''}
+                                    </div>
                                 
-                                <p>This vaccination drive is available in your area and you have been automatically enrolled as a participant. Healthcare workers will be available to provide vaccinations during the drive period.</p>
+                                    <p>This vaccination drive is available in your area and you have been automatically enrolled as a participant. Healthcare workers will be available to provide vaccinations during the drive period.</p>
                                 
-                                <p>Please ensure {baby_name} is available during the drive dates if vaccination is needed.</p>
+                                    <p>Please ensure {baby_name} is available during the drive dates if vaccination is needed.</p>
                                 
-                                <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
+                                    <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
                                 
-                                <p style="font-size: 12px; color: #666;">
-                                    This is an automated message from SureShot. Please do not reply to this email.
-                                </p>
-                            </div>
-                        </body>
-                    </html>
-                    """
+                                    <p style="font-size: 12px; color: #666;">
+                                        This is an automated message from SureShot. Please do not reply to this email.
+                                    </p>
+                                </div>
+                            </body>
+                        </html>
+                        """
                     
-                    smtp_service.send_html_email(user.email, email_subject, email_html)
-                    logger.info(f"Drive notification email sent to participant {participant.id} at {user.email}")
+                        messages.append(build_outbox_message(
+                            NotificationChannel.EMAIL,
+                            email,
+                            email_html,
+                            subject=email_subject,
+                            dedupe_key=f"drive:{vaccination_drive.id}:participant:{participant.user_id}:email",
+                            correlation_id=correlation_id,
+                            priority=NotificationPriority.BULK
+                        ))
                 
-                # Send SMS Notification
-                if participant.parent_mobile:
-                    sms_message = (
-                        f"Hi {parent_name}, a new vaccination drive '{vaccination_drive.vaccination_name}' "
-                        f"has started in {vaccination_drive.vaccination_city} from {start_date} to {end_date}. "
-                        f"This could benefit {baby_name}. You've been enrolled as a participant. - SureShot"
-                    )
+                    # Send SMS Notification
+                    if participant.parent_mobile:
+                        sms_message = (
+                            f"Hi {parent_name}, a new vaccination drive '{vaccination_drive.vaccination_name}' "
+                            f"has started in {vaccination_drive.vaccination_city} from {start_date} to {end_date}. "
+                            f"This could benefit {baby_name}. You've been enrolled as a participant. - SureShot"
+                        )
                     
-                    twilio_service.send_sms(participant.parent_mobile, sms_message)
-                    logger.info(f"Drive notification SMS sent to participant {participant.id} at {participant.parent_mobile}")
+                        messages.append(build_outbox_message(
+                            NotificationChannel.SMS,
+                            participant.parent_mobile,
+                            sms_message,
+                            dedupe_key=f"drive:{vaccination_drive.id}:participant:{participant.user_id}:sms",
+                            correlation_id=correlation_id,
+                            priority=NotificationPriority.BULK
+                        ))
                     
-            except Exception as e:
-                logger.error(f"Error sending notification to participant {participant.id}: {str(e)}")
-                # Continue with other participants even if one fails
+                except Exception as e:
+                    logger.error(f"Error preparing notification for participant {participant.id}: {str(e)}")
+                    # Continue with other participants even if one fails
+        
+            await enqueue_notifications(db, messages)
+            await db.commit()
+            queued += len(messages)
+        
+        logger.info(f"Queued {queued} drive notifications for drive {vaccination_drive.id}")
+        return queued
                 
     except Exception as e:
         logger.error(f"Error notifying drive participants: {str(e)}")
+        await db.rollback()
+        if raise_errors:
+            raise
         # Don't raise exception - notifications are supplementary
+        return queued
@@ -79,6 +79,33 @@ class VaccinationDriveResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     assigned_workers: List[WorkerResponse] = []
+    job_id: Optional[str] = None  # Background enrollment/notification job, set on creation
+
+class DriveJobProgressResponse(BaseModel):
+    """Progress of a vaccination drive's enrollment and notification fan-out"""
+    job_id: str
+    status: str
+    drive_id: Optional[str] = None
+    enrolled: int
+    queued: int
+    notified: int
+    failed: int
+    pending: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ScheduleBackfillProgressResponse(BaseModel):
+    """Progress of a bulk vaccination schedule generation job"""
+    job_id: str
+    status: str
+    users_processed: int
+    records_created: int
+    reminders_created: int
+    resume_after_user_id: Optional[str] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 class UpdateVaccinationDriveRequest(BaseModel):
     vaccination_name: Optional[str] = None
@@ -93,14 +120,17 @@ class UpdateVaccinationDriveRequest(BaseModel):
 class WorkerListResponse(BaseModel):
     workers: List[WorkerResponse]
     total: int
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 class DoctorListResponse(BaseModel):
     doctors: List[DoctorResponse]
     total: int
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 class VaccinationDriveListResponse(BaseModel):
     drives: List[VaccinationDriveResponse]
     total: int
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 class DocumentUploadResponse(BaseModel):
     """Response schema for document upload"""
@@ -2,9 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import raiseload
 from config import get_db, get_supabase_client
-from models import UserProfile, AccountType
-import logging
+from models import UserProfile, WorkerDetails, DoctorDetails, AccountType
 from .schemas import (
     UserRegister, 
     UserLogin, 
@@ -33,25 +33,42 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get current user from JWT token"""
+    """
+    Get current user from JWT token
+    
+    The profile and any worker/doctor details are loaded in one joined query. Role
+    dependencies depend on this one, and FastAPI caches a dependency's result per
+    request, so handlers and role checks share a single lookup.
+    """
     token = credentials.credentials
     
-    supabase_user = auth_helpers.verify_token(token)  
+    supabase_user = await auth_helpers.authenticate(token)
     result = await db.execute(
-        select(UserProfile).where(UserProfile.user_id == supabase_user.id)
+        select(UserProfile, WorkerDetails, DoctorDetails)
+        .outerjoin(WorkerDetails, WorkerDetails.user_id == UserProfile.user_id)
+        .outerjoin(DoctorDetails, DoctorDetails.user_id == UserProfile.user_id)
+        .where(UserProfile.user_id == supabase_user.id)
+        # Drive assignments are selectin-loaded by default; identity never needs them,
+        # and raiseload fails loudly instead of leaving an empty list in the identity map
+        .options(raiseload(WorkerDetails.vaccination_drives))
     )
-    user_profile = result.scalar_one_or_none()
+    row = result.one_or_none()
     
-    if not user_profile:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User profile not found"
         )
     
-    return {
+    user_profile, worker_details, doctor_details = row
+    current_user = {
         "supabase_user": supabase_user,
-        "profile": user_profile
+        "profile": user_profile,
+        "worker": worker_details,
+        "doctor": doctor_details
     }
+    
+    return current_user
 
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
 async def register(
@@ -375,15 +392,24 @@ async def reset_password(
 async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
+    token = credentials.credentials
     try:
-        token = credentials.credentials
-        supabase.auth.sign_out()
-        
-        return {"message": "Successfully logged out"}
-        
+        # With local verification this is what invalidates the token, so a failure
+        # must not be reported as a successful logout
+        await auth_helpers.revoke_token(token)
     except Exception as e:
-        logger.error(f"Logout failed: {str(e)}")
-        return {"message": "Logout completed"}
+        logger.error(f"Logout failed, the access token stays valid until it expires: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Logout failed, please try again"
+        )
+    finally:
+        try:
+            supabase.auth.sign_out()
+        except Exception as e:
+            logger.error(f"Supabase sign out failed during logout: {str(e)}")
+    
+    return {"message": "Successfully logged out"}
 
 @router.get("/account-type", response_model=AccountTypeResponse)
 async def get_account_type(
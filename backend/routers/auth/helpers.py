@@ -1,16 +1,184 @@
 from supabase import Client
 from fastapi import HTTPException, status
-from config import get_supabase_client, get_supabase_admin_client
+from fastapi.concurrency import run_in_threadpool
+from jose import jwt, JWTError
+from sqlalchemy import select, delete, or_, func
+from sqlalchemy.dialects.postgresql import insert
+from config import (
+    get_supabase_client,
+    get_supabase_admin_client,
+    JWT_SECRET_KEY,
+    JWT_ALGORITHM,
+    JWT_AUDIENCE,
+    JWT_LEEWAY_SECONDS,
+    AUTH_VERIFICATION_MODE,
+    AUTH_REMOTE_FALLBACK,
+    AUTH_USE_JWKS,
+    SUPABASE_JWKS_URL,
+    JWKS_CACHE_SECONDS,
+    AUTH_REVOCATION_REFRESH_SECONDS,
+)
+from models import Users, RevokedSession
+from .schemas import AuthenticatedUser
+from typing import Optional, Dict, Set
+from datetime import datetime, timezone
+import asyncio
+import httpx
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+
+class KeyUnavailableError(Exception):
+    """No local key material can verify this token"""
+
+
+class JWKSCache:
+    """Caches the Supabase signing keys, refetching on expiry or an unknown kid"""
+
+    def __init__(self, url: Optional[str], ttl_seconds: int = JWKS_CACHE_SECONDS):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self._keys: Dict[str, dict] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_key(self, kid: Optional[str]) -> dict:
+        if not self.url:
+            raise KeyUnavailableError("SUPABASE_JWKS_URL is not configured")
+
+        stale = time.monotonic() - self._fetched_at > self.ttl_seconds
+        if stale or kid not in self._keys:
+            await self._refresh(force=not stale)
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise KeyUnavailableError(f"Unknown signing key id: {kid}")
+        return key
+
+    async def _refresh(self, force: bool = False):
+        async with self._lock:
+            # Another request may have refreshed while we waited; an unknown kid
+            # only forces a refetch once every few seconds to avoid hammering the endpoint
+            age = time.monotonic() - self._fetched_at
+            if age < 5 or (not force and age < self.ttl_seconds):
+                return
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+                    self._keys = {key.get("kid"): key for key in response.json().get("keys", [])}
+                    self._fetched_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Failed to fetch JWKS from {self.url}: {str(e)}")
+
+
+class RevocationList:
+    """
+    In-memory set of banned/deleted users and revoked sessions.
+    Refreshed from auth.users and revoked_sessions in the background so the per-request
+    check is a set lookup; a logout is rejected by every process from its next refresh.
+    """
+
+    def __init__(self, refresh_seconds: int = AUTH_REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._blocked_users: Set[str] = set()
+        self._revoked_sessions: Dict[str, float] = {}  # session_id -> token expiry
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, user_id: str, session_id: Optional[str] = None) -> bool:
+        if user_id in self._blocked_users:
+            return True
+        return bool(session_id) and session_id in self._revoked_sessions
+
+    async def revoke_session(self, session_id: str, user_id: Optional[str], expires_at: float):
+        """Reject a session until its token expires: here at once, elsewhere after a refresh"""
+        from config import AsyncSessionLocal
+
+        self._revoked_sessions[session_id] = expires_at
+        if AsyncSessionLocal is None:
+            return
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                insert(RevokedSession)
+                .values(
+                    session_id=session_id,
+                    user_id=user_id,
+                    expires_at=datetime.fromtimestamp(expires_at, timezone.utc)
+                )
+                .on_conflict_do_nothing(index_elements=["session_id"])
+            )
+            await session.commit()
+
+    async def refresh(self):
+        from config import AsyncSessionLocal
+
+        if AsyncSessionLocal is None:
+            return
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Users.id).where(
+                    or_(
+                        Users.banned_until > func.now(),
+                        Users.deleted_at.isnot(None)
+                    )
+                )
+            )
+            self._blocked_users = {str(user_id) for user_id in result.scalars().all()}
+
+            result = await session.execute(
+                select(RevokedSession.session_id, RevokedSession.expires_at)
+                .where(RevokedSession.expires_at > func.now())
+            )
+            persisted = {session_id: expires_at.timestamp() for session_id, expires_at in result.all()}
+
+            # Tokens of these sessions have expired, so the rows are no longer needed
+            await session.execute(delete(RevokedSession).where(RevokedSession.expires_at <= func.now()))
+            await session.commit()
+
+        now = time.time()
+        self._revoked_sessions = {
+            session_id: expires_at
+            for session_id, expires_at in self._revoked_sessions.items()
+            if expires_at > now
+        }
+        self._revoked_sessions.update(persisted)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh revocation list: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
 class AuthHelpers:
     """Helper functions for authentication operations"""
     
     def __init__(self):
         self._supabase = None
         self._admin_client = None
+        self.jwks = JWKSCache(SUPABASE_JWKS_URL if AUTH_USE_JWKS else None)
+        self.revocation_list = RevocationList()
     
     @property
     def supabase(self) -> Client:
@@ -23,6 +191,87 @@ class AuthHelpers:
         if self._admin_client is None:
             self._admin_client = get_supabase_admin_client()
         return self._admin_client
+
+    async def authenticate(self, token: str):
+        """
+        Verify an access token according to AUTH_VERIFICATION_MODE
+
+        Returns:
+            AuthenticatedUser in local mode, the Supabase user in remote mode
+        """
+        if AUTH_VERIFICATION_MODE != "local":
+            return await run_in_threadpool(self.verify_token, token)
+
+        try:
+            claims = await self.decode_token(token)
+        except KeyUnavailableError as e:
+            if AUTH_REMOTE_FALLBACK:
+                return await run_in_threadpool(self.verify_token, token)
+            logger.error(f"Token verification error: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+        except JWTError as e:
+            logger.info(f"Token verification error: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+
+        user_id = claims.get("sub")
+        if not user_id or self.revocation_list.is_revoked(user_id, claims.get("session_id")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+
+        return AuthenticatedUser(
+            id=user_id,
+            email=claims.get("email"),
+            phone=claims.get("phone"),
+            role=claims.get("role"),
+            aud=claims.get("aud"),
+            session_id=claims.get("session_id"),
+            app_metadata=claims.get("app_metadata") or {},
+            user_metadata=claims.get("user_metadata") or {}
+        )
+
+    async def decode_token(self, token: str) -> dict:
+        """Check signature, expiry and audience locally and return the claims"""
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+
+        if algorithm == JWT_ALGORITHM:
+            if not JWT_SECRET_KEY:
+                raise KeyUnavailableError("JWT_SECRET_KEY is not configured")
+            key = JWT_SECRET_KEY
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = await self.jwks.get_key(header.get("kid"))
+        else:
+            raise KeyUnavailableError(f"Unsupported token algorithm: {algorithm}")
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=JWT_AUDIENCE,
+            options={"leeway": JWT_LEEWAY_SECONDS}
+        )
+
+    async def revoke_token(self, token: str):
+        """Reject a token's session in every API process until it expires (used on logout)"""
+        # Only verified tokens are recorded, so forged ones cannot fill revoked_sessions
+        try:
+            claims = await self.decode_token(token)
+        except (JWTError, KeyUnavailableError):
+            return
+        if claims.get("session_id") and claims.get("exp"):
+            try:
+                await self.revocation_list.revoke_session(claims["session_id"], claims.get("sub"), float(claims["exp"]))
+            except Exception as e:
+                logger.error(f"Failed to persist revocation of session {claims['session_id']} for user {claims.get('sub')}: {str(e)}")
+                raise
     
     def verify_token(self, token: str):
         """Verify JWT token with Supabase and return user info"""
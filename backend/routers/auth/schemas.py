@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, Dict, Any
 from datetime import datetime
 from models import AccountType
 
@@ -63,4 +63,15 @@ class VerifyResetTokenRequest(BaseModel):
 class ResetPasswordRequest(BaseModel):
     new_password: str
     access_token: str
-    refresh_token: str
\ No newline at end of file
+    refresh_token: str
+
+class AuthenticatedUser(BaseModel):
+    """Identity taken from a verified access token (mirrors the Supabase user fields we use)"""
+    id: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    role: Optional[str] = None
+    aud: Optional[str] = None
+    session_id: Optional[str] = None
+    app_metadata: Dict[str, Any] = {}
+    user_metadata: Dict[str, Any] = {}
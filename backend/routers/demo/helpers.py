@@ -288,7 +288,7 @@ async def send_demo_reminder_email(
         </html>
         """
         
-        success = smtp_service.send_html_email(DEMO_EMAIL, subject, html_content)
+        success = await smtp_service.send_html_email_async(DEMO_EMAIL, subject, html_content)
         if success:
             logger.info(f"📧 Demo email sent to {DEMO_EMAIL} for {baby_name}")
         else:
@@ -318,7 +318,7 @@ async def send_demo_reminder_sms(
             f"This is a hackathon demo showing our automated reminder system! -SureShot"
         )
         
-        success = twilio_service.send_sms(DEMO_PHONE, message)
+        success = await twilio_service.send_sms_async(DEMO_PHONE, message)
         if success:
             logger.info(f"📱 Demo SMS sent to {DEMO_PHONE} for {baby_name}")
         else:
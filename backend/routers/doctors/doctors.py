@@ -59,10 +59,8 @@ async def get_my_patients(
 ):
     """Get all patients linked to the current doctor"""
     
-    # First get the doctor record for current user
-    doctor_stmt = select(DoctorDetails).where(DoctorDetails.user_id == current_user["supabase_user"].id)
-    doctor_result = await db.execute(doctor_stmt)
-    doctor = doctor_result.scalar_one_or_none()
+    # Doctor record is resolved together with the current user
+    doctor = current_user["doctor"]
     
     if not doctor:
         raise HTTPException(
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
 from config import get_db, get_supabase_client
-from models import UserProfile, VaccineTemplate, VaccinationRecord, VaccinationDrive, DriveParticipant, VaccinationReminder, ReminderType
+from models import UserProfile, VaccinationRecord, VaccinationDrive, DriveParticipant, VaccinationReminder, ReminderType
 from routers.auth.auth import get_current_user
 from .schemas import (
     UserProfileUpdate,
@@ -13,9 +12,12 @@ from .schemas import (
 )
 from routers.admin.schemas import VaccinationDriveResponse
 from .helpers import user_helpers
+from utils.vaccine_catalog import vaccine_catalog
+from utils.schedule_engine import get_schedule_engine
+from utils.reminder_service import REMINDER_MATERIALIZATION
 from typing import Optional
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -38,54 +40,49 @@ async def create_vaccination_records_for_baby(db: AsyncSession, user_id: uuid.UU
             logger.info(f"Vaccination records already exist for user {user_id}, skipping creation")
             return len(existing_records)
         
-        # Get all vaccine templates with their relationships
-        templates_result = await db.execute(
-            select(VaccineTemplate).options(selectinload(VaccineTemplate.vaccination_records))
-        )
-        templates = templates_result.scalars().all()
+        # Get all vaccine templates
+        catalog = await vaccine_catalog.get(db)
         
-        if not templates:
+        if not catalog.templates:
             logger.warning("No vaccine templates found in database")
             return 0
-          # Create vaccination records for each template and dose
+        
+        # Create vaccination records for each template and dose
         vaccination_records = []
         vaccination_to_template = {}  # Map vaccination records to their templates
         
-        for template in templates:
-            for dose_number in range(1, template.total_doses + 1):
-                # Calculate due date based on baby's birth date
-                days_offset = template.recommended_age_days + ((dose_number - 1) * template.dose_interval_days)
-                due_date = baby_birth_date + timedelta(days=days_offset)
-                
-                vaccination_record = VaccinationRecord(
-                    user_id=user_id,
-                    vaccine_template_id=template.id,
-                    dose_number=dose_number,
-                    due_date=due_date,
-                    is_administered=False
-                )
-                
-                vaccination_records.append(vaccination_record)
-                vaccination_to_template[vaccination_record] = template
+        for template, dose_number, due_date in get_schedule_engine(catalog).schedule_for(baby_birth_date):
+            vaccination_record = VaccinationRecord(
+                user_id=user_id,
+                vaccine_template_id=template.id,
+                dose_number=dose_number,
+                due_date=due_date,
+                is_administered=False
+            )
+            
+            vaccination_records.append(vaccination_record)
+            vaccination_to_template[vaccination_record] = template
         
         # Add all records to database
         db.add_all(vaccination_records)
         await db.flush()  # Flush to get IDs for reminder creation
         
-        # Create reminder records for each vaccination record
+        # Create reminder records for each vaccination record; in lazy mode they are
+        # derived from the records at send time instead
         reminder_records = []
-        for vaccination_record in vaccination_records:
-            template = vaccination_to_template[vaccination_record]
+        if REMINDER_MATERIALIZATION == "eager":
+            for vaccination_record in vaccination_records:
+                template = vaccination_to_template[vaccination_record]
             
-            for reminder_type in ReminderType:
-                reminder = VaccinationReminder(
-                    vaccination_record_id=vaccination_record.id,
-                    user_id=vaccination_record.user_id,
-                    vaccine_name=f"{template.vaccine_name} (Dose {vaccination_record.dose_number})",
-                    due_date=vaccination_record.due_date,
-                    reminder_type=reminder_type
-                )
-                reminder_records.append(reminder)
+                for reminder_type in ReminderType:
+                    reminder = VaccinationReminder(
+                        vaccination_record_id=vaccination_record.id,
+                        user_id=vaccination_record.user_id,
+                        vaccine_name=f"{template.vaccine_name} (Dose {vaccination_record.dose_number})",
+                        due_date=vaccination_record.due_date,
+                        reminder_type=reminder_type
+                    )
+                    reminder_records.append(reminder)
         
         # Add all reminder records
         db.add_all(reminder_records)
@@ -1,8 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from models import UserProfile, VaccinationRecord, VaccineTemplate, Users
+from models import UserProfile, VaccinationRecord, VaccineTemplate, Users, NotificationChannel, NotificationPriority
 from utils.smtp import smtp_service
 from utils.twilio import twilio_service
+from utils.outbox import build_outbox_message, enqueue_notifications
 import logging
 from typing import Optional
 
@@ -15,7 +16,12 @@ async def send_vaccination_confirmation(
     vaccine_template: VaccineTemplate
 ) -> bool:
     """
-    Send vaccination confirmation email and SMS to the user after vaccination
+    Queue vaccination confirmation email and SMS to the user after vaccination
+    
+    Messages go to the notification outbox and are delivered by the outbox worker,
+    so the request does not wait on the mail/SMS providers and failures are retried.
+    They are inserted in the caller's transaction (the caller commits), so the
+    confirmation is stored exactly when the vaccination is.
     
     Args:
         db: Database session
@@ -24,7 +30,10 @@ async def send_vaccination_confirmation(
         vaccine_template: The vaccine template containing vaccine details
         
     Returns:
-        bool: True if notifications sent successfully, False otherwise
+        bool: True if notifications were queued, False if there was no one to notify
+        
+    Raises:
+        Exception: The queueing failed; the caller must not commit the vaccination
     """
     try:
         # Get user profile for baby and parent information
@@ -50,8 +59,7 @@ async def send_vaccination_confirmation(
         vaccination_date = vaccination_record.administered_date.strftime("%B %d, %Y")
         dose_info = f"Dose {vaccination_record.dose_number}" if vaccination_record.dose_number > 1 else ""
         
-        email_sent = False
-        sms_sent = False
+        messages = []
         
         # Send Email Notification
         if user.email:
@@ -98,11 +106,14 @@ async def send_vaccination_confirmation(
             </html>
             """
             
-            email_sent = smtp_service.send_html_email(user.email, email_subject, email_html)
-            if email_sent:
-                logger.info(f"Vaccination confirmation email sent to {user.email} for user {user_id}")
-            else:
-                logger.error(f"Failed to send vaccination confirmation email to {user.email} for user {user_id}")
+            messages.append(build_outbox_message(
+                NotificationChannel.EMAIL,
+                user.email,
+                email_html,
+                subject=email_subject,
+                dedupe_key=f"vaccination-confirmation:{vaccination_record.id}:email",
+                priority=NotificationPriority.CRITICAL
+            ))
         
         # Send SMS Notification
         if profile.parent_mobile:
@@ -113,24 +124,25 @@ async def send_vaccination_confirmation(
                 f"Thank you for keeping their vaccinations up to date! - SureShot"
             )
             
-            sms_sent = twilio_service.send_sms(profile.parent_mobile, sms_message)
-            if sms_sent:
-                logger.info(f"Vaccination confirmation SMS sent to {profile.parent_mobile} for user {user_id}")
-            else:
-                logger.error(f"Failed to send vaccination confirmation SMS to {profile.parent_mobile} for user {user_id}")
-        
-        # Return True if at least one notification was sent successfully
-        success = email_sent or sms_sent
-        if success:
-            logger.info(f"Vaccination confirmation notifications sent for user {user_id}")
-        else:
-            logger.warning(f"No vaccination confirmation notifications sent for user {user_id}")
-            
-        return success
+            messages.append(build_outbox_message(
+                NotificationChannel.SMS,
+                profile.parent_mobile,
+                sms_message,
+                dedupe_key=f"vaccination-confirmation:{vaccination_record.id}:sms",
+                priority=NotificationPriority.CRITICAL
+            ))
+        
+        if not messages:
+            logger.warning(f"No vaccination confirmation notifications queued for user {user_id}")
+            return False
+        
+        await enqueue_notifications(db, messages)
+        logger.info(f"Queued {len(messages)} vaccination confirmation notifications for user {user_id}")
+        return True
         
     except Exception as e:
         logger.error(f"Error sending vaccination confirmation for user {user_id}: {str(e)}")
-        return False
+        raise
 
 async def send_next_dose_reminder(
     db: AsyncSession, 
@@ -175,7 +187,7 @@ async def send_next_dose_reminder(
         
         # Send email reminder using the existing vaccination reminder function
         if user.email:
-            smtp_service.send_vaccination_reminder(
+            await smtp_service.send_vaccination_reminder_async(
                 to_email=user.email,
                 baby_name=baby_name,
                 vaccination_name=f"{vaccination_name} {dose_info}",
@@ -185,7 +197,7 @@ async def send_next_dose_reminder(
         
         # Send SMS reminder
         if profile.parent_mobile:
-            twilio_service.send_vaccination_reminder_sms(
+            await twilio_service.send_vaccination_reminder_sms_async(
                 to_number=profile.parent_mobile,
                 baby_name=baby_name,
                 vaccination_name=f"{vaccination_name} {dose_info}",
@@ -2,13 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 import uuid
 import logging
 
 from config import get_db
-from models import VaccineTemplate, VaccinationRecord, UserProfile, DoctorPatientRelationship, DoctorDetails, VaccinationReminder, ReminderType
+from models import VaccinationRecord, UserProfile, DoctorPatientRelationship, DoctorDetails, VaccinationReminder, ReminderType
 from routers.auth.auth import get_current_user
+from utils.vaccine_catalog import vaccine_catalog
+from utils.schedule_engine import get_schedule_engine
+from utils.reminder_service import REMINDER_MATERIALIZATION
 from .helpers import send_vaccination_confirmation
 from .schemas import (
     VaccinationRecordResponse, 
@@ -97,17 +100,11 @@ async def administer_vaccine(
         )
         db.add(new_relationship)
     
-    await db.commit()
-    await db.refresh(vaccination_record)
-    
     # Get vaccine template for notification details
-    vaccine_template_stmt = select(VaccineTemplate).where(
-        VaccineTemplate.id == vaccination_record.vaccine_template_id
-    )
-    template_result = await db.execute(vaccine_template_stmt)
-    vaccine_template = template_result.scalar_one_or_none()
+    catalog = await vaccine_catalog.get(db, [vaccination_record.vaccine_template_id])
+    vaccine_template = catalog.get(vaccination_record.vaccine_template_id)
     
-    # Send vaccination confirmation notifications
+    # Queue vaccination confirmation notifications in the same transaction
     if vaccine_template:
         await send_vaccination_confirmation(
             db=db,
@@ -116,6 +113,9 @@ async def administer_vaccine(
             vaccine_template=vaccine_template
         )
     
+    await db.commit()
+    await db.refresh(vaccination_record)
+    
     return {"message": "Vaccine administered successfully", "record_id": str(vaccination_record.id)}
 
 @router.get("/schedule/{user_id}", response_model=List[VaccinationScheduleResponse])
@@ -125,16 +125,18 @@ async def get_vaccination_schedule(
 ):
     """Get complete vaccination schedule for a baby"""
     
-    stmt = select(VaccinationRecord, VaccineTemplate).join(
-        VaccineTemplate, VaccinationRecord.vaccine_template_id == VaccineTemplate.id
-    ).where(
+    stmt = select(VaccinationRecord).where(
         VaccinationRecord.user_id == uuid.UUID(user_id)
     ).order_by(VaccinationRecord.due_date, VaccinationRecord.dose_number)    
     result = await db.execute(stmt)
-    records = result.all()
+    records = result.scalars().all()
+    catalog = await vaccine_catalog.get(db, {record.vaccine_template_id for record in records})
     
     schedule = []
-    for record, template in records:
+    for record in records:
+        template = catalog.get(record.vaccine_template_id)
+        if template is None:
+            continue
         schedule.append(VaccinationScheduleResponse(
             id=str(record.id),
             vaccine_template_id=str(record.vaccine_template_id),
@@ -157,18 +159,20 @@ async def get_vaccination_history(
 ):
     """Get vaccination history for a baby (only administered vaccines)"""
     
-    stmt = select(VaccinationRecord, VaccineTemplate).join(
-        VaccineTemplate, VaccinationRecord.vaccine_template_id == VaccineTemplate.id
-    ).where(
+    stmt = select(VaccinationRecord).where(
         VaccinationRecord.user_id == uuid.UUID(user_id),
         VaccinationRecord.is_administered == True
     ).order_by(VaccinationRecord.administered_date.desc())
     
     result = await db.execute(stmt)
-    records = result.all()
+    records = result.scalars().all()
+    catalog = await vaccine_catalog.get(db, {record.vaccine_template_id for record in records})
     
     history = []
-    for record, template in records:
+    for record in records:
+        template = catalog.get(record.vaccine_template_id)
+        if template is None:
+            continue
         history.append(VaccinationHistoryResponse(
             id=str(record.id),
             vaccine_name=template.vaccine_name,
@@ -188,18 +192,20 @@ async def get_due_vaccinations(
 ):
     """Get pending/overdue vaccinations for a baby"""
     
-    stmt = select(VaccinationRecord, VaccineTemplate).join(
-        VaccineTemplate, VaccinationRecord.vaccine_template_id == VaccineTemplate.id
-    ).where(
+    stmt = select(VaccinationRecord).where(
         VaccinationRecord.user_id == uuid.UUID(user_id),
         VaccinationRecord.is_administered == False
     ).order_by(VaccinationRecord.due_date)
     
     result = await db.execute(stmt)
-    records = result.all()
+    records = result.scalars().all()
+    catalog = await vaccine_catalog.get(db, {record.vaccine_template_id for record in records})
     
     due_vaccines = []
-    for record, template in records:
+    for record in records:
+        template = catalog.get(record.vaccine_template_id)
+        if template is None:
+            continue
         due_vaccines.append(VaccinationScheduleResponse(
             id=str(record.id),
             vaccine_name=template.vaccine_name,
@@ -228,66 +234,61 @@ async def generate_vaccination_schedule_for_user(db: AsyncSession, user_id: uuid
     """
     try:
         # Get all vaccine templates
-        templates_result = await db.execute(select(VaccineTemplate))
-        templates = templates_result.scalars().all()
+        catalog = await vaccine_catalog.get(db)
         
-        if not templates:
+        if not catalog.templates:
             logger.warning("No vaccine templates found in database")
             return 0
         
-        # Check which vaccination records already exist for this user
-        existing_query = select(VaccinationRecord).where(VaccinationRecord.user_id == user_id)
-        existing_result = await db.execute(existing_query)
-        existing_records = existing_result.scalars().all()
-        
         # Create a set of existing (template_id, dose_number) combinations
-        existing_combinations = {(record.vaccine_template_id, record.dose_number) for record in existing_records}
+        existing_query = select(VaccinationRecord.vaccine_template_id, VaccinationRecord.dose_number).where(
+            VaccinationRecord.user_id == user_id
+        )
+        existing_result = await db.execute(existing_query)
+        existing_combinations = set(existing_result.tuples().all())
         
         # Create vaccination records for each template and dose
         vaccination_records = []
         vaccination_to_template = {}  # Map vaccination records to their templates
         
-        for template in templates:
-            for dose_number in range(1, template.total_doses + 1):
-                # Skip if this combination already exists
-                if (template.id, dose_number) in existing_combinations:
-                    continue
-                    
-                # Calculate due date based on baby's birth date
-                days_offset = template.recommended_age_days + ((dose_number - 1) * template.dose_interval_days)
-                due_date = birth_date + timedelta(days=days_offset)
-                
-                vaccination_record = VaccinationRecord(
-                    user_id=user_id,
-                    vaccine_template_id=template.id,
-                    dose_number=dose_number,
-                    due_date=due_date,
-                    is_administered=False,
-                    notes=f"Auto-generated vaccination schedule"
-                )
-                
-                vaccination_records.append(vaccination_record)
-                vaccination_to_template[vaccination_record] = template
+        for template, dose_number, due_date in get_schedule_engine(catalog).schedule_for(birth_date):
+            # Skip if this combination already exists
+            if (template.id, dose_number) in existing_combinations:
+                continue
+            
+            vaccination_record = VaccinationRecord(
+                user_id=user_id,
+                vaccine_template_id=template.id,
+                dose_number=dose_number,
+                due_date=due_date,
+                is_administered=False,
+                notes=f"Auto-generated vaccination schedule"
+            )
+            
+            vaccination_records.append(vaccination_record)
+            vaccination_to_template[vaccination_record] = template
         
         # Add all new records to database
         if vaccination_records:
             db.add_all(vaccination_records)
             await db.flush()  # Flush to get IDs for reminder creation
             
-            # Create reminder records for each vaccination record
+            # Create reminder records for each vaccination record; in lazy mode they are
+            # derived from the records at send time instead
             reminder_records = []
-            for vaccination_record in vaccination_records:
-                template = vaccination_to_template[vaccination_record]
+            if REMINDER_MATERIALIZATION == "eager":
+                for vaccination_record in vaccination_records:
+                    template = vaccination_to_template[vaccination_record]
                 
-                for reminder_type in ReminderType:
-                    reminder = VaccinationReminder(
-                        vaccination_record_id=vaccination_record.id,
-                        user_id=vaccination_record.user_id,
-                        vaccine_name=f"{template.vaccine_name} (Dose {vaccination_record.dose_number})",
-                        due_date=vaccination_record.due_date,
-                        reminder_type=reminder_type
-                    )
-                    reminder_records.append(reminder)
+                    for reminder_type in ReminderType:
+                        reminder = VaccinationReminder(
+                            vaccination_record_id=vaccination_record.id,
+                            user_id=vaccination_record.user_id,
+                            vaccine_name=f"{template.vaccine_name} (Dose {vaccination_record.dose_number})",
+                            due_date=vaccination_record.due_date,
+                            reminder_type=reminder_type
+                        )
+                        reminder_records.append(reminder)
             
             # Add all reminder records
             db.add_all(reminder_records)
@@ -392,7 +393,8 @@ async def check_vaccination_schedule_status(
             "next_steps": [
                 "✅ Profile created" if profile else "❌ Create profile first",
                 f"✅ {len(vaccination_records)} vaccination records found" if vaccination_records else "❌ Generate vaccination schedule",
-                f"✅ {len(reminder_records)} reminder records found" if reminder_records else "❌ Reminder records missing"
+                "✅ Reminders are derived from the vaccination schedule" if REMINDER_MATERIALIZATION == "lazy"
+                else f"✅ {len(reminder_records)} reminder records found" if reminder_records else "❌ Reminder records missing"
             ]
         }
         
@@ -2,9 +2,8 @@ from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from config import get_supabase_storage
-from models import UserProfile, VaccinationDrive, DriveParticipant, Users
-from utils.smtp import smtp_service
-from utils.twilio import twilio_service
+from models import UserProfile, VaccinationDrive, DriveParticipant, Users, NotificationChannel, NotificationPriority
+from utils.outbox import build_outbox_message, enqueue_notifications
 import uuid
 import os
 from typing import Optional
@@ -107,7 +106,10 @@ async def send_drive_vaccination_confirmation(
     worker_name: str = "Healthcare Worker"
 ) -> bool:
     """
-    Send vaccination confirmation email and SMS to the user after vaccination in a drive
+    Queue vaccination confirmation email and SMS to the user after vaccination in a drive
+    
+    Messages go to the notification outbox in the caller's transaction (the caller
+    commits), so the confirmation is stored exactly when the vaccination is.
     
     Args:
         db: Database session
@@ -116,7 +118,10 @@ async def send_drive_vaccination_confirmation(
         worker_name: Name of the worker who administered the vaccine
         
     Returns:
-        bool: True if notifications sent successfully, False otherwise
+        bool: True if notifications were queued, False if there was no one to notify
+        
+    Raises:
+        Exception: The queueing failed; the caller must not commit the vaccination
     """
     try:
         # Get user's email from auth.users table
@@ -136,8 +141,7 @@ async def send_drive_vaccination_confirmation(
         vaccination_date = participant.vaccination_date.strftime("%B %d, %Y")
         drive_location = vaccination_drive.vaccination_city
         
-        email_sent = False
-        sms_sent = False
+        messages = []
         
         # Send Email Notification
         if user.email:
@@ -189,11 +193,14 @@ async def send_drive_vaccination_confirmation(
             </html>
             """
             
-            email_sent = smtp_service.send_html_email(user.email, email_subject, email_html)
-            if email_sent:
-                logger.info(f"Drive vaccination confirmation email sent to {user.email} for participant {participant.id}")
-            else:
-                logger.error(f"Failed to send drive vaccination confirmation email to {user.email} for participant {participant.id}")
+            messages.append(build_outbox_message(
+                NotificationChannel.EMAIL,
+                user.email,
+                email_html,
+                subject=email_subject,
+                dedupe_key=f"drive-confirmation:{participant.id}:email",
+                priority=NotificationPriority.CRITICAL
+            ))
         
         # Send SMS Notification
         if participant.parent_mobile:
@@ -204,21 +211,22 @@ async def send_drive_vaccination_confirmation(
                 f"Monitor for mild side effects and keep them comfortable. Thank you for participating! - SureShot"
             )
             
-            sms_sent = twilio_service.send_sms(participant.parent_mobile, sms_message)
-            if sms_sent:
-                logger.info(f"Drive vaccination confirmation SMS sent to {participant.parent_mobile} for participant {participant.id}")
-            else:
-                logger.error(f"Failed to send drive vaccination confirmation SMS to {participant.parent_mobile} for participant {participant.id}")
-        
-        # Return True if at least one notification was sent successfully
-        success = email_sent or sms_sent
-        if success:
-            logger.info(f"Drive vaccination confirmation notifications sent for participant {participant.id}")
-        else:
-            logger.warning(f"No drive vaccination confirmation notifications sent for participant {participant.id}")
-            
-        return success
+            messages.append(build_outbox_message(
+                NotificationChannel.SMS,
+                participant.parent_mobile,
+                sms_message,
+                dedupe_key=f"drive-confirmation:{participant.id}:sms",
+                priority=NotificationPriority.CRITICAL
+            ))
+        
+        if not messages:
+            logger.warning(f"No drive vaccination confirmation notifications queued for participant {participant.id}")
+            return False
+        
+        await enqueue_notifications(db, messages)
+        logger.info(f"Queued {len(messages)} drive vaccination confirmation notifications for participant {participant.id}")
+        return True
         
     except Exception as e:
         logger.error(f"Error sending drive vaccination confirmation for participant {participant.id}: {str(e)}")
-        return False
+        raise
@@ -45,6 +45,7 @@ class DriveParticipantListResponse(BaseModel):
     total: int
     drive_name: str
     drive_city: str
+    next_cursor: Optional[str] = None  # Set when `limit` is given and more participants remain
 
 
 class AdministerDriveVaccineRequest(BaseModel):
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, literal_column
+from sqlalchemy.orm import raiseload
 from config import get_db
-from models import WorkerDetails, VaccinationDrive, DriveWorkerAssignment, DriveParticipant, AccountType, UserProfile
+from models import WorkerDetails, VaccinationDrive, DriveWorkerAssignment, DriveParticipant, AccountType
 from routers.auth.auth import get_current_user
 from routers.admin.schemas import VaccinationDriveResponse, WorkerResponse, VaccinationDriveListResponse, DocumentUploadResponse
 from .schemas import DriveParticipantResponse, DriveParticipantListResponse, AdministerDriveVaccineRequest, AdministerDriveVaccineResponse, WorkerIdResponse
 from .helpers import upload_worker_profile_document, send_drive_vaccination_confirmation
+from utils.pagination import paginate_query, split_page
 from typing import Optional
 import logging
 import uuid
@@ -63,12 +65,9 @@ async def get_worker_id_by_user_id(
         )
 
 async def get_worker_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    current_user=Depends(get_current_user)
 ):
     """Get current worker user and verify worker privileges"""
-    current_user = await get_current_user(credentials, db)
-    
     if current_user["profile"].account_type != AccountType.WORKER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -79,19 +78,17 @@ async def get_worker_user(
 
 @router.get("/my-drives", response_model=VaccinationDriveListResponse)
 async def get_my_vaccination_drives(
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset, ignored when cursor is given"),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     active_only: bool = Query(True),
     db: AsyncSession = Depends(get_db),
     current_worker=Depends(get_worker_user)
 ):
-    """Get vaccination drives assigned to the current worker"""
+    """Get vaccination drives assigned to the current worker, latest start date first"""
     try:
         # Get worker details
-        worker_result = await db.execute(
-            select(WorkerDetails).where(WorkerDetails.user_id == current_worker["supabase_user"].id)
-        )
-        worker = worker_result.scalar_one_or_none()
+        worker = current_worker["worker"]
         
         if not worker:
             raise HTTPException(
@@ -99,36 +96,38 @@ async def get_my_vaccination_drives(
                 detail="Worker profile not found"
             )
         
-        # Get drive assignments for this worker
-        assignments_query = select(DriveWorkerAssignment).where(
-            DriveWorkerAssignment.worker_id == worker.id
-        )
+        filters = [DriveWorkerAssignment.worker_id == worker.id]
+        if active_only:
+            filters.append(VaccinationDrive.is_active == True)
         
-        assignments_result = await db.execute(assignments_query)
-        assignments = assignments_result.scalars().all()
+        # Get total count
+        total_result = await db.execute(
+            select(func.count())
+            .select_from(VaccinationDrive)
+            .join(DriveWorkerAssignment, DriveWorkerAssignment.drive_id == VaccinationDrive.id)
+            .where(*filters)
+        )
+        total = total_result.scalar_one()
         
-        if not assignments:
+        if total == 0:
             return VaccinationDriveListResponse(drives=[], total=0)
         
-        # Get drive IDs
-        drive_ids = [assignment.drive_id for assignment in assignments]
-        
-        # Query drives
-        drives_query = select(VaccinationDrive).where(
-            VaccinationDrive.id.in_(drive_ids)
+        # Get paginated results (assigned workers are not part of the worker view)
+        drives_query = paginate_query(
+            select(VaccinationDrive)
+            .join(DriveWorkerAssignment, DriveWorkerAssignment.drive_id == VaccinationDrive.id)
+            .where(*filters)
+            .options(raiseload(VaccinationDrive.assigned_workers)),
+            [VaccinationDrive.start_date, VaccinationDrive.id],
+            limit,
+            cursor=cursor,
+            skip=skip,
+            descending=True
         )
-        
-        if active_only:
-            drives_query = drives_query.where(VaccinationDrive.is_active == True)
-        
-        # Get total count
-        total_result = await db.execute(drives_query)
-        total = len(total_result.scalars().all())
-        
-        # Get paginated results
-        drives_query = drives_query.offset(skip).limit(limit).order_by(VaccinationDrive.start_date.desc())
         drives_result = await db.execute(drives_query)
-        drives = drives_result.scalars().all()
+        drives, next_cursor = split_page(
+            drives_result.scalars().all(), limit, lambda drive: (drive.start_date, drive.id)
+        )
         
         drive_responses = []
         for drive in drives:            # For worker view, we don't need to load all assigned workers
@@ -147,7 +146,7 @@ async def get_my_vaccination_drives(
                 assigned_workers=[]  # Empty for worker view to keep response light
             ))
         
-        return VaccinationDriveListResponse(drives=drive_responses, total=total)
+        return VaccinationDriveListResponse(drives=drive_responses, total=total, next_cursor=next_cursor)
         
     except Exception as e:
         logger.error(f"Failed to get worker's vaccination drives: {str(e)}")
@@ -166,10 +165,7 @@ async def get_worker_profile(
     """Get current worker's profile details"""
     try:
         # Get worker details
-        worker_result = await db.execute(
-            select(WorkerDetails).where(WorkerDetails.user_id == current_worker["supabase_user"].id)
-        )
-        worker = worker_result.scalar_one_or_none()
+        worker = current_worker["worker"]
         
         if not worker:            raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -203,20 +199,24 @@ async def get_worker_profile(
 @router.get("/drive-participants/{drive_id}", response_model=DriveParticipantListResponse)
 async def get_drive_participants(
     drive_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    all_participants: bool = Query(False, alias="all", description="Return every participant in one response (legacy clients)"),
     db: AsyncSession = Depends(get_db),
     current_worker=Depends(get_worker_user)
 ):
     """
-    Get all participants for a vaccination drive - for house-to-house vaccination
+    Get participants for a vaccination drive - for house-to-house vaccination
+    
+    Ordered unvaccinated first, then by baby name, one page of `limit` participants
+    at a time; follow `next_cursor` for the rest. Pass `all=true` to get the whole
+    list in one response as before.
     """
     try:
         drive_uuid = uuid.UUID(drive_id)
         
         # Get worker details
-        worker_result = await db.execute(
-            select(WorkerDetails).where(WorkerDetails.user_id == current_worker["supabase_user"].id)
-        )
-        worker = worker_result.scalar_one_or_none()
+        worker = current_worker["worker"]
         
         if not worker:
             raise HTTPException(
@@ -252,13 +252,36 @@ async def get_drive_participants(
                 detail="Vaccination drive not found"
             )
         
-        # Get all participants for this drive
-        participants_result = await db.execute(
-            select(DriveParticipant).where(
-                DriveParticipant.vaccination_drive_id == drive_uuid
-            ).order_by(DriveParticipant.is_vaccinated, DriveParticipant.baby_name)
+        # Get participants for this drive; NULL names sort as "" so the key stays comparable.
+        # The '' is a literal, not a bind parameter, so the key matches the expression in
+        # idx_drive_participants_drive_page and pages are read straight off the index
+        participants_query = select(DriveParticipant).where(
+            DriveParticipant.vaccination_drive_id == drive_uuid
         )
-        participants = participants_result.scalars().all()
+        sort_name = func.coalesce(DriveParticipant.baby_name, literal_column("''"))
+        sort_keys = [DriveParticipant.is_vaccinated, sort_name, DriveParticipant.id]
+        
+        next_cursor = None
+        if all_participants:
+            participants_result = await db.execute(participants_query.order_by(*sort_keys))
+            participants = participants_result.scalars().all()
+            total = len(participants)
+        else:
+            total_result = await db.execute(
+                select(func.count()).select_from(DriveParticipant).where(
+                    DriveParticipant.vaccination_drive_id == drive_uuid
+                )
+            )
+            total = total_result.scalar_one()
+            
+            participants_result = await db.execute(
+                paginate_query(participants_query, sort_keys, limit, cursor=cursor)
+            )
+            participants, next_cursor = split_page(
+                participants_result.scalars().all(),
+                limit,
+                lambda participant: (participant.is_vaccinated, participant.baby_name or "", participant.id)
+            )
         
         participant_responses = []
         for participant in participants:
@@ -279,9 +302,10 @@ async def get_drive_participants(
         
         return DriveParticipantListResponse(
             participants=participant_responses,
-            total=len(participant_responses),
+            total=total,
             drive_name=drive.vaccination_name,
-            drive_city=drive.vaccination_city
+            drive_city=drive.vaccination_city,
+            next_cursor=next_cursor
         )
         
     except ValueError:
@@ -314,10 +338,7 @@ async def administer_drive_vaccine(
         user_uuid = uuid.UUID(request.user_id)
         
         # Get worker details
-        worker_result = await db.execute(
-            select(WorkerDetails).where(WorkerDetails.user_id == current_worker["supabase_user"].id)
-        )
-        worker = worker_result.scalar_one_or_none()
+        worker = current_worker["worker"]
         
         if not worker:
             raise HTTPException(
@@ -370,8 +391,6 @@ async def administer_drive_vaccine(
         participant.notes = request.notes
         participant.updated_at = datetime.utcnow()
         
-        await db.commit()
-        
         # Get vaccination drive details for notification
         drive_result = await db.execute(
             select(VaccinationDrive).where(VaccinationDrive.id == drive_uuid)
@@ -379,13 +398,10 @@ async def administer_drive_vaccine(
         vaccination_drive = drive_result.scalar_one_or_none()
         
         # Get worker name for notification
-        worker_profile_result = await db.execute(
-            select(UserProfile).where(UserProfile.user_id == current_worker["supabase_user"].id)
-        )
-        worker_profile = worker_profile_result.scalar_one_or_none()
+        worker_profile = current_worker["profile"]
         worker_name = f"{worker_profile.first_name} {worker_profile.last_name}".strip() if worker_profile and worker_profile.first_name else "Healthcare Worker"
         
-        # Send vaccination confirmation notifications
+        # Queue vaccination confirmation notifications in the same transaction
         if vaccination_drive:
             await send_drive_vaccination_confirmation(
                 db=db,
@@ -394,6 +410,8 @@ async def administer_drive_vaccine(
                 worker_name=worker_name
             )
         
+        await db.commit()
+        
         return AdministerDriveVaccineResponse(
             id=str(participant.id),
             user_id=str(participant.user_id),
@@ -0,0 +1,76 @@
+"""
+Shared fixtures for tests that run against Postgres
+
+Point TEST_DATABASE_URL at a scratch database migrated to head (alembic upgrade
+head) that also has Supabase's auth.users table; without it these tests are
+skipped. Every test works inside one transaction that is rolled back at the end.
+"""
+import os
+import sys
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List
+import pytest
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+# The routers build a Supabase client at import time; the tests never call it
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+requires_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@asynccontextmanager
+async def rollback_session() -> AsyncIterator["AsyncSession"]:
+    """Session whose work, commits included, is rolled back when the block exits"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from config import create_db_engine
+
+    engine = create_db_engine(TEST_DATABASE_URL, pool_mode="null")
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            session = AsyncSession(
+                bind=conn,
+                expire_on_commit=False,
+                autoflush=False,
+                join_transaction_mode="create_savepoint"
+            )
+            try:
+                yield session
+            finally:
+                await session.close()
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+@contextmanager
+def count_queries(session) -> Iterator[List[str]]:
+    """
+    Record every statement the session sends to the database inside the block
+
+    Yields:
+        List that fills with the SQL of each statement (savepoint bookkeeping excluded)
+    """
+    from sqlalchemy import event
+
+    statements: List[str] = []
+    sync_engine = session.bind.sync_engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
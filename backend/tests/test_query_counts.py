@@ -0,0 +1,164 @@
+"""
+Query-count ceilings for the list endpoints
+
+Each endpoint is called directly with a seeded page of several rows, so an N+1
+regression (one query per drive, worker or profile) pushes it over its ceiling.
+Authentication is bypassed by passing the current user in, so only the
+endpoint's own queries are counted.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from tests.conftest import requires_database, rollback_session, count_queries
+
+pytestmark = requires_database
+
+ROWS = 5  # Rows seeded per list; more than one so per-row queries would show up
+TEST_CITY = f"Testville {uuid.uuid4().hex[:8]}"  # Keeps filters off rows already in the database
+
+DRIVES_QUERY_CEILING = 4  # count, drives, assigned workers, worker profiles
+WORKERS_QUERY_CEILING = 3  # count, workers, profiles
+DOCTORS_QUERY_CEILING = 3  # count, doctors, profiles
+MY_DRIVES_QUERY_CEILING = 2  # count, drives
+
+
+def add_user(db, account_type):
+    from models import Users, UserProfile
+
+    user_id = uuid.uuid4()
+    db.add(Users(id=user_id, email=f"{user_id.hex}@example.com"))
+    profile = UserProfile(
+        user_id=user_id,
+        username=f"test_{user_id.hex[:16]}",
+        first_name="Test",
+        last_name=account_type.value.title(),
+        account_type=account_type
+    )
+    db.add(profile)
+    return profile
+
+
+def add_worker(db):
+    from models import AccountType, WorkerDetails
+
+    profile = add_user(db, AccountType.WORKER)
+    worker = WorkerDetails(id=uuid.uuid4(), user_id=profile.user_id, city_name=TEST_CITY)
+    db.add(worker)
+    return worker
+
+
+def add_drives(db, admin_profile, workers):
+    from models import VaccinationDrive, DriveWorkerAssignment
+
+    start = datetime.now(timezone.utc)
+    for index in range(ROWS):
+        drive = VaccinationDrive(
+            id=uuid.uuid4(),
+            vaccination_name=f"Test drive {index}",
+            start_date=start + timedelta(days=index),
+            end_date=start + timedelta(days=index + 7),
+            vaccination_city=TEST_CITY,
+            is_active=True,
+            created_by=admin_profile.user_id
+        )
+        db.add(drive)
+        for worker in workers:
+            db.add(DriveWorkerAssignment(drive_id=drive.id, worker_id=worker.id))
+
+
+async def seed(db):
+    """An admin, ROWS workers and doctors, and ROWS drives each staffed by every worker"""
+    from models import AccountType, DoctorDetails
+
+    admin = add_user(db, AccountType.ADMIN)
+    await db.flush()
+    workers = [add_worker(db) for _ in range(ROWS)]
+    for _ in range(ROWS):
+        profile = add_user(db, AccountType.DOCTOR)
+        db.add(DoctorDetails(id=uuid.uuid4(), user_id=profile.user_id))
+    await db.flush()
+    add_drives(db, admin, workers)
+    await db.flush()
+    # Start the endpoint from an empty identity map, as a fresh request would
+    db.expunge_all()
+    return admin, workers
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def assert_ceiling(statements, ceiling):
+    assert len(statements) <= ceiling, (
+        f"{len(statements)} queries, ceiling is {ceiling}:\n" + "\n---\n".join(statements)
+    )
+
+
+def test_admin_vaccination_drives_query_ceiling():
+    from routers.admin.admin import get_vaccination_drives
+
+    async def scenario():
+        async with rollback_session() as db:
+            admin, _ = await seed(db)
+            with count_queries(db) as statements:
+                response = await get_vaccination_drives(
+                    skip=0, limit=10, cursor=None, city=TEST_CITY, active_only=True,
+                    db=db, current_admin={"profile": admin}
+                )
+            assert len(response.drives) == ROWS
+            assert all(len(drive.assigned_workers) == ROWS for drive in response.drives)
+            assert_ceiling(statements, DRIVES_QUERY_CEILING)
+
+    run(scenario)
+
+
+def test_admin_workers_query_ceiling():
+    from routers.admin.admin import get_workers
+
+    async def scenario():
+        async with rollback_session() as db:
+            admin, _ = await seed(db)
+            with count_queries(db) as statements:
+                response = await get_workers(
+                    skip=0, limit=10, cursor=None, city=TEST_CITY,
+                    db=db, current_admin={"profile": admin}
+                )
+            assert len(response.workers) == ROWS
+            assert all(worker.username for worker in response.workers)
+            assert_ceiling(statements, WORKERS_QUERY_CEILING)
+
+    run(scenario)
+
+
+def test_admin_doctors_query_ceiling():
+    from routers.admin.admin import get_doctors
+
+    async def scenario():
+        async with rollback_session() as db:
+            admin, _ = await seed(db)
+            with count_queries(db) as statements:
+                response = await get_doctors(
+                    skip=0, limit=100, cursor=None,
+                    db=db, current_admin={"profile": admin}
+                )
+            assert len(response.doctors) >= ROWS
+            assert_ceiling(statements, DOCTORS_QUERY_CEILING)
+
+    run(scenario)
+
+
+def test_worker_my_vaccination_drives_query_ceiling():
+    from routers.workers.workers import get_my_vaccination_drives
+
+    async def scenario():
+        async with rollback_session() as db:
+            _, workers = await seed(db)
+            with count_queries(db) as statements:
+                response = await get_my_vaccination_drives(
+                    skip=0, limit=10, cursor=None, active_only=True,
+                    db=db, current_worker={"worker": workers[0]}
+                )
+            assert len(response.drives) == ROWS
+            assert_ceiling(statements, MY_DRIVES_QUERY_CEILING)
+
+    run(scenario)
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import time
+import logging
+from typing import Optional
+from utils.smtp import smtp_service
+from utils.twilio import twilio_service
+
+logger = logging.getLogger(__name__)
+
+# Processes that send at the same time across the deployment: API instances running an
+# outbox worker, worker instances and concurrent scheduled Lambda invocations. The
+# EMAIL_/SMS_RATE_PER_SECOND provider limits are split evenly between them.
+NOTIFY_SENDER_PROCESSES = max(1, int(os.getenv("NOTIFY_SENDER_PROCESSES", "1")))
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for asyncio
+
+    Tokens refill continuously at `rate` per second up to `capacity` (the burst size).
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int = 1):
+        """Wait until `tokens` are available and take them"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class NotificationDispatcher:
+    """
+    Sends email and SMS with bounded concurrency and per-channel rate limits
+
+    Each channel has its own token bucket so a slow or tightly limited provider does
+    not hold back the other one; the semaphore caps the number of in-flight sends.
+
+    The buckets are per process, so the configured rates are provider-wide limits
+    divided by NOTIFY_SENDER_PROCESSES (and further by split_rate_limits for a
+    worker's shard processes) rather than shared state: the sum over every sending
+    process stays within the provider limit without a database round trip per send.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        email_rate: Optional[float] = None,
+        email_burst: Optional[int] = None,
+        sms_rate: Optional[float] = None,
+        sms_burst: Optional[int] = None
+    ):
+        self.concurrency = concurrency or int(os.getenv("NOTIFY_CONCURRENCY", "10"))
+        # Provider-wide limits; each process gets 1/NOTIFY_SENDER_PROCESSES of them
+        self.email_rate = email_rate or float(os.getenv("EMAIL_RATE_PER_SECOND", "5"))
+        self.email_burst = email_burst or int(os.getenv("EMAIL_BURST", "10"))
+        self.sms_rate = sms_rate or float(os.getenv("SMS_RATE_PER_SECOND", "1"))
+        self.sms_burst = sms_burst or int(os.getenv("SMS_BURST", "5"))
+        self.split_rate_limits(1)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    def split_rate_limits(self, shares: int):
+        """
+        Give this process 1/shares of its NOTIFY_SENDER_PROCESSES share of the rate limits
+
+        Used by a worker that runs reminder shards in a process pool: the worker and each
+        pool process take one share, so the instance as a whole keeps its share. Call
+        before any sends are running.
+        """
+        divisor = NOTIFY_SENDER_PROCESSES * max(1, shares)
+        self.email_bucket = TokenBucket(self.email_rate / divisor, max(1, self.email_burst // divisor))
+        self.sms_bucket = TokenBucket(self.sms_rate / divisor, max(1, self.sms_burst // divisor))
+
+    def set_concurrency(self, concurrency: int):
+        """Change the in-flight send limit (call before any sends are running)"""
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_email(self, to_email: str, subject: str, html_content: str) -> bool:
+        """
+        Send an HTML email within the email rate limit
+
+        Returns:
+            bool: True if email sent successfully, False otherwise
+        """
+        await self.email_bucket.acquire()
+        async with self.semaphore:
+            return await smtp_service.send_html_email_async(to_email, subject, html_content)
+
+    async def send_sms(self, to_number: str, message: str) -> bool:
+        """
+        Send an SMS within the SMS rate limit
+
+        Returns:
+            bool: True if SMS sent successfully, False otherwise
+        """
+        await self.sms_bucket.acquire()
+        async with self.semaphore:
+            return await twilio_service.send_sms_async(to_number, message)
+
+
+# Create a global instance
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,97 @@
+import uuid
+import logging
+from typing import List, Dict, Any, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import BackgroundJob, VaccinationDrive, WorkerDetails, NotificationOutbox, OutboxStatus
+from utils.jobs import mark_job_running, update_job_progress, finish_job
+from routers.admin.helpers import create_drive_participants, notify_assigned_workers, notify_drive_participants
+
+logger = logging.getLogger(__name__)
+
+DRIVE_FANOUT_JOB = "drive_fanout"
+
+
+async def run_drive_fanout(job_id: uuid.UUID, drive_id: uuid.UUID, worker_ids: List[uuid.UUID], session_factory=None):
+    """
+    Enroll a new drive's city and queue its notifications, outside the request that created it
+
+    Runs in its own session. Enrollment and notification progress is recorded on the
+    BackgroundJob; every queued message carries the job id as its outbox correlation_id
+    so delivery progress can be read back from the outbox. Any enrollment or enqueue
+    error fails the job rather than completing it with partial counts.
+
+    Args:
+        job_id: BackgroundJob tracking this run
+        drive_id: The vaccination drive
+        worker_ids: Workers assigned to the drive
+        session_factory: Session factory to use (defaults to AsyncSessionLocal)
+    """
+    if session_factory is None:
+        from config import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+
+    correlation_id = str(job_id)
+
+    async with session_factory() as db:
+        try:
+            await mark_job_running(db, job_id)
+
+            vaccination_drive = (await db.execute(
+                select(VaccinationDrive).where(VaccinationDrive.id == drive_id)
+            )).scalar_one()
+
+            enrolled = await create_drive_participants(db, vaccination_drive, raise_errors=True)
+            await update_job_progress(db, job_id, counters={"enrolled": enrolled})
+
+            if worker_ids:
+                workers = (await db.execute(
+                    select(WorkerDetails).where(WorkerDetails.id.in_(worker_ids))
+                )).scalars().all()
+                await notify_assigned_workers(db, vaccination_drive, list(workers), correlation_id, raise_errors=True)
+
+            queued = await notify_drive_participants(db, vaccination_drive, correlation_id, raise_errors=True)
+            await update_job_progress(db, job_id, counters={"participant_messages": queued})
+
+            await finish_job(db, job_id)
+            logger.info(f"✅ Drive {drive_id} fan-out finished: {enrolled} enrolled, {queued} participant messages queued")
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"❌ Drive {drive_id} fan-out failed: {str(e)}")
+            await finish_job(db, job_id, error=str(e))
+
+
+async def get_drive_job_progress(db: AsyncSession, job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    """
+    Combine a fan-out job's counters with the delivery state of the messages it queued
+
+    Returns:
+        Progress dict, or None if the job does not exist
+    """
+    job = (await db.execute(
+        select(BackgroundJob).where(BackgroundJob.id == job_id)
+    )).scalar_one_or_none()
+    if job is None:
+        return None
+
+    outbox_counts = dict((await db.execute(
+        select(NotificationOutbox.status, func.count())
+        .where(NotificationOutbox.correlation_id == str(job_id))
+        .group_by(NotificationOutbox.status)
+    )).all())
+
+    counters = job.counters or {}
+    return {
+        "job_id": str(job.id),
+        "status": job.status.value,
+        "drive_id": (job.params or {}).get("drive_id"),
+        "enrolled": counters.get("enrolled", 0),
+        "queued": sum(outbox_counts.values()),
+        "notified": outbox_counts.get(OutboxStatus.SENT, 0),
+        "failed": outbox_counts.get(OutboxStatus.FAILED, 0),
+        "pending": outbox_counts.get(OutboxStatus.PENDING, 0) + outbox_counts.get(OutboxStatus.SENDING, 0),
+        "error": job.error,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
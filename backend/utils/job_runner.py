@@ -0,0 +1,75 @@
+import os
+import time
+import uuid
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+from models import BackgroundJob
+from utils.jobs import claim_job
+from utils.drive_fanout import DRIVE_FANOUT_JOB, run_drive_fanout
+from utils.schedule_backfill import SCHEDULE_BACKFILL_JOB, run_schedule_backfill
+
+logger = logging.getLogger(__name__)
+
+# How often long-running processes look for PENDING or abandoned jobs
+JOB_POLL_SECONDS = int(os.getenv("JOB_POLL_SECONDS", "60"))
+
+
+def _run_drive_fanout(job: BackgroundJob, session_factory) -> Awaitable:
+    params = job.params or {}
+    return run_drive_fanout(
+        job.id,
+        uuid.UUID(params["drive_id"]),
+        [uuid.UUID(worker_id) for worker_id in params.get("worker_ids", [])],
+        session_factory=session_factory
+    )
+
+
+def _run_schedule_backfill(job: BackgroundJob, session_factory) -> Awaitable:
+    # Resumes from the job's cursor when a previous run was interrupted
+    return run_schedule_backfill(job.id, session_factory=session_factory)
+
+
+# job_type -> coroutine factory; both jobs are safe to re-run after an interruption
+JOB_RUNNERS: Dict[str, Callable[[BackgroundJob, object], Awaitable]] = {
+    DRIVE_FANOUT_JOB: _run_drive_fanout,
+    SCHEDULE_BACKFILL_JOB: _run_schedule_backfill,
+}
+
+
+async def run_pending_jobs(
+    session_factory=None,
+    time_left_seconds: Optional[Callable[[], float]] = None,
+    min_seconds_left: float = 60
+) -> int:
+    """
+    Run PENDING background jobs, and re-run abandoned RUNNING ones, until none are left
+    
+    Jobs are left PENDING by the API on Lambda, where nothing may run after the
+    response, and a job whose process died stays RUNNING until claim_job reclaims it.
+    
+    Args:
+        session_factory: Session factory to use (defaults to AsyncSessionLocal)
+        time_left_seconds: Returns the seconds left to work (e.g. in a Lambda invocation);
+            no new job is claimed once fewer than min_seconds_left remain
+        min_seconds_left: Time budget below which no new job is started
+    
+    Returns:
+        Number of jobs run
+    """
+    if session_factory is None:
+        from config import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+
+    jobs_run = 0
+    while time_left_seconds is None or time_left_seconds() > min_seconds_left:
+        async with session_factory() as db:
+            job = await claim_job(db, JOB_RUNNERS.keys())
+        if job is None:
+            break
+
+        logger.info(f"🧰 Running background job {job.id} ({job.job_type})")
+        started = time.monotonic()
+        await JOB_RUNNERS[job.job_type](job, session_factory)
+        jobs_run += 1
+        logger.info(f"🧰 Background job {job.id} finished in {time.monotonic() - started:.1f}s")
+    return jobs_run
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Set, Coroutine, Iterable
+from sqlalchemy import select, update, cast, and_, or_, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Strong references to running jobs; the event loop only keeps weak ones
+_running_tasks: Set[asyncio.Task] = set()
+
+# A RUNNING job whose started_at and last progress write (updated_at) are both older
+# than this is assumed to have lost its process and may be claimed again
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+
+
+async def create_job(
+    db: AsyncSession,
+    job_type: str,
+    params: Optional[Dict[str, Any]] = None,
+    created_by: Optional[str] = None,
+    running: bool = False
+) -> BackgroundJob:
+    """
+    Record a new PENDING job (the caller commits)
+
+    Args:
+        db: Database session
+        job_type: Job kind, e.g. "drive_fanout"
+        params: JSON-serialisable job arguments
+        created_by: ID of the user who started the job
+        running: Record it as RUNNING because the caller runs it right away, so
+            run_pending_jobs never picks it up as well
+
+    Returns:
+        The new BackgroundJob
+    """
+    job = BackgroundJob(
+        job_type=job_type,
+        params=params,
+        counters={},
+        created_by=uuid.UUID(str(created_by)) if created_by else None,
+        status=JobStatus.RUNNING if running else JobStatus.PENDING,
+        started_at=datetime.utcnow() if running else None
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+async def mark_job_running(db: AsyncSession, job_id: uuid.UUID):
+    await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(status=JobStatus.RUNNING, started_at=datetime.utcnow(), error=None)
+    )
+    await db.commit()
+
+
+async def update_job_progress(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    counters: Optional[Dict[str, int]] = None,
+    cursor: Optional[Dict[str, Any]] = None
+):
+    """
+    Merge counters into the job's counters (and replace its cursor) and commit
+
+    Counters are merged server-side with jsonb ||, so concurrent writers never
+    overwrite keys they did not set.
+    """
+    values = {}
+    if counters:
+        values["counters"] = BackgroundJob.counters.op("||")(cast(counters, JSONB))
+    if cursor is not None:
+        values["cursor"] = cursor
+    if not values:
+        return
+
+    await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(**values)
+    )
+    await db.commit()
+
+
+async def finish_job(db: AsyncSession, job_id: uuid.UUID, error: Optional[str] = None):
+    """Mark a job COMPLETED, or FAILED when an error is given"""
+    await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(
+            status=JobStatus.FAILED if error else JobStatus.COMPLETED,
+            error=error,
+            finished_at=datetime.utcnow()
+        )
+    )
+    await db.commit()
+
+
+async def requeue_job(db: AsyncSession, job_id: uuid.UUID):
+    """Put a job back to PENDING for a job runner to pick up"""
+    await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(status=JobStatus.PENDING, error=None, finished_at=None)
+    )
+    await db.commit()
+
+
+async def claim_job(
+    db: AsyncSession,
+    job_types: Iterable[str],
+    stale_seconds: int = JOB_STALE_SECONDS
+) -> Optional[BackgroundJob]:
+    """
+    Claim the oldest PENDING job, or a RUNNING job whose process went away
+    
+    A RUNNING job counts as abandoned once neither started_at nor its last progress
+    update is newer than stale_seconds. The claim is a single UPDATE over a
+    FOR UPDATE SKIP LOCKED pick, so concurrent runners never claim the same row.
+    
+    Returns:
+        The claimed job (now RUNNING), or None when there is nothing to run
+    """
+    now = func.now()
+    stale_before = now - timedelta(seconds=stale_seconds)
+    claimable = (
+        select(BackgroundJob.id)
+        .where(
+            BackgroundJob.job_type.in_(list(job_types)),
+            or_(
+                BackgroundJob.status == JobStatus.PENDING,
+                and_(
+                    BackgroundJob.status == JobStatus.RUNNING,
+                    func.greatest(BackgroundJob.started_at, BackgroundJob.updated_at) < stale_before
+                )
+            )
+        )
+        .order_by(BackgroundJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id.in_(claimable))
+        .values(status=JobStatus.RUNNING, started_at=now, error=None)
+        .returning(BackgroundJob)
+        .execution_options(synchronize_session=False)
+    )
+    job = result.scalar_one_or_none()
+    await db.commit()
+    return job
+
+
+def spawn_job(coro: Coroutine) -> asyncio.Task:
+    """Run a job coroutine in the background of the current event loop"""
+    task = asyncio.create_task(coro)
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return task
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import hashlib
+import os
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# How often a follower retries for leadership and the leader checks its lock connection
+LEADER_CHECK_SECONDS = int(os.getenv("LEADER_CHECK_SECONDS", "15"))
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key for a lock name"""
+    return int.from_bytes(hashlib.sha256(f"sureshot:{name}".encode()).digest()[:8], "big", signed=True)
+
+
+def _get_engine(engine: Optional[AsyncEngine]) -> Optional[AsyncEngine]:
+    if engine is None:
+        from config import async_engine
+        engine = async_engine
+    return engine
+
+
+@asynccontextmanager
+async def advisory_xact_lock(name: str, engine: Optional[AsyncEngine] = None, shared: bool = False) -> AsyncIterator[bool]:
+    """
+    Try to take a transaction-scoped advisory lock for the duration of the block
+
+    The lock lives in a transaction on its own connection and is released when the
+    block exits or the connection drops, so a crashed holder never leaves it behind.
+    Transaction-scoped locks also work through PgBouncer in transaction mode.
+    Shared holders of a name can hold it together but exclude an exclusive holder.
+
+    Yields:
+        True if the lock was acquired, False if another process holds it
+    """
+    engine = _get_engine(engine)
+    if engine is None:
+        yield True
+        return
+
+    async with engine.connect() as conn:
+        async with conn.begin():
+            try_lock = func.pg_try_advisory_xact_lock_shared if shared else func.pg_try_advisory_xact_lock
+            acquired = await conn.scalar(select(try_lock(advisory_lock_key(name))))
+            yield bool(acquired)
+
+
+class LeaderElection:
+    """
+    Elects one process, across workers and hosts, to run scheduled jobs
+
+    Every process competes for a session-level advisory lock held on a dedicated
+    connection. The holder is leader for as long as that connection lives; if the
+    process dies or its connection breaks, Postgres releases the lock and a follower
+    takes over within LEADER_CHECK_SECONDS.
+
+    Session locks do not survive PgBouncer transaction pooling, so in that mode every
+    process stays a candidate and leader_only() relies on its per-run lock alone.
+    """
+
+    def __init__(self, name: str, engine: Optional[AsyncEngine] = None, check_seconds: int = LEADER_CHECK_SECONDS):
+        self.name = name
+        self.engine = engine
+        self.check_seconds = check_seconds
+        self._conn: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        from config import DB_PGBOUNCER_TRANSACTION_MODE
+        return DB_PGBOUNCER_TRANSACTION_MODE or self._conn is not None
+
+    async def _try_acquire(self):
+        conn = await _get_engine(self.engine).connect()
+        try:
+            acquired = await conn.scalar(select(func.pg_try_advisory_lock(advisory_lock_key(self.name))))
+            # Leave no transaction open on the held connection
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+
+        if acquired:
+            self._conn = conn
+            logger.info(f"👑 Became leader for {self.name}")
+        else:
+            await conn.close()
+
+    async def _check(self):
+        try:
+            await self._conn.scalar(select(1))
+            await self._conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Lost leadership for {self.name}: {str(e)}")
+            await self._release()
+
+    async def _release(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            await conn.scalar(select(func.pg_advisory_unlock(advisory_lock_key(self.name))))
+            await conn.commit()
+        except Exception:
+            pass
+        finally:
+            # Discard rather than pool the connection: closing it releases the lock
+            # even if the unlock failed
+            await conn.invalidate()
+            await conn.close()
+
+    async def _run(self):
+        while True:
+            try:
+                if self._conn is None:
+                    await self._try_acquire()
+                else:
+                    await self._check()
+            except Exception as e:
+                logger.error(f"Leader election for {self.name} failed: {str(e)}")
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        from config import DB_PGBOUNCER_TRANSACTION_MODE
+        if DB_PGBOUNCER_TRANSACTION_MODE or _get_engine(self.engine) is None:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release()
+
+
+def leader_only(election: LeaderElection, job: Callable[..., Awaitable], lock_name: Optional[str] = None):
+    """
+    Wrap a scheduled job so it runs only on the leader, one run at a time
+
+    Besides checking leadership, each run takes a transaction-scoped advisory lock,
+    which covers the moment between a leader losing its connection and noticing it.
+
+    Args:
+        election: Leader election the job belongs to
+        job: Coroutine function to run
+        lock_name: Per-run lock name (defaults to the job's name)
+
+    Returns:
+        Coroutine function suitable for APScheduler
+    """
+    lock_name = lock_name or job.__name__
+
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        if not election.is_leader:
+            logger.debug(f"Not leader for {election.name}, skipping {lock_name}")
+            return None
+
+        async with advisory_xact_lock(lock_name, election.engine) as acquired:
+            if not acquired:
+                logger.info(f"⏭️ {lock_name} is already running in another process, skipping")
+                return None
+            return await job(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,345 @@
+import asyncio
+import os
+import socket
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any
+from sqlalchemy import select, update, union_all, and_, or_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import NotificationOutbox, NotificationChannel, NotificationPriority, OutboxStatus
+from utils.dispatcher import notification_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))  # SENDING rows older than this are reclaimed
+ENQUEUE_CHUNK_SIZE = 1000  # keeps multi-row INSERTs under asyncpg's bind parameter limit
+RETRY_BASE_DELAY_SECONDS = 30
+RETRY_MAX_DELAY_SECONDS = 3600
+
+
+def validate_lane_weights(weights: List[int]) -> List[int]:
+    """
+    Check there is one positive weight per priority lane
+
+    Raises:
+        ValueError: A lane would be missing, extra or never served
+    """
+    if len(weights) != len(NotificationPriority) or any(weight <= 0 for weight in weights):
+        raise ValueError(
+            f"OUTBOX_LANE_WEIGHTS must be {len(NotificationPriority)} positive integers "
+            f"({', '.join(priority.name for priority in NotificationPriority)}), got {weights}"
+        )
+    return weights
+
+
+def parse_lane_weights(value: str) -> List[int]:
+    """Parse and validate a comma-separated OUTBOX_LANE_WEIGHTS value"""
+    try:
+        weights = [int(weight) for weight in value.split(",")]
+    except ValueError:
+        raise ValueError(f"OUTBOX_LANE_WEIGHTS must be comma-separated integers, got '{value}'")
+    return validate_lane_weights(weights)
+
+
+# Relative share of each batch per priority lane, CRITICAL first (see claim_batch);
+# checked at import so a misconfigured deployment fails to start
+OUTBOX_LANE_WEIGHTS = parse_lane_weights(os.getenv("OUTBOX_LANE_WEIGHTS", "16,8,4,2,1"))
+
+
+def lane_quotas(batch_size: int, weights: List[int] = OUTBOX_LANE_WEIGHTS) -> Dict[NotificationPriority, int]:
+    """
+    Slots each priority lane is guaranteed in a batch
+
+    Every lane gets its weighted share of the batch and at least one slot, so bulk
+    traffic keeps moving however busy the urgent lanes are.
+    """
+    validate_lane_weights(weights)
+    total = sum(weights)
+    quotas = {
+        priority: max(1, batch_size * weight // total)
+        for priority, weight in zip(NotificationPriority, weights)
+    }
+    # Batches smaller than the number of lanes: trim the largest shares, then drop
+    # the least urgent lanes
+    while sum(quotas.values()) > batch_size:
+        largest = max(quotas, key=quotas.get)
+        if quotas[largest] > 1:
+            quotas[largest] -= 1
+        else:
+            quotas.popitem()
+    return quotas
+
+
+def build_outbox_message(
+    channel: NotificationChannel,
+    recipient: str,
+    body: str,
+    subject: Optional[str] = None,
+    dedupe_key: Optional[str] = None,
+    correlation_id: Optional[str] = None,
+    priority: NotificationPriority = NotificationPriority.NORMAL
+) -> Dict[str, Any]:
+    """
+    Build an outbox row for enqueue_notifications
+
+    Args:
+        channel: EMAIL or SMS
+        recipient: Email address or phone number
+        body: HTML email body or SMS text
+        subject: Email subject (email only)
+        dedupe_key: Idempotency key; a second message with the same key is ignored
+        correlation_id: Groups messages for progress tracking (e.g. a drive fan-out job)
+        priority: Delivery lane; CRITICAL for transactional messages, BULK for fan-outs
+
+    Returns:
+        Dict of NotificationOutbox column values
+    """
+    return {
+        "id": uuid.uuid4(),
+        "channel": channel,
+        "recipient": recipient,
+        "subject": subject,
+        "body": body,
+        "dedupe_key": dedupe_key,
+        "correlation_id": correlation_id,
+        "priority": priority.value
+    }
+
+
+async def enqueue_notifications(db: AsyncSession, messages: List[Dict[str, Any]]) -> None:
+    """
+    Insert messages into the outbox in the caller's transaction (the caller commits)
+
+    Messages whose dedupe_key already exists are skipped, so re-running the code that
+    enqueues them never produces a second delivery.
+    """
+    for start in range(0, len(messages), ENQUEUE_CHUNK_SIZE):
+        await db.execute(
+            insert(NotificationOutbox)
+            .values(messages[start:start + ENQUEUE_CHUNK_SIZE])
+            .on_conflict_do_nothing(index_elements=["dedupe_key"])
+        )
+
+
+async def enqueue_notification(
+    db: AsyncSession,
+    channel: NotificationChannel,
+    recipient: str,
+    body: str,
+    subject: Optional[str] = None,
+    dedupe_key: Optional[str] = None,
+    correlation_id: Optional[str] = None,
+    priority: NotificationPriority = NotificationPriority.NORMAL
+) -> None:
+    """Insert a single message into the outbox in the caller's transaction"""
+    await enqueue_notifications(db, [
+        build_outbox_message(channel, recipient, body, subject, dedupe_key, correlation_id, priority)
+    ])
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff between delivery attempts"""
+    return timedelta(seconds=min(RETRY_BASE_DELAY_SECONDS * 2 ** (attempts - 1), RETRY_MAX_DELAY_SECONDS))
+
+
+class OutboxWorker:
+    """
+    Delivers outbox messages
+
+    Each batch is claimed in one statement (UPDATE ... WHERE id IN (SELECT ... FOR UPDATE
+    SKIP LOCKED)), so any number of workers across processes or hosts can poll the same
+    table without delivering a message twice. Rows stuck in SENDING past the lease (a
+    worker died mid-batch) become claimable again.
+
+    Messages are claimed by priority lane with weighted fair scheduling (see
+    claim_batch), so confirmations and 1-day reminders keep low latency while a large
+    drive fan-out or reminder backlog is draining.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        worker_id: Optional[str] = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        lease_seconds: int = OUTBOX_LEASE_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def _get_session_factory(self):
+        if self.session_factory is None:
+            from config import AsyncSessionLocal
+            self.session_factory = AsyncSessionLocal
+        return self.session_factory
+
+    def _claimable(self):
+        """Select of deliverable message ids: due PENDING rows and SENDING rows past the lease"""
+        now = func.now()
+        lease_expired = now - timedelta(seconds=self.lease_seconds)
+        return (
+            select(NotificationOutbox.id)
+            .where(
+                or_(
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.PENDING,
+                        NotificationOutbox.available_at <= now
+                    ),
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.SENDING,
+                        NotificationOutbox.locked_at < lease_expired
+                    )
+                )
+            )
+            .with_for_update(skip_locked=True)
+        )
+
+    async def _claim(self, db: AsyncSession, claimable) -> List[NotificationOutbox]:
+        now = func.now()
+        result = await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(claimable))
+            .values(
+                status=OutboxStatus.SENDING,
+                locked_by=self.worker_id,
+                locked_at=now,
+                attempts=NotificationOutbox.attempts + 1
+            )
+            .returning(NotificationOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars().all())
+
+    async def claim_batch(self, db: AsyncSession) -> List[NotificationOutbox]:
+        """
+        Claim up to batch_size deliverable messages for this worker
+
+        The first pass claims each lane's weighted quota (lane_quotas) in one
+        statement, one locking CTE per lane. Slots left over by lanes with less work
+        are then filled strictly by priority, so a batch is never short while any
+        message is deliverable and an idle lane's share goes to the most urgent work.
+
+        Returns:
+            Claimed messages, most urgent first
+        """
+        lanes = [
+            self._claimable()
+            .where(NotificationOutbox.priority == priority.value)
+            .order_by(NotificationOutbox.available_at)
+            .limit(quota)
+            .cte(f"lane_{priority.value}")
+            for priority, quota in lane_quotas(self.batch_size).items()
+        ]
+        claimed = await self._claim(db, union_all(*(select(lane.c.id) for lane in lanes)))
+
+        remaining = self.batch_size - len(claimed)
+        if remaining > 0 and claimed:
+            claimed += await self._claim(
+                db,
+                self._claimable()
+                .order_by(NotificationOutbox.priority, NotificationOutbox.available_at)
+                .limit(remaining)
+            )
+
+        await db.commit()
+        return sorted(claimed, key=lambda message: message.priority)
+
+    async def deliver(self, message: NotificationOutbox) -> bool:
+        """Send one message through the rate-limited dispatcher"""
+        if message.channel == NotificationChannel.EMAIL:
+            return await notification_dispatcher.send_email(message.recipient, message.subject or "", message.body)
+        return await notification_dispatcher.send_sms(message.recipient, message.body)
+
+    async def process_batch(self) -> int:
+        """
+        Claim, deliver and record one batch
+
+        Returns:
+            Number of messages claimed (0 when the outbox is idle)
+        """
+        async with self._get_session_factory()() as db:
+            messages = await self.claim_batch(db)
+            if not messages:
+                return 0
+
+            # Urgent messages reach the dispatcher's rate limits first
+            deliveries = await asyncio.gather(
+                *(self.deliver(message) for message in messages),
+                return_exceptions=True
+            )
+
+            now = datetime.utcnow()
+            updates = []
+            for message, delivered in zip(messages, deliveries):
+                if delivered is True:
+                    updates.append({
+                        "id": message.id,
+                        "status": OutboxStatus.SENT,
+                        "sent_at": now,
+                        "locked_by": None,
+                        "locked_at": None
+                    })
+                    continue
+
+                error = str(delivered) if isinstance(delivered, Exception) else "Delivery failed"
+                exhausted = message.attempts >= message.max_attempts
+                updates.append({
+                    "id": message.id,
+                    "status": OutboxStatus.FAILED if exhausted else OutboxStatus.PENDING,
+                    "available_at": now + retry_delay(message.attempts),
+                    "last_error": error,
+                    "locked_by": None,
+                    "locked_at": None
+                })
+
+            # Bulk UPDATE by primary key, one commit for the batch
+            await db.execute(update(NotificationOutbox), updates)
+            await db.commit()
+
+            sent = sum(1 for delivered in deliveries if delivered is True)
+            logger.info(f"📤 Outbox batch: {sent}/{len(messages)} delivered by {self.worker_id}")
+            return len(messages)
+
+    async def run(self):
+        """Poll the outbox until stop() is called"""
+        logger.info(f"Outbox worker {self.worker_id} started")
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {str(e)}")
+                claimed = 0
+
+            if claimed == 0:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info(f"Outbox worker {self.worker_id} stopped")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+if __name__ == "__main__":
+    # Standalone worker: python -m utils.outbox (run as many as needed)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(OutboxWorker().run())
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"$uuid": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$uuid" in value:
+            return uuid.UUID(value["$uuid"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last row on a page as an opaque cursor
+
+    Args:
+        values: Sort key values, in ORDER BY order
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_length: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        HTTPException 400 if the cursor is malformed or does not match the sort key
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = [_decode_value(value) for value in json.loads(base64.urlsafe_b64decode(padded))]
+    except (ValueError, TypeError, binascii.Error):
+        values = None
+
+    if not isinstance(values, list) or len(values) != key_length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return values
+
+
+def paginate_query(
+    query: Select,
+    keys: Sequence[ColumnElement],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False
+) -> Select:
+    """
+    Order a query by a unique sort key and restrict it to one page
+
+    With a cursor the page starts strictly after the cursor row using a row-value
+    comparison, (k1, k2, ...) > (v1, v2, ...), which an index on the keys can serve
+    directly. Without one, the legacy offset is applied. One row beyond `limit` is
+    fetched so split_page can tell whether another page exists.
+
+    Args:
+        query: Select to paginate
+        keys: Sort key columns; the last one must make the key unique (usually id)
+        limit: Page size
+        cursor: Cursor from a previous page's next_cursor
+        skip: Legacy offset, used only when no cursor is given
+        descending: Sort newest/largest first
+
+    Returns:
+        The paginated select
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        key_tuple = tuple_(*keys)
+        value_tuple = tuple_(*values)
+        query = query.where(key_tuple < value_tuple if descending else key_tuple > value_tuple)
+    elif skip:
+        query = query.offset(skip)
+
+    order_by = [key.desc() for key in keys] if descending else list(keys)
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def split_page(items: Sequence[T], limit: int, key: Callable[[T], Tuple[Any, ...]]) -> Tuple[List[T], Optional[str]]:
+    """
+    Trim the extra row fetched by paginate_query and build the next cursor
+
+    Args:
+        items: Rows returned by the paginated query
+        limit: Page size
+        key: Returns a row's sort key values, matching the keys given to paginate_query
+
+    Returns:
+        Tuple of (rows for this page, next_cursor or None on the last page)
+    """
+    page = list(items[:limit])
+    if len(items) <= limit:
+        return page, None
+    return page, encode_cursor(key(page[-1]))
@@ -1,14 +1,21 @@
 import asyncio
+import hashlib
 from datetime import datetime, date, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import selectinload
-from config import get_db
-from models import VaccinationReminder, VaccinationRecord, Users, UserProfile, ReminderType
-from utils.smtp import smtp_service
-from utils.twilio import twilio_service
+from sqlalchemy import select, update, values, column, case, cast, and_, or_, func, exists, literal, type_coerce, Boolean, DateTime, BigInteger, String
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, BIT, insert
+from sqlalchemy.engine import Row
+from config import AsyncSessionLocal
+from models import VaccinationReminder, VaccinationRecord, VaccineTemplate, Users, UserProfile, ReminderType, NotificationChannel, NotificationPriority
+from utils.dispatcher import notification_dispatcher
+from utils.outbox import build_outbox_message, enqueue_notifications
+from utils.watermarks import get_watermark, set_watermark
 import logging
-from typing import List, Dict, Any
+import os
+import json
+import tempfile
+from typing import AsyncIterator, List, Dict, Any, NamedTuple, Optional, Sequence, Tuple
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +27,37 @@ REMINDER_DAYS = {
     ReminderType.ONE_DAY: 1
 }
 
-BATCH_SIZE = 20  # Process 20 reminders at a time
-DELAY_BETWEEN_SENDS = 0.5  # Half second delay between sends
-DELAY_BETWEEN_BATCHES = 1.0  # 1 second delay between batches
+# Outbox lane per reminder type: the closer the vaccination, the sooner it goes out
+REMINDER_PRIORITIES = {
+    ReminderType.THIRTY_DAYS: NotificationPriority.LOW,
+    ReminderType.FIFTEEN_DAYS: NotificationPriority.LOW,
+    ReminderType.SEVEN_DAYS: NotificationPriority.NORMAL,
+    ReminderType.ONE_DAY: NotificationPriority.HIGH
+}
+
+# Reminders dispatched concurrently per batch; actual send rates are governed by
+# the dispatcher's per-channel token buckets (see utils/dispatcher.py)
+BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "200"))
+STREAM_FETCH_SIZE = 1000  # Rows fetched per round-trip from the server-side cursor
+FLUSH_MAX_ATTEMPTS = 3  # Status write-back retries before results are spooled to disk
+# "outbox" queues reminders for the outbox worker; "direct" sends them from this job
+REMINDER_DELIVERY_MODE = os.getenv("REMINDER_DELIVERY_MODE", "outbox").lower()
+# "eager" writes four VaccinationReminder rows per dose when a schedule is created;
+# "lazy" derives reminder due-points from vaccination_records at send time and only
+# writes a reminder row, as a sent log, once a reminder has been delivered
+REMINDER_MATERIALIZATION = os.getenv("REMINDER_MATERIALIZATION", "eager").lower()
+# Merge a baby's reminders for the same due date and type into one email/SMS
+REMINDER_DIGEST_ENABLED = os.getenv("REMINDER_DIGEST_ENABLED", "true").lower() == "true"
+# Days a missed run is caught up on; capped at 5 so the per-type due windows stay disjoint
+REMINDER_CATCHUP_DAYS = min(int(os.getenv("REMINDER_CATCHUP_DAYS", "3")), 5)
+REMINDER_WATERMARK_JOB = "vaccination_reminders"
+# Shards the standalone worker splits the job into (see worker.py); 1 runs it whole
+REMINDER_SHARDS = max(int(os.getenv("REMINDER_SHARDS", "1")), 1)
+# Results whose write-back failed (direct delivery only) wait here for the next run.
+# That run may be on another host (leader or shard owner moved) or a fresh Lambda
+# container, so direct mode requires this to be set to shared, persistent storage
+# (e.g. an EFS or NFS mount); see reminder_spool_is_shared
+REMINDER_SPOOL_PATH = os.getenv("REMINDER_SPOOL_PATH", os.path.join(tempfile.gettempdir(), "sureshot_reminder_spool.jsonl"))
 
 # Reminder message templates
 REMINDER_TEMPLATES = {
@@ -49,14 +84,326 @@ REMINDER_TEMPLATES = {
 }
 
 
-async def send_vaccination_reminders() -> Dict[str, int]:
+class ReminderStatusWriter:
+    """
+    Accumulates delivery results and writes them back in bulk
+    
+    Each flush is a single UPDATE ... FROM (VALUES ...) and one commit. A flush that
+    keeps failing is spooled to REMINDER_SPOOL_PATH instead of being dropped, and the
+    spool is replayed before the next run selects anything, so a reminder that was
+    delivered is never selected and sent again because its status write was lost.
+    
+    Reminders selected in lazy materialization mode have no row to update yet; their
+    results are written as sent-log rows (INSERT ... ON CONFLICT DO UPDATE) instead.
+    """
+    
+    def __init__(self, db: AsyncSession, spool_path: str = None):
+        self.db = db
+        self.spool_path = spool_path or REMINDER_SPOOL_PATH
+        self._pending: List[Tuple[uuid.UUID, bool, bool, datetime]] = []
+        self._pending_log: List[Dict[str, Any]] = []
+        self.failures = 0  # Reminders that were neither delivered nor queued this run
+    
+    def add(self, reminder_id: uuid.UUID, email_sent: bool, sms_sent: bool, sent_at: datetime = None):
+        """Record a delivery result to be written on the next flush"""
+        self._pending.append((reminder_id, email_sent, sms_sent, sent_at or datetime.utcnow()))
+    
+    def add_result(self, reminder: Row, email_sent: bool, sms_sent: bool, sent_at: datetime = None):
+        """Record a delivery result for a row from build_due_reminders_query"""
+        if not reminder.materialized:
+            self._pending_log.append(build_sent_log_row(reminder, email_sent, sms_sent, sent_at or datetime.utcnow()))
+            return
+        self.add(reminder.id, email_sent, sms_sent, sent_at)
+    
+    def _take_pending(self) -> Tuple[List[Tuple[uuid.UUID, bool, bool, datetime]], List[Dict[str, Any]]]:
+        pending, self._pending = self._pending, []
+        pending_log, self._pending_log = self._pending_log, []
+        return pending, pending_log
+    
+    async def flush(self) -> int:
+        """
+        Write all pending results in one statement
+        
+        Returns:
+            Number of results written (0 if they had to be spooled)
+        """
+        pending, pending_log = self._take_pending()
+        if not pending and not pending_log:
+            return 0
+        
+        for attempt in range(1, FLUSH_MAX_ATTEMPTS + 1):
+            try:
+                await self._write(pending, pending_log)
+                return len(pending) + len(pending_log)
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(f"Reminder status flush failed (attempt {attempt}/{FLUSH_MAX_ATTEMPTS}): {str(e)}")
+                if attempt < FLUSH_MAX_ATTEMPTS:
+                    await asyncio.sleep(2 ** attempt)
+        
+        self._spool(pending, pending_log)
+        return 0
+    
+    async def flush_with_messages(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Enqueue outbox messages and write pending results in one transaction
+        
+        Reminders are marked sent exactly when their notifications are queued, so a
+        failure leaves both untouched and the next run picks the reminders up again.
+        
+        Returns:
+            Number of results written (0 if the transaction failed)
+        """
+        pending, pending_log = self._take_pending()
+        if not pending and not pending_log:
+            return 0
+        
+        try:
+            await enqueue_notifications(self.db, messages)
+            await self._write(pending, pending_log)
+            return len(pending) + len(pending_log)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Failed to queue {len(pending) + len(pending_log)} reminders: {str(e)}")
+            self.failures += len(pending) + len(pending_log)
+            return 0
+    
+    async def replay_spool(self) -> bool:
+        """
+        Write back results spooled by an earlier failed flush
+        
+        Returns:
+            True if the spool is empty afterwards and it is safe to select new reminders
+        """
+        if not os.path.exists(self.spool_path):
+            return True
+        
+        with open(self.spool_path) as spool:
+            spooled = [json.loads(line) for line in spool if line.strip()]
+        
+        results = [
+            (uuid.UUID(item["id"]), item["email_sent"], item["sms_sent"], datetime.fromisoformat(item["sent_at"]))
+            for item in spooled
+            if "log" not in item
+        ]
+        log_rows = [decode_sent_log_row(item["log"]) for item in spooled if "log" in item]
+        
+        try:
+            for i in range(0, len(results), BATCH_SIZE):
+                await self._write(results[i:i + BATCH_SIZE], [])
+            for i in range(0, len(log_rows), BATCH_SIZE):
+                await self._write([], log_rows[i:i + BATCH_SIZE])
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Could not replay {len(spooled)} spooled reminder statuses: {str(e)}")
+            return False
+        
+        os.remove(self.spool_path)
+        logger.info(f"♻️ Replayed {len(spooled)} spooled reminder statuses")
+        return True
+    
+    async def _write(self, results: List[Tuple[uuid.UUID, bool, bool, datetime]], log_rows: List[Dict[str, Any]]):
+        if results:
+            await self._update_reminders(results)
+        if log_rows:
+            await self._insert_sent_log(log_rows)
+        await self.db.commit()
+    
+    async def _update_reminders(self, results: List[Tuple[uuid.UUID, bool, bool, datetime]]):
+        delivered = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("email_sent", Boolean),
+            column("sms_sent", Boolean),
+            column("sent_at", DateTime(timezone=True)),
+            name="delivered"
+        ).data(results)
+        
+        await self.db.execute(
+            update(VaccinationReminder)
+            .where(VaccinationReminder.id == delivered.c.id)
+            .values(
+                email_sent=or_(VaccinationReminder.email_sent, delivered.c.email_sent),
+                sms_sent=or_(VaccinationReminder.sms_sent, delivered.c.sms_sent),
+                email_sent_at=case(
+                    (delivered.c.email_sent, delivered.c.sent_at),
+                    else_=VaccinationReminder.email_sent_at
+                ),
+                sms_sent_at=case(
+                    (delivered.c.sms_sent, delivered.c.sent_at),
+                    else_=VaccinationReminder.sms_sent_at
+                ),
+                updated_at=delivered.c.sent_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    async def _insert_sent_log(self, log_rows: List[Dict[str, Any]]):
+        statement = insert(VaccinationReminder).values(log_rows)
+        excluded = statement.excluded
+        await self.db.execute(
+            statement.on_conflict_do_update(
+                constraint="unique_vaccination_reminder",
+                set_={
+                    "email_sent": or_(VaccinationReminder.email_sent, excluded.email_sent),
+                    "sms_sent": or_(VaccinationReminder.sms_sent, excluded.sms_sent),
+                    "email_sent_at": func.coalesce(excluded.email_sent_at, VaccinationReminder.email_sent_at),
+                    "sms_sent_at": func.coalesce(excluded.sms_sent_at, VaccinationReminder.sms_sent_at),
+                    "updated_at": excluded.updated_at
+                }
+            )
+        )
+    
+    def _spool(self, results: List[Tuple[uuid.UUID, bool, bool, datetime]], log_rows: List[Dict[str, Any]]):
+        try:
+            with open(self.spool_path, "a") as spool:
+                for reminder_id, email_sent, sms_sent, sent_at in results:
+                    spool.write(json.dumps({
+                        "id": str(reminder_id),
+                        "email_sent": email_sent,
+                        "sms_sent": sms_sent,
+                        "sent_at": sent_at.isoformat()
+                    }) + "\n")
+                for row in log_rows:
+                    spool.write(json.dumps({"log": encode_sent_log_row(row)}) + "\n")
+            logger.warning(f"⚠️ Spooled {len(results) + len(log_rows)} reminder statuses to {self.spool_path}")
+        except Exception as e:
+            logger.critical(f"Lost {len(results) + len(log_rows)} reminder statuses, they may be sent again: {str(e)}")
+
+
+def build_sent_log_row(reminder: Row, email_sent: bool, sms_sent: bool, sent_at: datetime) -> Dict[str, Any]:
+    """VaccinationReminder row recording a lazily derived reminder as delivered"""
+    return {
+        "id": uuid.uuid4(),
+        "vaccination_record_id": reminder.vaccination_record_id,
+        "user_id": reminder.user_id,
+        "vaccine_name": reminder.vaccine_name,
+        "due_date": reminder.due_date,
+        "reminder_type": reminder.reminder_type,
+        "email_sent": email_sent,
+        "sms_sent": sms_sent,
+        "email_sent_at": sent_at if email_sent else None,
+        "sms_sent_at": sent_at if sms_sent else None,
+        "updated_at": sent_at
+    }
+
+
+def encode_sent_log_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **row,
+        "id": str(row["id"]),
+        "vaccination_record_id": str(row["vaccination_record_id"]),
+        "user_id": str(row["user_id"]),
+        "due_date": row["due_date"].isoformat(),
+        "reminder_type": row["reminder_type"].name,
+        "email_sent_at": row["email_sent_at"].isoformat() if row["email_sent_at"] else None,
+        "sms_sent_at": row["sms_sent_at"].isoformat() if row["sms_sent_at"] else None,
+        "updated_at": row["updated_at"].isoformat()
+    }
+
+
+def decode_sent_log_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **item,
+        "id": uuid.UUID(item["id"]),
+        "vaccination_record_id": uuid.UUID(item["vaccination_record_id"]),
+        "user_id": uuid.UUID(item["user_id"]),
+        "due_date": datetime.fromisoformat(item["due_date"]),
+        "reminder_type": ReminderType[item["reminder_type"]],
+        "email_sent_at": datetime.fromisoformat(item["email_sent_at"]) if item["email_sent_at"] else None,
+        "sms_sent_at": datetime.fromisoformat(item["sms_sent_at"]) if item["sms_sent_at"] else None,
+        "updated_at": datetime.fromisoformat(item["updated_at"])
+    }
+
+
+def reminder_dedupe_key(reminder: Row, channel: str) -> str:
+    """Outbox idempotency key for one channel of a reminder"""
+    if reminder.materialized:
+        return f"reminder:{reminder.id}:{channel}"
+    # Lazily derived reminders have no stable row id until delivered
+    return f"reminder:{reminder.vaccination_record_id}:{reminder.reminder_type.name}:{channel}"
+
+
+class ReminderShard(NamedTuple):
+    """
+    One of `count` disjoint slices of the reminder job
+    
+    A user belongs to shard user_shard(user_id, count), so all of a baby's reminders
+    (and therefore every digest) land in the same shard.
+    """
+    index: int
+    count: int
+    
+    @property
+    def name(self) -> str:
+        return f"shard-{self.index}-of-{self.count}"
+
+
+def user_shard(user_id: uuid.UUID, shard_count: int) -> int:
+    """Shard of a user: the UUID's low 32 bits modulo the shard count"""
+    return (user_id.int & 0xFFFFFFFF) % shard_count
+
+
+def user_shard_expr(user_id_column, shard_count: int):
+    """SQL equivalent of user_shard(), ('x' || last 8 hex digits)::bit(32)::bigint % count"""
+    low_hex = func.right(func.replace(cast(user_id_column, String), "-", ""), 8)
+    return cast(cast(func.concat("x", low_hex), BIT(32)), BigInteger) % shard_count
+
+
+def reminder_watermark_name(shard: Optional[ReminderShard] = None) -> str:
+    """Each shard advances its own watermark"""
+    if shard is None or shard.count == 1:
+        return REMINDER_WATERMARK_JOB
+    return f"{REMINDER_WATERMARK_JOB}:{shard.name}"
+
+
+def reminder_spool_is_shared() -> bool:
+    """
+    Whether the spool outlives this host, as direct delivery needs
+
+    A spool in the temp directory is lost when the container is recycled and never
+    seen by a run elsewhere, which would then send its reminders a second time.
+    """
+    if "REMINDER_SPOOL_PATH" not in os.environ:
+        return False
+    temp_dir = os.path.realpath(tempfile.gettempdir())
+    return os.path.commonpath([os.path.realpath(REMINDER_SPOOL_PATH), temp_dir]) != temp_dir
+
+
+def reminder_spool_path(shard: Optional[ReminderShard] = None) -> str:
+    """Spool file for a shard, so shard processes on one host never share a file"""
+    if shard is None or shard.count == 1:
+        return REMINDER_SPOOL_PATH
+    root, ext = os.path.splitext(REMINDER_SPOOL_PATH)
+    return f"{root}.{shard.name}{ext}"
+
+
+async def send_vaccination_reminders(session_factory=None, shard: Optional[ReminderShard] = None) -> Dict[str, int]:
     """
     Main reminder job - finds and sends vaccination reminders
     
+    All four reminder types are selected in a single query that also carries the
+    parent's contact details, streamed from a server-side cursor and sent in chunks of
+    BATCH_SIZE digests (one message per baby, due date and reminder type).
+    
+    Every run re-scans today's window, so reminders and records created after an
+    earlier run today are still picked up; reminders already sent are excluded by the
+    query. The job_watermarks row records the last day fully processed and only
+    decides how many missed days before today are caught up (at most
+    REMINDER_CATCHUP_DAYS, so a few days of downtime are not skipped). The watermark
+    advances only when every due reminder was delivered or queued; otherwise the next
+    run covers the same days again.
+    
+    Args:
+        session_factory: Session factory to use (defaults to AsyncSessionLocal); the
+            standalone worker passes its own so batch load stays off the API's pool
+        shard: Process only this shard's users, with its own watermark and spool;
+            shards can run at the same time in separate processes or hosts
+    
     Returns:
         Dict with counts of reminders sent by type
     """
-    logger.info(f"🔔 Starting vaccination reminder job at {datetime.now()}")
+    label = f"vaccination reminder job ({shard.name})" if shard and shard.count > 1 else "vaccination reminder job"
+    logger.info(f"🔔 Starting {label} at {datetime.now()}")
     
     results = {
         "30_days": 0,
@@ -66,203 +413,462 @@ async def send_vaccination_reminders() -> Dict[str, int]:
         "total": 0
     }
     
+    session_factory = session_factory or AsyncSessionLocal
+    if session_factory is None:
+        logger.error("❌ Database not configured, skipping vaccination reminder job")
+        return results
+    
+    if REMINDER_DELIVERY_MODE == "direct" and not reminder_spool_is_shared():
+        logger.error(
+            f"❌ REMINDER_DELIVERY_MODE=direct needs REMINDER_SPOOL_PATH on shared, persistent "
+            f"storage outside {tempfile.gettempdir()}; skipping {label}"
+        )
+        return results
+    
     try:
-        async with get_db() as db:
+        # The streaming cursor lives in its own transaction; status updates go
+        # through a second session so committing them does not close the cursor
+        async with session_factory() as read_db, session_factory() as write_db:
+            status_writer = ReminderStatusWriter(write_db, spool_path=reminder_spool_path(shard))
+            
+            # Results from a previous run whose write-back failed must land first,
+            # otherwise those reminders would be selected and sent again
+            if not await status_writer.replay_spool():
+                logger.error(f"❌ Skipping {label} until spooled statuses are written back")
+                return results
+            
             today = date.today()
+            watermark_name = reminder_watermark_name(shard)
+            watermark = await get_watermark(write_db, watermark_name)
+            if watermark is None and watermark_name != REMINDER_WATERMARK_JOB:
+                # A new shard layout picks up where the unsharded job left off
+                watermark = await get_watermark(write_db, REMINDER_WATERMARK_JOB)
+            since = reminder_window_start(today, watermark)
             
-            for reminder_type, days_before in REMINDER_DAYS.items():
-                target_due_date = today + timedelta(days=days_before)
-                
-                # Find pending reminders for this date and type
-                pending_reminders = await get_pending_reminders(db, target_due_date, reminder_type)
-                
-                logger.info(f"📅 Found {len(pending_reminders)} {reminder_type.value} reminders for {target_due_date}")
+            query = build_due_reminders_query(today, since, shard)
+            stream = await read_db.stream(query.execution_options(yield_per=STREAM_FETCH_SIZE))
+            
+            async for groups in iter_reminder_groups(stream, BATCH_SIZE):
+                logger.info(f"📅 Processing {sum(len(group) for group in groups)} due reminders in {len(groups)} digests")
                 
-                if pending_reminders:
-                    sent_count = await send_reminder_batch_list(db, pending_reminders, reminder_type)
-                    results[reminder_type.value.replace('_days', '_days')] = sent_count
+                sent_counts = await send_reminder_batch_list(status_writer, groups)
+                for reminder_type, sent_count in sent_counts.items():
+                    results[reminder_type.value] += sent_count
                     results["total"] += sent_count
-                    
-                    # Small delay between reminder types
-                    await asyncio.sleep(DELAY_BETWEEN_BATCHES)
             
-            logger.info(f"✅ Vaccination reminder job completed. Total sent: {results['total']}")
+            if status_writer.failures:
+                logger.warning(f"⚠️ {status_writer.failures} reminders failed, watermark stays before {since}")
+            else:
+                await set_watermark(write_db, watermark_name, today)
+            
+            logger.info(f"✅ {label.capitalize()} completed for {since} to {today}. Total sent: {results['total']}")
             
     except Exception as e:
-        logger.error(f"❌ Error in vaccination reminder job: {str(e)}")
+        logger.error(f"❌ Error in {label}: {str(e)}")
         
     return results
 
 
-async def get_pending_reminders(
-    db: AsyncSession, 
-    target_due_date: date, 
-    reminder_type: ReminderType
-) -> List[VaccinationReminder]:
+def reminder_window_start(today: date, watermark: Optional[date]) -> date:
     """
-    Find vaccination reminders that should be sent for a specific date and type
+    First day a run has to cover, given the last day fully processed
+    
+    Returns:
+        The day after the watermark, no earlier than REMINDER_CATCHUP_DAYS ago and
+        never later than today, which every run covers again
+    """
+    if watermark is None:
+        return today
+    return min(max(watermark + timedelta(days=1), today - timedelta(days=REMINDER_CATCHUP_DAYS)), today)
+
+
+def reminder_due_window(reminder_due_date, days_before: int, today: date, since: date):
+    """
+    Due-date condition for a reminder type over the run days since..today
+    
+    On run day D a reminder N days ahead covers vaccinations due on D + N; when a missed
+    day is caught up, vaccinations due today or earlier are left out.
+    """
+    return and_(
+        reminder_due_date >= max(since + timedelta(days=days_before), today + timedelta(days=1)),
+        reminder_due_date < today + timedelta(days=days_before + 1)
+    )
+
+
+def build_due_reminders_query(today: date, since: Optional[date] = None, shard: Optional[ReminderShard] = None):
+    """
+    Build the query selecting every unsent reminder due in a run, across all reminder types
+    
+    A reminder of type T is due when its vaccination falls exactly REMINDER_DAYS[T]
+    days from a run day, for each day from `since` to `today`. Each row carries what
+    is needed to send it: the parent's email (auth.users), mobile and the baby/parent
+    names (user_profiles).
     
     Args:
-        db: Database session
-        target_due_date: The date vaccinations are due
-        reminder_type: Type of reminder (30_days, 15_days, etc.)
+        today: The date the job runs for
+        since: First day to cover, for catching up on missed runs (defaults to today)
+        shard: Restrict the rows to one shard's users
         
     Returns:
-        List of VaccinationReminder objects ready to be sent
+        Select statement yielding due reminder rows
     """
-    try:
-        # Query for reminders that need to be sent
-        query = (
-            select(VaccinationReminder)
-            .join(VaccinationRecord)
-            .join(Users)
-            .options(
-                selectinload(VaccinationReminder.vaccination_record),
-                selectinload(VaccinationReminder.user)
+    since = min(since or today, today)
+    if REMINDER_MATERIALIZATION == "lazy":
+        query, user_id_column = build_derived_reminders_query(today, since), VaccinationRecord.user_id
+    else:
+        query, user_id_column = build_materialized_reminders_query(today, since), VaccinationReminder.user_id
+    if shard is not None and shard.count > 1:
+        query = query.where(user_shard_expr(user_id_column, shard.count) == shard.index)
+    return query
+
+
+def build_materialized_reminders_query(today: date, since: date):
+    """
+    Due reminders from pre-created VaccinationReminder rows (eager mode)
+    
+    The windows are matched on the reminder's own due_date so the partial index
+    idx_vaccination_reminders_unsent_type_due serves the scan.
+    """
+    due_windows = [
+        and_(
+            VaccinationReminder.reminder_type == reminder_type,
+            reminder_due_window(VaccinationReminder.due_date, days_before, today, since)
+        )
+        for reminder_type, days_before in REMINDER_DAYS.items()
+    ]
+    
+    return (
+        select(
+            VaccinationReminder.id,
+            VaccinationReminder.vaccination_record_id,
+            VaccinationReminder.user_id,
+            VaccinationReminder.vaccine_name,
+            VaccinationReminder.reminder_type,
+            VaccinationRecord.due_date,
+            func.coalesce(Users.email, UserProfile.parent_email).label("email"),
+            UserProfile.parent_mobile.label("mobile"),
+            UserProfile.baby_name,
+            UserProfile.parent_name,
+            literal(True).label("materialized")
+        )
+        .join(VaccinationRecord, VaccinationReminder.vaccination_record_id == VaccinationRecord.id)
+        .join(Users, Users.id == VaccinationReminder.user_id)
+        .join(UserProfile, UserProfile.user_id == VaccinationReminder.user_id)
+        .where(
+            and_(
+                # Not sent yet
+                VaccinationReminder.email_sent == False,
+                VaccinationReminder.sms_sent == False,
+                # Vaccination not completed yet
+                VaccinationRecord.is_administered == False,
+                # Due date matches one of the reminder types
+                or_(*due_windows)
             )
-            .where(
-                and_(
-                    # Not sent yet
-                    VaccinationReminder.email_sent == False,
-                    VaccinationReminder.sms_sent == False,
-                    # Correct reminder type
-                    VaccinationReminder.reminder_type == reminder_type,
-                    # Due date matches
-                    VaccinationRecord.due_date >= target_due_date,
-                    VaccinationRecord.due_date < target_due_date + timedelta(days=1),
-                    # Vaccination not completed yet
-                    VaccinationRecord.is_administered == False
-                )
+        )
+        # Digest order: rows for one baby, due date and reminder type are adjacent
+        .order_by(VaccinationReminder.user_id, VaccinationRecord.due_date, VaccinationReminder.reminder_type, VaccinationReminder.created_at)
+    )
+
+
+def build_derived_reminders_query(today: date, since: date):
+    """
+    Due reminders derived from vaccination_records (lazy mode)
+    
+    The reminder windows are disjoint, so a pending record matches at most one
+    reminder type on a given day; it is due unless a sent-log row for that record
+    and type already exists. The scan is served by the partial index
+    idx_vaccination_records_pending_due.
+    """
+    windows = [
+        (reminder_type, reminder_due_window(VaccinationRecord.due_date, days_before, today, since))
+        for reminder_type, days_before in REMINDER_DAYS.items()
+    ]
+    derived_type = case(
+        *((window, reminder_type.name) for reminder_type, window in windows)
+    )
+    not_yet_sent = [
+        and_(
+            window,
+            ~exists().where(
+                VaccinationReminder.vaccination_record_id == VaccinationRecord.id,
+                VaccinationReminder.reminder_type == reminder_type,
+                or_(VaccinationReminder.email_sent, VaccinationReminder.sms_sent)
             )
-            .order_by(VaccinationReminder.created_at)
         )
+        for reminder_type, window in windows
+    ]
+    
+    return (
+        select(
+            func.gen_random_uuid().label("id"),
+            VaccinationRecord.id.label("vaccination_record_id"),
+            VaccinationRecord.user_id,
+            func.concat(VaccineTemplate.vaccine_name, " (Dose ", VaccinationRecord.dose_number, ")").label("vaccine_name"),
+            type_coerce(derived_type, VaccinationReminder.reminder_type.type).label("reminder_type"),
+            VaccinationRecord.due_date,
+            func.coalesce(Users.email, UserProfile.parent_email).label("email"),
+            UserProfile.parent_mobile.label("mobile"),
+            UserProfile.baby_name,
+            UserProfile.parent_name,
+            literal(False).label("materialized")
+        )
+        .join(VaccineTemplate, VaccineTemplate.id == VaccinationRecord.vaccine_template_id)
+        .join(Users, Users.id == VaccinationRecord.user_id)
+        .join(UserProfile, UserProfile.user_id == VaccinationRecord.user_id)
+        .where(
+            VaccinationRecord.is_administered == False,
+            or_(*not_yet_sent)
+        )
+        # Digest order: rows for one baby and due date are adjacent (the type follows from the date)
+        .order_by(VaccinationRecord.user_id, VaccinationRecord.due_date, VaccinationRecord.id)
+    )
+
+
+def digest_key(reminder: Row) -> Tuple[Any, ...]:
+    """Reminders sharing this key are sent as one digest message"""
+    if not REMINDER_DIGEST_ENABLED:
+        return (reminder.id,)
+    due_date = reminder.due_date.date() if isinstance(reminder.due_date, datetime) else reminder.due_date
+    return (reminder.user_id, due_date, reminder.reminder_type)
+
+
+async def iter_reminder_groups(stream, batch_size: int) -> AsyncIterator[List[List[Row]]]:
+    """
+    Group consecutive rows of a reminder stream into digests, batch_size digests at a time
+    
+    The due-reminder queries order rows by the digest key, so a digest is complete as
+    soon as a row with a different key arrives; digests never straddle two batches.
+    """
+    groups: List[List[Row]] = []
+    current: List[Row] = []
+    current_key = None
+    
+    async for reminder in stream:
+        key = digest_key(reminder)
+        if current and key != current_key:
+            groups.append(current)
+            current = []
+            if len(groups) >= batch_size:
+                yield groups
+                groups = []
+        current.append(reminder)
+        current_key = key
+    
+    if current:
+        groups.append(current)
+    if groups:
+        yield groups
+
+
+async def send_reminder_batch_list(
+    status_writer: "ReminderStatusWriter", 
+    groups: Sequence[List[Row]]
+) -> Dict[ReminderType, int]:
+    """
+    Send a batch of reminder digests concurrently through the notification dispatcher,
+    or queue them in the notification outbox when REMINDER_DELIVERY_MODE is "outbox"
+    
+    Each digest is one email and one SMS covering every dose in it; all of its
+    reminders are marked sent together in the batch's single status write.
+    
+    Args:
+        status_writer: Collects delivery results; flushed once per batch
+        groups: Digests from iter_reminder_groups
         
-        result = await db.execute(query)
-        reminders = result.scalars().all()
-        
-        return list(reminders)
+    Returns:
+        Number of reminders sent successfully, by reminder type
+    """
+    if REMINDER_DELIVERY_MODE == "outbox":
+        return await queue_reminder_batch(status_writer, groups)
+    
+    sent_counts = {reminder_type: 0 for reminder_type in ReminderType}
+    
+    deliveries = await asyncio.gather(
+        *(send_reminder_digest(group) for group in groups),
+        return_exceptions=True
+    )
+    
+    for group, delivery in zip(groups, deliveries):
+        contact = group[0]
+        if isinstance(delivery, Exception):
+            logger.error(f"Failed to send reminder digest for user {contact.user_id}: {str(delivery)}")
+            status_writer.failures += len(group)
+            continue
         
-    except Exception as e:
-        logger.error(f"Error getting pending reminders: {str(e)}")
-        return []
+        email_sent, sms_sent = delivery
+        if email_sent or sms_sent:
+            for reminder in group:
+                status_writer.add_result(reminder, email_sent, sms_sent)
+            sent_counts[contact.reminder_type] += len(group)
+        elif contact.email or contact.mobile:
+            status_writer.failures += len(group)
+    
+    # One statement and one commit for the whole batch
+    await status_writer.flush()
+    
+    reminder_count = sum(len(group) for group in groups)
+    logger.info(f"📊 Batch processing complete: {sum(sent_counts.values())}/{reminder_count} reminders sent in {len(groups)} digests")
+    return sent_counts
 
 
-async def send_reminder_batch_list(
-    db: AsyncSession, 
-    reminders: List[VaccinationReminder], 
-    reminder_type: ReminderType
-) -> int:
+async def queue_reminder_batch(
+    status_writer: "ReminderStatusWriter",
+    groups: Sequence[List[Row]]
+) -> Dict[ReminderType, int]:
     """
-    Send a list of reminders in batches
+    Queue a batch of reminder digests in the notification outbox
     
     Args:
-        db: Database session
-        reminders: List of reminders to send
-        reminder_type: Type of reminder
+        status_writer: Marks the reminders sent in the same transaction as the enqueue
+        groups: Digests from iter_reminder_groups
         
     Returns:
-        Number of reminders sent successfully
+        Number of reminders queued, by reminder type
     """
-    sent_count = 0
+    queued_counts = {reminder_type: 0 for reminder_type in ReminderType}
+    messages = []
+    queued_groups = []
     
-    # Process in batches
-    for i in range(0, len(reminders), BATCH_SIZE):
-        batch = reminders[i:i + BATCH_SIZE]
+    for group in groups:
+        contact = group[0]
+        reminder_args = reminder_template_args(group)
         
-        logger.info(f"📤 Processing batch {i//BATCH_SIZE + 1} with {len(batch)} reminders")
+        if contact.email:
+            subject, html_content = render_reminder_email(*reminder_args)
+            messages.append(build_outbox_message(
+                NotificationChannel.EMAIL,
+                contact.email,
+                html_content,
+                subject=subject,
+                dedupe_key=digest_dedupe_key(group, "email"),
+                priority=REMINDER_PRIORITIES[contact.reminder_type]
+            ))
         
-        for reminder in batch:
-            try:
-                success = await send_single_reminder(db, reminder, reminder_type)
-                if success:
-                    sent_count += 1
-                    
-            except Exception as e:
-                logger.error(f"Failed to send reminder {reminder.id}: {str(e)}")
-                
-            # Rate limiting delay
-            await asyncio.sleep(DELAY_BETWEEN_SENDS)
+        if contact.mobile:
+            messages.append(build_outbox_message(
+                NotificationChannel.SMS,
+                contact.mobile,
+                render_reminder_sms(*reminder_args),
+                dedupe_key=digest_dedupe_key(group, "sms"),
+                priority=REMINDER_PRIORITIES[contact.reminder_type]
+            ))
         
-        # Delay between batches
-        if i + BATCH_SIZE < len(reminders):
-            await asyncio.sleep(DELAY_BETWEEN_BATCHES)
+        if contact.email or contact.mobile:
+            for reminder in group:
+                status_writer.add_result(reminder, bool(contact.email), bool(contact.mobile))
+            queued_groups.append(group)
+        else:
+            logger.warning(f"⚠️ No contact details for reminders of user {contact.user_id}")
+    
+    if not await status_writer.flush_with_messages(messages):
+        return queued_counts
     
-    logger.info(f"📊 Batch processing complete: {sent_count}/{len(reminders)} reminders sent")
-    return sent_count
+    for group in queued_groups:
+        queued_counts[group[0].reminder_type] += len(group)
+    
+    reminder_count = sum(len(group) for group in queued_groups)
+    logger.info(f"📬 Queued {reminder_count} reminders as {len(queued_groups)} digests ({len(messages)} messages)")
+    return queued_counts
 
 
-async def send_single_reminder(
-    db: AsyncSession, 
-    reminder: VaccinationReminder, 
-    reminder_type: ReminderType
-) -> bool:
+def digest_dedupe_key(group: Sequence[Row], channel: str) -> str:
+    """
+    Outbox idempotency key for one channel of a digest
+    
+    A single reminder keeps its own key. A digest's key is derived from all of its
+    members, so a dose added to the same day later is not mistaken for a duplicate.
+    """
+    if len(group) == 1:
+        return reminder_dedupe_key(group[0], channel)
+    members = sorted(reminder_dedupe_key(reminder, channel) for reminder in group)
+    return f"reminder-digest:{hashlib.sha256('|'.join(members).encode()).hexdigest()}:{channel}"
+
+
+def format_vaccine_list(vaccine_names: Sequence[str]) -> str:
+    """'A', 'A and B', 'A, B and C'"""
+    if len(vaccine_names) == 1:
+        return vaccine_names[0]
+    return f"{', '.join(vaccine_names[:-1])} and {vaccine_names[-1]}"
+
+
+def reminder_template_args(group: Sequence[Row]) -> Tuple[str, str, str, str, int, ReminderType]:
+    """Template arguments (baby, parent, vaccines, due date, days remaining, type) for a digest"""
+    reminder = group[0]
+    return (
+        reminder.baby_name or "your child",
+        reminder.parent_name or "Parent",
+        format_vaccine_list([member.vaccine_name for member in group]),
+        reminder.due_date.strftime("%B %d, %Y"),
+        days_until_due(reminder),
+        reminder.reminder_type
+    )
+
+
+def days_until_due(reminder: Row) -> int:
+    """Days from today to the vaccination; differs from REMINDER_DAYS when catching up"""
+    due_date = reminder.due_date.date() if isinstance(reminder.due_date, datetime) else reminder.due_date
+    return max((due_date - date.today()).days, 1)
+
+
+async def send_reminder_digest(group: Sequence[Row]) -> Tuple[bool, bool]:
     """
-    Send a single vaccination reminder via email and SMS
+    Send one vaccination reminder email and SMS covering every dose in a digest
     
     Args:
-        db: Database session
-        reminder: The reminder to send
-        reminder_type: Type of reminder
+        group: Reminders for the same baby, due date and reminder type
         
     Returns:
-        True if at least one notification was sent successfully
+        Tuple of (email_sent, sms_sent)
     """
+    contact = group[0]
     try:
-        # Get user profile for parent info
-        user_profile_query = select(UserProfile).where(UserProfile.user_id == reminder.user_id)
-        user_profile_result = await db.execute(user_profile_query)
-        user_profile = user_profile_result.scalar_one_or_none()
+        baby_name, parent_name, vaccine_names, due_date, days_remaining, reminder_type = reminder_template_args(group)
         
-        if not user_profile:
-            logger.warning(f"User profile not found for reminder {reminder.id}")
-            return False
-        
-        # Extract information
-        baby_name = user_profile.first_name or "your child"
-        parent_name = user_profile.guardian_name or "Parent"
-        vaccine_name = reminder.vaccine_name
-        due_date = reminder.due_date.strftime("%B %d, %Y")
-        days_remaining = REMINDER_DAYS[reminder_type]
+        email_task = None
+        sms_task = None
         
-        email_sent = False
-        sms_sent = False
-        
-        # Send Email
-        if reminder.user.email:
-            email_sent = await send_reminder_email(
-                reminder.user.email, 
+        # Email and SMS go through separate rate limits, so send them side by side
+        if contact.email:
+            email_task = send_reminder_email(
+                contact.email, 
                 baby_name, 
                 parent_name, 
-                vaccine_name, 
+                vaccine_names, 
                 due_date, 
                 days_remaining, 
                 reminder_type
             )
         
-        # Send SMS
-        if user_profile.mobile:
-            sms_sent = await send_reminder_sms(
-                user_profile.mobile, 
+        if contact.mobile:
+            sms_task = send_reminder_sms(
+                contact.mobile, 
                 baby_name, 
                 parent_name, 
-                vaccine_name, 
+                vaccine_names, 
                 due_date, 
                 days_remaining, 
                 reminder_type
             )
         
-        # Update reminder status
+        email_sent, sms_sent = await asyncio.gather(
+            email_task or _not_sent(),
+            sms_task or _not_sent()
+        )
+        
         if email_sent or sms_sent:
-            await update_reminder_status(db, reminder, email_sent, sms_sent)
-            logger.info(f"✅ Reminder sent for {baby_name} - {vaccine_name} (Email: {email_sent}, SMS: {sms_sent})")
-            return True
+            logger.info(f"✅ Reminder sent for {baby_name} - {vaccine_names} (Email: {email_sent}, SMS: {sms_sent})")
         else:
-            logger.warning(f"⚠️ No notifications sent for reminder {reminder.id}")
-            return False
+            logger.warning(f"⚠️ No notifications sent for reminders of user {contact.user_id}")
+        
+        return email_sent, sms_sent
             
     except Exception as e:
-        logger.error(f"Error sending reminder {reminder.id}: {str(e)}")
-        return False
+        logger.error(f"Error sending reminders for user {contact.user_id}: {str(e)}")
+        return False, False
+
+
+async def _not_sent() -> bool:
+    return False
 
 
 async def send_reminder_email(
@@ -276,20 +882,39 @@ async def send_reminder_email(
 ) -> bool:
     """Send vaccination reminder email"""
     try:
-        template = REMINDER_TEMPLATES[reminder_type]
-        subject = f"{template['email_subject']} - {baby_name}"
-        
-        # Determine urgency styling
-        urgency_colors = {
-            'upcoming': '#2c5aa0',
-            'important': '#fd7e14', 
-            'urgent': '#dc3545',
-            'critical': '#dc3545'
-        }
-        
-        urgency_color = urgency_colors.get(template['urgency'], '#2c5aa0')
+        subject, html_content = render_reminder_email(
+            baby_name, parent_name, vaccine_name, due_date, days_remaining, reminder_type
+        )
+        return await notification_dispatcher.send_email(email, subject, html_content)
         
-        html_content = f"""
+    except Exception as e:
+        logger.error(f"Error sending reminder email to {email}: {str(e)}")
+        return False
+
+
+def render_reminder_email(
+    baby_name: str, 
+    parent_name: str, 
+    vaccine_name: str, 
+    due_date: str, 
+    days_remaining: int, 
+    reminder_type: ReminderType
+) -> Tuple[str, str]:
+    """Render the subject and HTML body of a vaccination reminder email"""
+    template = REMINDER_TEMPLATES[reminder_type]
+    subject = f"{template['email_subject']} - {baby_name}"
+    
+    # Determine urgency styling
+    urgency_colors = {
+        'upcoming': '#2c5aa0',
+        'important': '#fd7e14', 
+        'urgent': '#dc3545',
+        'critical': '#dc3545'
+    }
+    
+    urgency_color = urgency_colors.get(template['urgency'], '#2c5aa0')
+    
+    html_content = f"""
         <html>
             <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
                 <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
@@ -322,12 +947,8 @@ async def send_reminder_email(
             </body>
         </html>
         """
-        
-        return smtp_service.send_html_email(email, subject, html_content)
-        
-    except Exception as e:
-        logger.error(f"Error sending reminder email to {email}: {str(e)}")
-        return False
+    
+    return subject, html_content
 
 
 async def send_reminder_sms(
@@ -341,46 +962,32 @@ async def send_reminder_sms(
 ) -> bool:
     """Send vaccination reminder SMS"""
     try:
-        template = REMINDER_TEMPLATES[reminder_type]
-        
-        message = (
-            f"{template['sms_prefix']} {baby_name} needs {vaccine_name} vaccination "
-            f"in {days_remaining} day{'s' if days_remaining != 1 else ''} ({due_date}). "
-            f"Please schedule appointment. -SureShot"
+        message = render_reminder_sms(
+            baby_name, parent_name, vaccine_name, due_date, days_remaining, reminder_type
         )
-        
-        return twilio_service.send_sms(phone, message)
+        return await notification_dispatcher.send_sms(phone, message)
         
     except Exception as e:
         logger.error(f"Error sending reminder SMS to {phone}: {str(e)}")
         return False
 
 
-async def update_reminder_status(
-    db: AsyncSession, 
-    reminder: VaccinationReminder, 
-    email_sent: bool, 
-    sms_sent: bool
-) -> None:
-    """Update the reminder status in database"""
-    try:
-        now = datetime.utcnow()
-        
-        if email_sent:
-            reminder.email_sent = True
-            reminder.email_sent_at = now
-            
-        if sms_sent:
-            reminder.sms_sent = True
-            reminder.sms_sent_at = now
-            
-        reminder.updated_at = now
-        
-        await db.commit()
-        
-    except Exception as e:
-        logger.error(f"Error updating reminder status for {reminder.id}: {str(e)}")
-        await db.rollback()
+def render_reminder_sms(
+    baby_name: str, 
+    parent_name: str, 
+    vaccine_name: str, 
+    due_date: str, 
+    days_remaining: int, 
+    reminder_type: ReminderType
+) -> str:
+    """Render the text of a vaccination reminder SMS"""
+    template = REMINDER_TEMPLATES[reminder_type]
+    
+    return (
+        f"{template['sms_prefix']} {baby_name} needs {vaccine_name} vaccination "
+        f"in {days_remaining} day{'s' if days_remaining != 1 else ''} ({due_date}). "
+        f"Please schedule appointment. -SureShot"
+    )
 
 
 async def create_reminders_for_vaccination_record(
@@ -0,0 +1,202 @@
+import os
+import uuid
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import BackgroundJob, UserProfile, VaccinationRecord, VaccinationReminder, ReminderType
+from utils.jobs import mark_job_running, update_job_progress, finish_job
+from utils.vaccine_catalog import vaccine_catalog
+from utils.schedule_engine import get_schedule_engine
+from utils.reminder_service import REMINDER_MATERIALIZATION
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_BACKFILL_JOB = "schedule_backfill"
+
+# Profiles per transaction; a chunk's records and reminders commit together with the job cursor
+SCHEDULE_BACKFILL_CHUNK_SIZE = int(os.getenv("SCHEDULE_BACKFILL_CHUNK_SIZE", "500"))
+# Rows per INSERT statement, keeping each under asyncpg's 32767 bind parameter limit
+INSERT_BATCH_ROWS = 2000
+
+
+async def insert_schedule_chunk(
+    db: AsyncSession,
+    records: List[Dict[str, Any]],
+    templates_by_id
+) -> Tuple[int, int]:
+    """
+    Insert records and their reminders with multi-row INSERTs (the caller commits)
+
+    Records that already exist are skipped by the unique (user, vaccine, dose)
+    constraint; reminders are built only for the records actually inserted, so
+    re-running a chunk is harmless. In lazy reminder mode no reminder rows are written.
+
+    Returns:
+        Tuple of (records inserted, reminders inserted)
+    """
+    inserted = []
+    for start in range(0, len(records), INSERT_BATCH_ROWS):
+        result = await db.execute(
+            insert(VaccinationRecord)
+            .values(records[start:start + INSERT_BATCH_ROWS])
+            .on_conflict_do_nothing(constraint="unique_user_vaccine_dose")
+            .returning(
+                VaccinationRecord.id,
+                VaccinationRecord.user_id,
+                VaccinationRecord.vaccine_template_id,
+                VaccinationRecord.dose_number,
+                VaccinationRecord.due_date
+            )
+        )
+        inserted.extend(result.all())
+
+    if REMINDER_MATERIALIZATION == "lazy":
+        return len(inserted), 0
+
+    reminders = [
+        {
+            "id": uuid.uuid4(),
+            "vaccination_record_id": record_id,
+            "user_id": user_id,
+            "vaccine_name": f"{templates_by_id[template_id].vaccine_name} (Dose {dose_number})",
+            "due_date": due_date,
+            "reminder_type": reminder_type,
+            "email_sent": False,
+            "sms_sent": False
+        }
+        for record_id, user_id, template_id, dose_number, due_date in inserted
+        for reminder_type in ReminderType
+    ]
+    for start in range(0, len(reminders), INSERT_BATCH_ROWS):
+        await db.execute(
+            insert(VaccinationReminder)
+            .values(reminders[start:start + INSERT_BATCH_ROWS])
+            .on_conflict_do_nothing(constraint="unique_vaccination_reminder")
+        )
+
+    return len(inserted), len(reminders)
+
+
+async def run_schedule_backfill(
+    job_id: uuid.UUID,
+    chunk_size: int = SCHEDULE_BACKFILL_CHUNK_SIZE,
+    session_factory=None
+):
+    """
+    Generate missing vaccination schedules for every profile with a birth date
+
+    Profiles are streamed in user_id order, chunk_size at a time. Each chunk's
+    inserts commit together with the job's counters and cursor (the last user_id
+    done), so a failed or interrupted job resumes from where it stopped when run
+    again with the same job id.
+
+    Args:
+        job_id: BackgroundJob tracking this run
+        chunk_size: Profiles per chunk
+        session_factory: Session factory to use (defaults to AsyncSessionLocal)
+    """
+    if session_factory is None:
+        from config import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+
+    async with session_factory() as db:
+        try:
+            job = (await db.execute(
+                select(BackgroundJob).where(BackgroundJob.id == job_id)
+            )).scalar_one()
+            counters = {
+                "users_processed": 0,
+                "records_created": 0,
+                "reminders_created": 0,
+                **(job.counters or {})
+            }
+            after_user_id = (job.cursor or {}).get("after_user_id")
+            after_user_id = uuid.UUID(after_user_id) if after_user_id else None
+
+            await mark_job_running(db, job_id)
+
+            catalog = await vaccine_catalog.get(db)
+            if not catalog.templates:
+                raise RuntimeError("No vaccine templates found in database")
+            engine = get_schedule_engine(catalog)
+
+            if after_user_id:
+                logger.info(f"🔁 Resuming schedule backfill {job_id} after user {after_user_id}")
+
+            while True:
+                query = (
+                    select(UserProfile.user_id, UserProfile.baby_date_of_birth)
+                    .where(UserProfile.baby_date_of_birth.isnot(None))
+                    .order_by(UserProfile.user_id)
+                    .limit(chunk_size)
+                )
+                if after_user_id:
+                    query = query.where(UserProfile.user_id > after_user_id)
+                profiles = (await db.execute(query)).all()
+                if not profiles:
+                    break
+
+                # Due dates for the whole chunk in one vectorized pass
+                records = engine.record_rows(
+                    [profile.user_id for profile in profiles],
+                    [profile.baby_date_of_birth for profile in profiles],
+                    notes="Auto-generated vaccination schedule"
+                )
+                records_created, reminders_created = await insert_schedule_chunk(db, records, catalog.by_id)
+
+                after_user_id = profiles[-1].user_id
+                counters["users_processed"] += len(profiles)
+                counters["records_created"] += records_created
+                counters["reminders_created"] += reminders_created
+
+                # Commits the chunk's inserts together with the progress that covers them
+                await update_job_progress(
+                    db,
+                    job_id,
+                    counters=counters,
+                    cursor={"after_user_id": str(after_user_id)}
+                )
+                logger.info(
+                    f"📅 Schedule backfill {job_id}: {counters['users_processed']} users, "
+                    f"{counters['records_created']} records, {counters['reminders_created']} reminders"
+                )
+
+            await finish_job(db, job_id)
+            logger.info(f"✅ Schedule backfill {job_id} finished: {counters}")
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"❌ Schedule backfill {job_id} failed: {str(e)}")
+            await finish_job(db, job_id, error=str(e))
+
+
+async def get_schedule_backfill_progress(db: AsyncSession, job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    """
+    Read a backfill job's progress
+
+    Returns:
+        Progress dict, or None if the job does not exist
+    """
+    job = (await db.execute(
+        select(BackgroundJob).where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.job_type == SCHEDULE_BACKFILL_JOB
+        )
+    )).scalar_one_or_none()
+    if job is None:
+        return None
+
+    counters = job.counters or {}
+    return {
+        "job_id": str(job.id),
+        "status": job.status.value,
+        "users_processed": counters.get("users_processed", 0),
+        "records_created": counters.get("records_created", 0),
+        "reminders_created": counters.get("reminders_created", 0),
+        "resume_after_user_id": (job.cursor or {}).get("after_user_id"),
+        "error": job.error,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
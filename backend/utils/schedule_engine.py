@@ -0,0 +1,157 @@
+import uuid
+from datetime import date, datetime, time, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from utils.vaccine_catalog import VaccineCatalogSnapshot, CachedVaccineTemplate
+
+
+class ScheduleBatch(NamedTuple):
+    """
+    Due dates for a batch of babies, flattened to one entry per (baby, dose)
+
+    baby_index points into the birth dates passed to the engine and dose_index
+    into ScheduleEngine.doses; due holds UTC datetime64[us] values.
+    """
+    baby_index: np.ndarray
+    dose_index: np.ndarray
+    due: np.ndarray
+
+
+def to_datetime64(values: Iterable[Any]) -> np.ndarray:
+    """Convert dates or (aware) datetimes to naive UTC datetime64[us]"""
+    converted = []
+    for value in values:
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, time(), timezone.utc)
+        elif value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        converted.append(value.replace(tzinfo=None))
+    return np.array(converted, dtype="datetime64[us]")
+
+
+def to_datetimes(values: np.ndarray) -> List[datetime]:
+    """Convert UTC datetime64 values back to aware datetimes for the database"""
+    return [value.replace(tzinfo=timezone.utc) for value in values.astype("datetime64[us]").tolist()]
+
+
+class ScheduleEngine:
+    """
+    Vectorized due-date computation over the vaccine schedule
+
+    The catalog is flattened once into a dose table: one row per (template, dose
+    number) with its offset in days from birth,
+    recommended_age_days + (dose_number - 1) * dose_interval_days. Due dates for
+    any number of babies are then a single broadcast addition of birth dates
+    against the offsets instead of nested Python loops.
+    """
+
+    def __init__(self, catalog: VaccineCatalogSnapshot):
+        self.catalog = catalog
+        self.doses: Tuple[Tuple[CachedVaccineTemplate, int], ...] = tuple(
+            (template, dose_number)
+            for template in catalog.templates
+            for dose_number in range(1, template.total_doses + 1)
+        )
+        self.template_ids: List[uuid.UUID] = [template.id for template, _ in self.doses]
+        self.dose_numbers = np.array([dose_number for _, dose_number in self.doses], dtype=np.int16)
+        self.offsets = np.array(
+            [
+                template.recommended_age_days + (dose_number - 1) * template.dose_interval_days
+                for template, dose_number in self.doses
+            ],
+            dtype="timedelta64[D]"
+        )
+
+    def __len__(self) -> int:
+        return len(self.doses)
+
+    def due_matrix(self, birth_dates: Sequence[Any]) -> np.ndarray:
+        """
+        Due dates for every baby and dose
+
+        Args:
+            birth_dates: One birth date (date or datetime) per baby
+
+        Returns:
+            datetime64[us] array of shape (len(birth_dates), len(self.doses))
+        """
+        births = to_datetime64(birth_dates)
+        return births[:, np.newaxis] + self.offsets[np.newaxis, :]
+
+    def schedule(self, birth_dates: Sequence[Any]) -> ScheduleBatch:
+        """Flattened (baby, dose, due) arrays for a batch of babies"""
+        due = self.due_matrix(birth_dates)
+        babies, doses = due.shape
+        return ScheduleBatch(
+            baby_index=np.repeat(np.arange(babies, dtype=np.int32), doses),
+            dose_index=np.tile(np.arange(doses, dtype=np.int32), babies),
+            due=due.ravel()
+        )
+
+    def schedule_for(self, birth_date: Any) -> List[Tuple[CachedVaccineTemplate, int, datetime]]:
+        """One baby's schedule as (template, dose_number, due_date) tuples"""
+        due_dates = to_datetimes(self.due_matrix([birth_date])[0])
+        return [(template, dose_number, due) for (template, dose_number), due in zip(self.doses, due_dates)]
+
+    def record_rows(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        birth_dates: Sequence[Any],
+        notes: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        vaccination_records rows for a batch of babies, ids assigned
+
+        Args:
+            user_ids: One user id per baby
+            birth_dates: Matching birth dates
+            notes: Notes stored on every record
+
+        Returns:
+            Row dicts in (baby, dose) order
+        """
+        batch = self.schedule(birth_dates)
+        due_dates = to_datetimes(batch.due)
+        dose_numbers = self.dose_numbers.tolist()
+        return [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_ids[baby],
+                "vaccine_template_id": self.template_ids[dose],
+                "dose_number": dose_numbers[dose],
+                "due_date": due,
+                "is_administered": False,
+                "notes": notes
+            }
+            for baby, dose, due in zip(batch.baby_index.tolist(), batch.dose_index.tolist(), due_dates)
+        ]
+
+    def due_counts_by_day(self, birth_dates: Sequence[Any], start: date, end: date) -> Dict[date, int]:
+        """
+        Forecast how many doses fall due on each day of [start, end)
+
+        Args:
+            birth_dates: Birth dates of the babies to forecast for
+            start: First day (inclusive)
+            end: Last day (exclusive)
+
+        Returns:
+            Dict of day -> number of doses due, days without doses omitted
+        """
+        if not len(birth_dates):
+            return {}
+        days = self.due_matrix(birth_dates).astype("datetime64[D]").ravel()
+        days = days[(days >= np.datetime64(start, "D")) & (days < np.datetime64(end, "D"))]
+        unique_days, counts = np.unique(days, return_counts=True)
+        return dict(zip(unique_days.tolist(), counts.tolist()))
+
+
+_engine: Optional[ScheduleEngine] = None
+
+
+def get_schedule_engine(catalog: VaccineCatalogSnapshot) -> ScheduleEngine:
+    """Engine for a catalog snapshot, rebuilt only when the snapshot changes"""
+    global _engine
+    if _engine is None or _engine.catalog is not catalog:
+        _engine = ScheduleEngine(catalog)
+    return _engine
@@ -5,11 +5,173 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 import os
-from typing import Optional, List
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Optional, List, Dict, Any, Iterator
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Connection pool settings
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_MAX_MESSAGES_PER_SESSION = int(os.getenv("SMTP_MAX_MESSAGES_PER_SESSION", "100"))  # Gmail drops sessions after ~100 messages
+SMTP_IDLE_TIMEOUT = int(os.getenv("SMTP_IDLE_TIMEOUT", "240"))  # Close sessions idle longer than this (servers time out at ~5 minutes)
+SMTP_HEALTH_CHECK_AFTER = int(os.getenv("SMTP_HEALTH_CHECK_AFTER", "30"))  # NOOP sessions idle longer than this before reuse
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "30"))
+# smtplib is blocking; async callers run it on this many dedicated threads (one per pooled session)
+SMTP_THREADS = int(os.getenv("SMTP_THREADS", str(SMTP_POOL_SIZE)))
+
+# Errors after which the session can no longer be trusted and is replaced
+SMTP_CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+    ssl.SSLError
+)
+
+
+class PooledSMTPSession:
+    """An authenticated SMTP connection and its usage counters"""
+    
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+        self.broken = False
+    
+    def is_alive(self) -> bool:
+        """Check the connection with NOOP"""
+        try:
+            return self.server.noop()[0] == 250
+        except Exception:
+            return False
+    
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP sessions
+    
+    Sessions are reused across sends so the TCP/STARTTLS/LOGIN handshake happens once
+    per session instead of once per message. A session idle for a while is checked with
+    NOOP before reuse, a session that errors is discarded, and a session is retired after
+    max_messages so long runs stay under provider per-connection limits.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        max_size: int = SMTP_POOL_SIZE,
+        max_messages: int = SMTP_MAX_MESSAGES_PER_SESSION,
+        idle_timeout: int = SMTP_IDLE_TIMEOUT,
+        health_check_after: int = SMTP_HEALTH_CHECK_AFTER,
+        timeout: int = SMTP_TIMEOUT
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[PooledSMTPSession]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+    
+    def _connect(self) -> PooledSMTPSession:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.starttls(context=ssl.create_default_context())
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        logger.info(f"Opened SMTP session to {self.host}:{self.port}")
+        return PooledSMTPSession(server)
+    
+    def _checkout(self) -> PooledSMTPSession:
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            
+            idle_for = time.monotonic() - session.last_used
+            if idle_for > self.idle_timeout:
+                session.close()
+                continue
+            if idle_for > self.health_check_after and not session.is_alive():
+                session.close()
+                continue
+            return session
+    
+    def _checkin(self, session: PooledSMTPSession):
+        if session.broken or session.messages_sent >= self.max_messages:
+            session.close()
+        else:
+            session.last_used = time.monotonic()
+            self._idle.put(session)
+    
+    @contextmanager
+    def session(self) -> Iterator[PooledSMTPSession]:
+        """Borrow a session; blocks while max_size sessions are in use"""
+        self._slots.acquire()
+        try:
+            session = self._checkout()
+            try:
+                yield session
+            except SMTP_CONNECTION_ERRORS:
+                session.broken = True
+                raise
+            finally:
+                self._checkin(session)
+        finally:
+            self._slots.release()
+    
+    def send(self, from_addr: str, recipients: List[str], message: str):
+        """
+        Send one message, retrying once on a fresh session if the pooled one was dropped
+        
+        Raises:
+            smtplib.SMTPException or OSError if the message could not be sent
+        """
+        for attempt in range(2):
+            try:
+                with self.session() as session:
+                    session.server.sendmail(from_addr, recipients, message)
+                    session.messages_sent += 1
+                    return
+            except SMTP_CONNECTION_ERRORS:
+                if attempt == 1:
+                    raise
+                logger.warning("SMTP session dropped, retrying on a new connection")
+    
+    def close(self):
+        """Close all idle sessions"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
 class SMTPEmailService:
     """SMTP Email service using Gmail"""
     
@@ -23,6 +185,59 @@ class SMTPEmailService:
         
         if not self.smtp_username or not self.smtp_password:
             logger.warning("SMTP credentials not configured. Email service will not work.")
+        
+        self.pool = SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            self.smtp_username,
+            self.smtp_password
+        )
+        self.executor = ThreadPoolExecutor(max_workers=SMTP_THREADS, thread_name_prefix="smtp")
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking SMTP call on the dedicated executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+    
+    def _build_message(
+        self,
+        to_email: str,
+        subject: str,
+        message: str,
+        is_html: bool = False,
+        cc_emails: Optional[List[str]] = None,
+        attachments: Optional[List[str]] = None
+    ) -> MIMEMultipart:
+        """Build the MIME message for send_email/send_many"""
+        msg = MIMEMultipart()
+        msg['From'] = f"{self.sender_name} <{self.sender_email}>"
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        
+        if cc_emails:
+            msg['Cc'] = ', '.join(cc_emails)
+        
+        # Add body to email
+        if is_html:
+            msg.attach(MIMEText(message, 'html'))
+        else:
+            msg.attach(MIMEText(message, 'plain'))
+        
+        # Add attachments if any
+        if attachments:
+            for file_path in attachments:
+                if os.path.isfile(file_path):
+                    with open(file_path, "rb") as attachment:
+                        part = MIMEBase('application', 'octet-stream')
+                        part.set_payload(attachment.read())
+                        encoders.encode_base64(part)
+                        part.add_header(
+                            'Content-Disposition',
+                            f'attachment; filename= {os.path.basename(file_path)}'
+                        )
+                        msg.attach(part)
+        
+        return msg
     
     def send_email(
         self, 
@@ -55,49 +270,16 @@ class SMTPEmailService:
                 return False
             
             # Create message
-            msg = MIMEMultipart()
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            if cc_emails:
-                msg['Cc'] = ', '.join(cc_emails)
-            
-            # Add body to email
-            if is_html:
-                msg.attach(MIMEText(message, 'html'))
-            else:
-                msg.attach(MIMEText(message, 'plain'))
+            msg = self._build_message(to_email, subject, message, is_html, cc_emails, attachments)
             
-            # Add attachments if any
-            if attachments:
-                for file_path in attachments:
-                    if os.path.isfile(file_path):
-                        with open(file_path, "rb") as attachment:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(attachment.read())
-                            encoders.encode_base64(part)
-                            part.add_header(
-                                'Content-Disposition',
-                                f'attachment; filename= {os.path.basename(file_path)}'
-                            )
-                            msg.attach(part)
-            
-            # Create SMTP session
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()  # Secure the connection
-            server.login(self.smtp_username, self.smtp_password)
-            
-            # Send email
+            # Send email over a pooled session
             recipients = [to_email]
             if cc_emails:
                 recipients.extend(cc_emails)
             if bcc_emails:
                 recipients.extend(bcc_emails)
             
-            text = msg.as_string()
-            server.sendmail(self.sender_email, recipients, text)
-            server.quit()
+            self.pool.send(self.sender_email, recipients, msg.as_string())
             
             logger.info(f"Email sent successfully to {to_email}")
             return True
@@ -106,6 +288,60 @@ class SMTPEmailService:
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
+    def send_many(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Send many emails through one pooled session
+        
+        The session is replaced transparently when it is dropped or reaches the
+        per-session message limit; a message that fails on a healthy session is
+        reported as failed without affecting the rest.
+        
+        Args:
+            messages: Dicts with to_email, subject, message and optional is_html
+            
+        Returns:
+            List of bools, True where the message was sent, in input order
+        """
+        if not self.smtp_username or not self.smtp_password:
+            logger.error("SMTP credentials not configured")
+            return [False] * len(messages)
+        
+        results = [False] * len(messages)
+        position = 0
+        dropped = 0  # consecutive session failures on the current message
+        
+        while position < len(messages):
+            try:
+                with self.pool.session() as session:
+                    while position < len(messages) and session.messages_sent < self.pool.max_messages:
+                        item = messages[position]
+                        msg = self._build_message(
+                            item["to_email"],
+                            item["subject"],
+                            item["message"],
+                            item.get("is_html", False)
+                        )
+                        try:
+                            session.server.sendmail(self.sender_email, [item["to_email"]], msg.as_string())
+                            session.messages_sent += 1
+                            results[position] = True
+                        except SMTP_CONNECTION_ERRORS:
+                            raise
+                        except Exception as e:
+                            logger.error(f"Failed to send email to {item['to_email']}: {str(e)}")
+                        position += 1
+                        dropped = 0
+            except Exception as e:
+                # Retry the current message once on a fresh session, then give up on the batch
+                dropped += 1
+                if dropped > 1:
+                    logger.error(f"SMTP unavailable, {len(messages) - position} emails not sent: {str(e)}")
+                    break
+                logger.warning(f"SMTP session dropped during batch send, reconnecting: {str(e)}")
+        
+        logger.info(f"Batch email send complete: {sum(results)}/{len(messages)} sent")
+        return results
+    
     def send_html_email(
         self, 
         to_email: str, 
@@ -136,6 +372,28 @@ class SMTPEmailService:
             bcc_emails=bcc_emails
         )
     
+    async def send_html_email_async(
+        self, 
+        to_email: str, 
+        subject: str, 
+        html_content: str,
+        cc_emails: Optional[List[str]] = None,
+        bcc_emails: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Send HTML formatted email from async code
+        
+        Returns:
+            bool: True if email sent successfully, False otherwise
+        """
+        return await self._run_blocking(
+            self.send_html_email, to_email, subject, html_content, cc_emails, bcc_emails
+        )
+    
+    async def send_many_async(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        """Async variant of send_many"""
+        return await self._run_blocking(self.send_many, messages)
+    
     def send_vaccination_reminder(
         self, 
         to_email: str, 
@@ -189,6 +447,15 @@ class SMTPEmailService:
         """
         
         return self.send_html_email(to_email, subject, html_content)
+    
+    async def send_vaccination_reminder_async(self, *args, **kwargs) -> bool:
+        """Async variant of send_vaccination_reminder"""
+        return await self._run_blocking(self.send_vaccination_reminder, *args, **kwargs)
+    
+    def close(self):
+        """Close pooled sessions and stop the executor"""
+        self.pool.close()
+        self.executor.shutdown(wait=False)
 
 # Create a global instance
 smtp_service = SMTPEmailService()
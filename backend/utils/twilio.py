@@ -1,10 +1,74 @@
-from twilio.rest import Client
 import os
+import time
+import random
+import asyncio
+import httpx
 import logging
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Point at a local stub (python -m utils.twilio_stub) for load testing
+DEFAULT_TWILIO_API_BASE_URL = "https://api.twilio.com"
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", DEFAULT_TWILIO_API_BASE_URL).rstrip("/")
+# Fill in placeholder credentials for the stub; never inferred from the base URL, so a
+# proxy or regional endpoint still requires real credentials
+TWILIO_STUB_MODE = os.getenv("TWILIO_STUB_MODE", "false").lower() == "true"
+
+# HTTP client settings
+TWILIO_CONNECT_TIMEOUT = float(os.getenv("TWILIO_CONNECT_TIMEOUT", "5"))
+TWILIO_READ_TIMEOUT = float(os.getenv("TWILIO_READ_TIMEOUT", "10"))
+TWILIO_POOL_TIMEOUT = float(os.getenv("TWILIO_POOL_TIMEOUT", "10"))
+TWILIO_MAX_CONNECTIONS = int(os.getenv("TWILIO_MAX_CONNECTIONS", "20"))
+TWILIO_MAX_KEEPALIVE = int(os.getenv("TWILIO_MAX_KEEPALIVE", "10"))
+
+# Retry policy for throttled or unavailable responses
+TWILIO_MAX_RETRIES = int(os.getenv("TWILIO_MAX_RETRIES", "4"))
+TWILIO_BACKOFF_BASE = float(os.getenv("TWILIO_BACKOFF_BASE", "0.5"))
+TWILIO_BACKOFF_MAX = float(os.getenv("TWILIO_BACKOFF_MAX", "30"))
+# Twilio rejected these before creating a message. A 500/502/504 can arrive after the
+# message was accepted, and POSTs carry no idempotency key, so those are not retried.
+RETRYABLE_STATUS_CODES = {429, 503}
+
+# Failures where the request never reached Twilio, so retrying cannot send a duplicate SMS
+RETRYABLE_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (1-based)
+    
+    Honors a Retry-After header (seconds or HTTP date) when present, otherwise uses
+    exponential backoff with full jitter so throttled senders do not retry in lockstep.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), TWILIO_BACKOFF_MAX)
+        except ValueError:
+            try:
+                wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                return min(max(wait, 0.0), TWILIO_BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(TWILIO_BACKOFF_MAX, TWILIO_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def render_vaccination_reminder_sms(
+    baby_name: str, 
+    vaccination_name: str, 
+    due_date: str,
+    parent_name: str = "Parent"
+) -> str:
+    """Vaccination reminder SMS text, shared by the blocking and async senders"""
+    return (
+        f"Hi {parent_name}, this is a reminder that {baby_name} is due for "
+        f"{vaccination_name} vaccination on {due_date}. Please schedule an appointment "
+        f"with your healthcare provider. - SureShot"
+    )
+
+
 class TwilioSMSService:
     """Twilio SMS service for sending text messages"""
     
@@ -13,11 +77,77 @@ class TwilioSMSService:
         self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
         self.phone_number = os.getenv("TWILIO_PHONE_NUMBER")
         
-        if not all([self.account_sid, self.auth_token, self.phone_number]):
+        if TWILIO_STUB_MODE:
+            # The stub accepts any credentials
+            self.account_sid = self.account_sid or "ACstub"
+            self.auth_token = self.auth_token or "stub"
+            self.phone_number = self.phone_number or "+15005550006"
+            logger.warning(f"Twilio stub mode: SMS will be sent to {TWILIO_API_BASE_URL}")
+        
+        self.configured = all([self.account_sid, self.auth_token, self.phone_number])
+        if not self.configured:
             logger.warning("Twilio credentials not configured. SMS service will not work.")
-            self.client = None
-        else:
-            self.client = Client(self.account_sid, self.auth_token)
+        
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def messages_url(self) -> str:
+        return f"{TWILIO_API_BASE_URL}/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+    
+    def _client_options(self) -> dict:
+        return {
+            "auth": (self.account_sid, self.auth_token),
+            "timeout": httpx.Timeout(
+                TWILIO_READ_TIMEOUT,
+                connect=TWILIO_CONNECT_TIMEOUT,
+                pool=TWILIO_POOL_TIMEOUT
+            ),
+            "limits": httpx.Limits(
+                max_connections=TWILIO_MAX_CONNECTIONS,
+                max_keepalive_connections=TWILIO_MAX_KEEPALIVE
+            )
+        }
+    
+    def _get_client(self) -> httpx.Client:
+        """Shared keep-alive client for blocking callers, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(**self._client_options())
+        return self._client
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for async callers, created on first use"""
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(**self._client_options())
+        return self._async_client
+    
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
+    def _check_request(self, to_number: str) -> bool:
+        if not self.configured:
+            logger.error("Twilio client not configured")
+            return False
+        
+        # Ensure the phone number has proper format
+        if not to_number.startswith('+'):
+            logger.error(f"Phone number {to_number} must include country code (e.g., +91xxxxxxxxxx)")
+            return False
+        
+        return True
+    
+    def _handle_response(self, to_number: str, response: httpx.Response) -> bool:
+        if response.is_error:
+            logger.error(f"Failed to send SMS to {to_number}: HTTP {response.status_code} {response.text}")
+            return False
+        
+        logger.info(f"SMS sent successfully to {to_number}. Message SID: {response.json().get('sid')}")
+        return True
     
     def send_sms(self, to_number: str, message: str) -> bool:
         """
@@ -31,24 +161,67 @@ class TwilioSMSService:
             bool: True if SMS sent successfully, False otherwise
         """
         try:
-            if not self.client:
-                logger.error("Twilio client not configured")
+            if not self._check_request(to_number):
                 return False
             
-            # Ensure the phone number has proper format
-            if not to_number.startswith('+'):
-                logger.error(f"Phone number {to_number} must include country code (e.g., +91xxxxxxxxxx)")
+            data = {"Body": message, "From": self.phone_number, "To": to_number}
+            
+            for attempt in range(1, TWILIO_MAX_RETRIES + 2):
+                try:
+                    response = self._get_client().post(self.messages_url, data=data)
+                except RETRYABLE_TRANSPORT_ERRORS as e:
+                    if attempt > TWILIO_MAX_RETRIES:
+                        raise
+                    delay = retry_delay(attempt)
+                    logger.warning(f"Twilio connection failed ({str(e)}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt > TWILIO_MAX_RETRIES:
+                    return self._handle_response(to_number, response)
+                
+                delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"Twilio returned HTTP {response.status_code}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+            
+        except Exception as e:
+            logger.error(f"Failed to send SMS to {to_number}: {str(e)}")
+            return False
+    
+    async def send_sms_async(self, to_number: str, message: str) -> bool:
+        """
+        Send SMS from async code by calling the Twilio REST API directly
+        
+        Args:
+            to_number: Recipient phone number (with country code, e.g., +91xxxxxxxxxx)
+            message: SMS message content
+            
+        Returns:
+            bool: True if SMS sent successfully, False otherwise
+        """
+        try:
+            if not self._check_request(to_number):
                 return False
             
-            # Send SMS
-            message_obj = self.client.messages.create(
-                body=message,
-                from_=self.phone_number,
-                to=to_number
-            )
+            data = {"Body": message, "From": self.phone_number, "To": to_number}
             
-            logger.info(f"SMS sent successfully to {to_number}. Message SID: {message_obj.sid}")
-            return True
+            for attempt in range(1, TWILIO_MAX_RETRIES + 2):
+                try:
+                    response = await self._get_async_client().post(self.messages_url, data=data)
+                except RETRYABLE_TRANSPORT_ERRORS as e:
+                    if attempt > TWILIO_MAX_RETRIES:
+                        raise
+                    delay = retry_delay(attempt)
+                    logger.warning(f"Twilio connection failed ({str(e)}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt > TWILIO_MAX_RETRIES:
+                    return self._handle_response(to_number, response)
+                
+                delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"Twilio returned HTTP {response.status_code}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
             
         except Exception as e:
             logger.error(f"Failed to send SMS to {to_number}: {str(e)}")
@@ -75,14 +248,23 @@ class TwilioSMSService:
         Returns:
             bool: True if SMS sent successfully, False otherwise
         """
-        message = (
-            f"Hi {parent_name}, this is a reminder that {baby_name} is due for "
-            f"{vaccination_name} vaccination on {due_date}. Please schedule an appointment "
-            f"with your healthcare provider. - SureShot"
-        )
+        message = render_vaccination_reminder_sms(baby_name, vaccination_name, due_date, parent_name)
         
         return self.send_sms(to_number, message)
     
+    async def send_vaccination_reminder_sms_async(
+        self, 
+        to_number: str, 
+        baby_name: str, 
+        vaccination_name: str, 
+        due_date: str,
+        parent_name: str = "Parent"
+    ) -> bool:
+        """Async variant of send_vaccination_reminder_sms"""
+        message = render_vaccination_reminder_sms(baby_name, vaccination_name, due_date, parent_name)
+        
+        return await self.send_sms_async(to_number, message)
+    
     def send_vaccination_confirmation_sms(
         self, 
         to_number: str, 
@@ -0,0 +1,105 @@
+"""
+Local stand-in for the Twilio Messages API, for load testing SMS sending
+
+Run it and point the app at it:
+
+    python -m utils.twilio_stub --port 8099 --latency-ms 150 --throttle-rate 0.05
+    TWILIO_STUB_MODE=true TWILIO_API_BASE_URL=http://127.0.0.1:8099 uvicorn main:app
+
+Nothing is delivered. Responses mimic Twilio's shape, and throttling (429 with
+Retry-After) and server errors (503) can be injected to exercise the retry policy.
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from datetime import datetime, timezone
+from fastapi import FastAPI, Form
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(
+    latency_ms: float = 0,
+    error_rate: float = 0,
+    throttle_rate: float = 0,
+    retry_after: int = 1
+) -> FastAPI:
+    """
+    Build the stub application
+
+    Args:
+        latency_ms: Delay added to every response
+        error_rate: Fraction of requests answered with HTTP 503
+        throttle_rate: Fraction of requests answered with HTTP 429
+        retry_after: Retry-After seconds sent with 429 responses
+
+    Returns:
+        FastAPI app serving POST /2010-04-01/Accounts/{sid}/Messages.json
+    """
+    app = FastAPI(title="Twilio stub")
+    stats = {"accepted": 0, "throttled": 0, "failed": 0}
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+    async def create_message(
+        account_sid: str,
+        To: str = Form(...),
+        From: str = Form(...),
+        Body: str = Form(...)
+    ):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        roll = random.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"code": 20429, "message": "Too Many Requests", "status": 429},
+                headers={"Retry-After": str(retry_after)}
+            )
+        if roll < throttle_rate + error_rate:
+            stats["failed"] += 1
+            return JSONResponse(
+                status_code=503,
+                content={"code": 20503, "message": "Service Unavailable", "status": 503}
+            )
+
+        stats["accepted"] += 1
+        return JSONResponse(
+            status_code=201,
+            content={
+                "sid": f"SM{uuid.uuid4().hex}",
+                "account_sid": account_sid,
+                "to": To,
+                "from": From,
+                "body": Body,
+                "status": "queued",
+                "date_created": datetime.now(timezone.utc).isoformat()
+            }
+        )
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Twilio Messages API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_stub_app(args.latency_ms, args.error_rate, args.throttle_rate, args.retry_after),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+import uuid
+import logging
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional, Tuple
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import VaccineTemplate
+
+logger = logging.getLogger(__name__)
+
+# Within this window the catalog is served without touching the database; after it,
+# one cheap version query decides whether the templates need reloading
+VACCINE_CATALOG_TTL_SECONDS = int(os.getenv("VACCINE_CATALOG_TTL_SECONDS", "300"))
+
+
+class CachedVaccineTemplate(NamedTuple):
+    """Immutable copy of a VaccineTemplate row, safe to share across requests"""
+    id: uuid.UUID
+    vaccine_name: str
+    disease_prevented: str
+    recommended_age_days: int
+    total_doses: int
+    dose_interval_days: int
+    is_mandatory: bool
+    description: Optional[str]
+
+
+# md5 over every template row: changes whenever a template is added, removed or
+# edited, including edits made outside the ORM (None for an empty table)
+CatalogVersion = Optional[str]
+
+
+class VaccineCatalogSnapshot:
+    """One loaded version of the catalog; never mutated after construction"""
+
+    def __init__(self, templates: Iterable[CachedVaccineTemplate], version: CatalogVersion):
+        self.templates: Tuple[CachedVaccineTemplate, ...] = tuple(
+            sorted(templates, key=lambda template: (template.recommended_age_days, template.vaccine_name))
+        )
+        self.by_id: Mapping[uuid.UUID, CachedVaccineTemplate] = MappingProxyType(
+            {template.id: template for template in self.templates}
+        )
+        self.by_name: Mapping[str, CachedVaccineTemplate] = MappingProxyType(
+            {template.vaccine_name: template for template in self.templates}
+        )
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def get(self, template_id: uuid.UUID) -> Optional[CachedVaccineTemplate]:
+        return self.by_id.get(template_id)
+
+
+class VaccineCatalog:
+    """
+    Process-wide cache of the vaccine templates
+
+    Templates only change when the seed data does, so every request shares one
+    immutable snapshot. Once the TTL has passed, the next caller compares the
+    table's version (an md5 over the rows) with the cached one and reloads only
+    if it moved, so edits reach every process within the TTL. Code that edits
+    templates should also call invalidate() so its own process sees them at once.
+    """
+
+    def __init__(self, ttl_seconds: int = VACCINE_CATALOG_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[VaccineCatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    async def fetch_version(db: AsyncSession) -> CatalogVersion:
+        # A few dozen short rows, so hashing them costs about as much as counting them
+        row_text = func.concat_ws(
+            "|",
+            VaccineTemplate.id,
+            VaccineTemplate.vaccine_name,
+            VaccineTemplate.disease_prevented,
+            VaccineTemplate.recommended_age_days,
+            VaccineTemplate.total_doses,
+            VaccineTemplate.dose_interval_days,
+            VaccineTemplate.is_mandatory,
+            VaccineTemplate.description
+        )
+        return (await db.execute(
+            select(func.md5(func.string_agg(row_text, aggregate_order_by(literal_column("','"), VaccineTemplate.id))))
+        )).scalar_one()
+
+    async def load(self, db: AsyncSession) -> VaccineCatalogSnapshot:
+        """Read every template and replace the cached snapshot"""
+        version = await self.fetch_version(db)
+        result = await db.execute(select(
+            VaccineTemplate.id,
+            VaccineTemplate.vaccine_name,
+            VaccineTemplate.disease_prevented,
+            VaccineTemplate.recommended_age_days,
+            VaccineTemplate.total_doses,
+            VaccineTemplate.dose_interval_days,
+            VaccineTemplate.is_mandatory,
+            VaccineTemplate.description
+        ))
+        snapshot = VaccineCatalogSnapshot(
+            (CachedVaccineTemplate(*row) for row in result.all()),
+            version
+        )
+        self._snapshot = snapshot
+        self._checked_at = time.monotonic()
+        logger.info(f"Loaded {len(snapshot)} vaccine templates into the catalog cache")
+        return snapshot
+
+    async def get(
+        self,
+        db: AsyncSession,
+        template_ids: Optional[Iterable[uuid.UUID]] = None
+    ) -> VaccineCatalogSnapshot:
+        """
+        Return the current catalog, loading or revalidating it when needed
+
+        Args:
+            db: Database session, used only when the cache must be checked or loaded
+            template_ids: Templates the caller is about to look up; an id missing from
+                the snapshot forces a revalidation instead of waiting for the TTL
+
+        Returns:
+            The catalog snapshot
+        """
+        snapshot = self._snapshot
+        expired = time.monotonic() - self._checked_at > self.ttl_seconds
+        missing = snapshot is not None and template_ids is not None and any(
+            template_id not in snapshot.by_id for template_id in template_ids
+        )
+        if snapshot is not None and not expired and not missing:
+            return snapshot
+
+        async with self._lock:
+            # Another request may have revalidated while we waited
+            if self._snapshot is not None and self._snapshot is not snapshot:
+                return self._snapshot
+
+            if snapshot is not None:
+                version = await self.fetch_version(db)
+                if version == snapshot.version:
+                    self._checked_at = time.monotonic()
+                    return snapshot
+
+            return await self.load(db)
+
+    def invalidate(self):
+        """Drop the cached snapshot so the next get() reloads it"""
+        self._snapshot = None
+        self._checked_at = 0.0
+
+
+# Global catalog instance
+vaccine_catalog = VaccineCatalog()
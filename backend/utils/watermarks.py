@@ -0,0 +1,33 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import JobWatermark
+
+
+async def get_watermark(db: AsyncSession, job_name: str) -> Optional[date]:
+    """Last date the job completed successfully, or None if it never has"""
+    return (await db.execute(
+        select(JobWatermark.watermark).where(JobWatermark.job_name == job_name)
+    )).scalar_one_or_none()
+
+
+async def set_watermark(db: AsyncSession, job_name: str, watermark: date):
+    """
+    Record a successful run up to and including `watermark` and commit
+
+    The watermark never moves backwards, so a slow run finishing after a newer
+    one cannot undo its progress.
+    """
+    statement = insert(JobWatermark).values(job_name=job_name, watermark=watermark)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[JobWatermark.job_name],
+            set_={
+                "watermark": func.greatest(JobWatermark.watermark, statement.excluded.watermark),
+                "updated_at": func.now()
+            }
+        )
+    )
+    await db.commit()
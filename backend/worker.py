@@ -0,0 +1,439 @@
+"""
+Standalone notification worker, separate from the API
+
+Runs the vaccination reminder job, the notification outbox and queued background jobs
+(drive fan-outs, schedule backfills) in their own process,
+with their own connection pool and send concurrency, so batch notification load never
+competes with API requests for database connections or the event loop. Deploy it next
+to the API and set RUN_SCHEDULER_IN_API=false and OUTBOX_WORKER_ENABLED=false there.
+
+    python worker.py                 # reminder scheduler + outbox workers (default)
+    python worker.py reminders       # one reminder pass, then exit (cron)
+    python worker.py outbox          # outbox workers only
+
+Reminders can be split into K shards by user_id hash (REMINDER_SHARDS / --shards):
+either one process runs every shard in a process pool, or each instance owns one
+shard with --shard, e.g. `python worker.py --shards 4 --shard 2` on four hosts.
+
+Email/SMS rate limits are per process. Set NOTIFY_SENDER_PROCESSES to the number of
+API instances running an outbox worker plus worker instances (plus concurrent Lambda
+invocations) so their combined rate stays within EMAIL_/SMS_RATE_PER_SECOND. A worker
+running shards in a process pool splits its own share with the pool processes.
+
+On Lambda, point an EventBridge schedule at worker.scheduled_handler.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from config import DATABASE_URL, create_db_engine, create_session_factory
+from utils.dispatcher import notification_dispatcher
+from utils.job_runner import run_pending_jobs, JOB_POLL_SECONDS
+from utils.leader import LeaderElection, advisory_xact_lock
+from utils.outbox import OutboxWorker, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL
+from utils.reminder_service import send_vaccination_reminders, ReminderShard, REMINDER_SHARDS
+from utils.smtp import smtp_service
+from utils.twilio import twilio_service
+
+logger = logging.getLogger(__name__)
+
+# Worker-only settings; the API's DB_POOL_SIZE / NOTIFY_CONCURRENCY stay untouched
+WORKER_DB_POOL_SIZE = int(os.getenv("WORKER_DB_POOL_SIZE", "5"))
+WORKER_DB_MAX_OVERFLOW = int(os.getenv("WORKER_DB_MAX_OVERFLOW", "5"))
+WORKER_NOTIFY_CONCURRENCY = int(os.getenv("WORKER_NOTIFY_CONCURRENCY", os.getenv("NOTIFY_CONCURRENCY", "10")))
+WORKER_OUTBOX_CONCURRENCY = int(os.getenv("WORKER_OUTBOX_CONCURRENCY", "2"))
+REMINDER_INTERVAL_MINUTES = int(os.getenv("REMINDER_INTERVAL_MINUTES", "30"))
+# Stop draining the outbox this long before the Lambda timeout
+LAMBDA_SAFETY_MARGIN_MS = int(os.getenv("LAMBDA_SAFETY_MARGIN_MS", "30000"))
+
+# Same lock name as the API's job, so the two can never run a pass at once
+REMINDER_LOCK_NAME = send_vaccination_reminders.__name__
+
+
+def create_worker_engine(pool_mode: Optional[str] = None, pool_size: int = WORKER_DB_POOL_SIZE, max_overflow: int = WORKER_DB_MAX_OVERFLOW):
+    """Engine for the worker process, reported as SureShot_worker in pg_stat_activity"""
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL must be set to run the worker")
+    return create_db_engine(
+        DATABASE_URL,
+        pool_mode=pool_mode,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        application_name="SureShot_worker"
+    )
+
+
+async def close_services(engine):
+    """Release notification clients and database connections"""
+    smtp_service.close()
+    await twilio_service.aclose()
+    await engine.dispose()
+
+
+def is_sharded(shard: Optional[ReminderShard]) -> bool:
+    return shard is not None and shard.count > 1
+
+
+@asynccontextmanager
+async def reminder_run_lock(engine, shard: Optional[ReminderShard] = None) -> AsyncIterator[bool]:
+    """
+    Lock for one reminder pass
+
+    An unsharded pass holds the job lock exclusively, as the API's scheduler does. A
+    shard pass holds it shared, so shards run side by side but never alongside an
+    unsharded pass, and holds its own shard lock exclusively.
+
+    Yields:
+        True if the pass may run
+    """
+    async with advisory_xact_lock(REMINDER_LOCK_NAME, engine, shared=is_sharded(shard)) as acquired:
+        if not acquired or not is_sharded(shard):
+            yield acquired
+            return
+        async with advisory_xact_lock(f"{REMINDER_LOCK_NAME}:{shard.name}", engine) as shard_acquired:
+            yield shard_acquired
+
+
+async def run_reminders_once(engine, shard: Optional[ReminderShard] = None) -> Optional[Dict[str, int]]:
+    """
+    Run a single reminder pass unless another process is already running it
+
+    Args:
+        engine: Worker engine
+        shard: Run only this shard
+
+    Returns:
+        Reminder counts, or None if the pass was skipped
+    """
+    session_factory = create_session_factory(engine)
+    async with reminder_run_lock(engine, shard) as acquired:
+        if not acquired:
+            logger.info("⏭️ Reminder job is already running in another process, skipping")
+            return None
+        return await send_vaccination_reminders(session_factory, shard if is_sharded(shard) else None)
+
+
+async def _run_shard(shard: ReminderShard) -> Optional[Dict[str, int]]:
+    # One pass and the process is done, so connections are opened per session
+    engine = create_worker_engine(pool_mode="null")
+    try:
+        return await run_reminders_once(engine, shard)
+    finally:
+        await close_services(engine)
+
+
+def shard_pool_size(shard_count: int, processes: Optional[int] = None) -> int:
+    """Process pool size for running every shard (one per shard, capped at the CPU count)"""
+    return processes or min(shard_count, os.cpu_count() or 1)
+
+
+def run_shard_process(index: int, count: int, concurrency: int, rate_shares: int = 1) -> Optional[Dict[str, int]]:
+    """Process pool entry point: one shard with its own event loop, engine and sessions"""
+    logging.basicConfig(level=logging.INFO)
+    notification_dispatcher.set_concurrency(concurrency)
+    notification_dispatcher.split_rate_limits(rate_shares)
+    return asyncio.run(_run_shard(ReminderShard(index, count)))
+
+
+async def run_sharded_reminders(
+    shard_count: int,
+    processes: Optional[int] = None,
+    concurrency: int = WORKER_NOTIFY_CONCURRENCY
+) -> Dict[str, int]:
+    """
+    Run every shard of a reminder pass in a pool of processes
+
+    Args:
+        shard_count: Number of shards
+        processes: Pool size (defaults to one per shard, capped at the CPU count)
+        concurrency: Concurrent email/SMS sends per shard process
+
+    Each pool process gets 1/(processes + 1) of this instance's rate limits; the
+    calling process keeps the remaining share (see main).
+
+    Returns:
+        Reminder counts summed over the shards that ran
+    """
+    processes = shard_pool_size(shard_count, processes)
+    loop = asyncio.get_running_loop()
+    # spawn, so children start without the parent's event loop and connections
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        shard_results = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, run_shard_process, index, shard_count, concurrency, processes + 1)
+                for index in range(shard_count)
+            ),
+            return_exceptions=True
+        )
+
+    totals: Dict[str, int] = {}
+    for index, result in enumerate(shard_results):
+        if isinstance(result, BaseException):
+            logger.error(f"❌ Reminder {ReminderShard(index, shard_count).name} failed: {str(result)}")
+        elif result:
+            for key, count in result.items():
+                totals[key] = totals.get(key, 0) + count
+    return totals
+
+
+async def run_reminder_pass(
+    engine,
+    shards: int = 1,
+    shard_index: Optional[int] = None,
+    processes: Optional[int] = None,
+    concurrency: int = WORKER_NOTIFY_CONCURRENCY
+) -> Optional[Dict[str, int]]:
+    """
+    One reminder pass: this instance's shard, every shard in a process pool, or the whole job
+
+    Args:
+        engine: Worker engine
+        shards: Number of shards
+        shard_index: Run only this shard in this process
+        processes: Process pool size when running every shard
+        concurrency: Concurrent email/SMS sends per shard process
+    """
+    if shard_index is not None:
+        return await run_reminders_once(engine, ReminderShard(shard_index, shards))
+    if shards > 1:
+        return await run_sharded_reminders(shards, processes, concurrency)
+    return await run_reminders_once(engine)
+
+
+async def run_worker(
+    engine,
+    reminders: bool = True,
+    outbox_workers: int = WORKER_OUTBOX_CONCURRENCY,
+    interval_minutes: int = REMINDER_INTERVAL_MINUTES,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+    poll_interval: float = OUTBOX_POLL_INTERVAL,
+    shards: int = 1,
+    shard_index: Optional[int] = None,
+    processes: Optional[int] = None
+):
+    """
+    Run the reminder scheduler and/or outbox workers until SIGINT or SIGTERM
+
+    Along with the reminder job, the scheduler polls for PENDING background jobs
+    and reclaims abandoned RUNNING ones (see utils/job_runner.py).
+
+    Args:
+        engine: Worker engine
+        reminders: Schedule the reminder and background job pollers (reminders are
+            leader-elected across all processes)
+        outbox_workers: Number of concurrent outbox pollers (0 to disable)
+        interval_minutes: Minutes between reminder passes
+        batch_size: Outbox messages claimed per batch
+        poll_interval: Seconds an idle outbox worker waits before polling again
+        shards: Number of reminder shards
+        shard_index: The shard this instance owns; every shard runs in a process pool if None
+        processes: Process pool size when running every shard
+    """
+    session_factory = create_session_factory(engine)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    scheduler = AsyncIOScheduler()
+    # An instance that owns a shard competes only with other instances of that shard
+    election_name = "scheduler" if shard_index is None else f"scheduler:{ReminderShard(shard_index, shards).name}"
+    leader = LeaderElection(election_name, engine=engine)
+    workers: List[OutboxWorker] = []
+
+    if reminders:
+        async def reminder_job():
+            # The pass takes its own advisory locks (see reminder_run_lock)
+            if not leader.is_leader:
+                return None
+            return await run_reminder_pass(engine, shards, shard_index, processes, notification_dispatcher.concurrency)
+
+        leader.start()
+        scheduler.add_job(
+            reminder_job,
+            IntervalTrigger(minutes=interval_minutes),
+            id="vaccination_reminders",
+            name="Vaccination Reminder Job",
+            max_instances=1,
+            replace_existing=True
+        )
+        # Job claims use SKIP LOCKED, so every instance can poll without a leader
+        scheduler.add_job(
+            run_pending_jobs,
+            IntervalTrigger(seconds=JOB_POLL_SECONDS),
+            args=[session_factory],
+            id="background_jobs",
+            name="Background Job Runner",
+            max_instances=1,
+            replace_existing=True
+        )
+        scheduler.start()
+        logger.info(f"✅ Reminder scheduler started (every {interval_minutes} minutes)")
+
+    for index in range(outbox_workers):
+        worker = OutboxWorker(
+            session_factory=session_factory,
+            worker_id=f"{socket.gethostname()}:{os.getpid()}:{index}",
+            batch_size=batch_size,
+            poll_interval=poll_interval
+        )
+        worker.start()
+        workers.append(worker)
+    if workers:
+        logger.info(f"✅ {len(workers)} outbox worker(s) started")
+
+    await stopping.wait()
+    logger.info("Worker shutting down")
+
+    if reminders:
+        scheduler.shutdown(wait=False)
+        await leader.stop()
+    await asyncio.gather(*(worker.stop() for worker in workers))
+
+
+async def drain_outbox(engine, batch_size: int, time_left_ms) -> int:
+    """
+    Deliver outbox batches until the outbox is empty or time runs out
+
+    Args:
+        engine: Worker engine
+        batch_size: Messages claimed per batch
+        time_left_ms: Callable returning the milliseconds left in the invocation
+
+    Returns:
+        Number of messages processed
+    """
+    worker = OutboxWorker(session_factory=create_session_factory(engine), batch_size=batch_size)
+    processed = 0
+    while time_left_ms() > LAMBDA_SAFETY_MARGIN_MS:
+        claimed = await worker.process_batch()
+        if claimed == 0:
+            break
+        processed += claimed
+    return processed
+
+
+async def run_scheduled(task: str, time_left_ms, shard: Optional[ReminderShard] = None) -> Dict[str, Any]:
+    engine = create_worker_engine(pool_mode="null")
+    result: Dict[str, Any] = {"task": task}
+    try:
+        if task in ("all", "reminders"):
+            result["reminders"] = await run_reminders_once(engine, shard)
+        if task in ("all", "jobs"):
+            result["jobs_run"] = await run_pending_jobs(
+                create_session_factory(engine),
+                lambda: (time_left_ms() - LAMBDA_SAFETY_MARGIN_MS) / 1000
+            )
+        if task in ("all", "outbox"):
+            result["outbox_processed"] = await drain_outbox(engine, OUTBOX_BATCH_SIZE, time_left_ms)
+    finally:
+        # The HTTP client and connections must not outlive the invocation
+        await twilio_service.aclose()
+        await engine.dispose()
+    return result
+
+
+# One loop for the life of the Lambda container, like Mangum, so the dispatcher's
+# semaphore and token buckets stay bound to the loop they were first used on
+_lambda_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def scheduled_handler(event, context):
+    """
+    Lambda entry point for EventBridge schedules
+
+    Runs one reminder pass, then background jobs the API left PENDING (drive
+    fan-outs, schedule backfills) or that were abandoned mid-run, and then drains
+    the outbox while time allows. The event may set {"task": "jobs"}, {"task": "reminders"} or
+    {"task": "outbox"} to run only one of them.
+    Overlapping invocations are safe: the reminder pass takes an advisory lock and
+    outbox claims use SKIP LOCKED.
+
+    To shard reminders, create one schedule per shard with {"shard": i, "shards": K};
+    each invocation then handles only its shard's users.
+    """
+    global _lambda_loop
+    if _lambda_loop is None or _lambda_loop.is_closed():
+        _lambda_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_lambda_loop)
+
+    event = event or {}
+    task = event.get("task", "all")
+    if task not in ("all", "jobs", "reminders", "outbox"):
+        raise ValueError(f"Unknown task '{task}', expected 'all', 'jobs', 'reminders' or 'outbox'")
+
+    shard = None
+    if event.get("shard") is not None:
+        shard = ReminderShard(int(event["shard"]), int(event.get("shards", REMINDER_SHARDS)))
+        if not 0 <= shard.index < shard.count:
+            raise ValueError(f"Shard {shard.index} is out of range for {shard.count} shards")
+
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        time_left_ms = context.get_remaining_time_in_millis
+    else:
+        time_left_ms = lambda: LAMBDA_SAFETY_MARGIN_MS + 60000
+
+    result = _lambda_loop.run_until_complete(run_scheduled(task, time_left_ms, shard))
+    logger.info(f"Scheduled run finished: {result}")
+    return result
+
+
+async def main(args: argparse.Namespace):
+    notification_dispatcher.set_concurrency(args.concurrency)
+    if args.command != "outbox" and args.shards > 1 and args.shard is None:
+        # Shard processes send alongside this one; split the instance's rate limits
+        notification_dispatcher.split_rate_limits(shard_pool_size(args.shards, args.processes) + 1)
+    engine = create_worker_engine(pool_size=args.pool_size, max_overflow=args.max_overflow)
+    try:
+        if args.command == "reminders":
+            results = await run_reminder_pass(engine, args.shards, args.shard, args.processes, args.concurrency)
+            logger.info(f"Reminder pass finished: {results}")
+        else:
+            await run_worker(
+                engine,
+                reminders=args.command == "all",
+                outbox_workers=args.outbox_workers,
+                interval_minutes=args.interval_minutes,
+                batch_size=args.batch_size,
+                poll_interval=args.poll_interval,
+                shards=args.shards,
+                shard_index=args.shard,
+                processes=args.processes
+            )
+    finally:
+        await close_services(engine)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SureShot reminder and notification worker")
+    parser.add_argument("command", nargs="?", default="all", choices=["all", "reminders", "outbox"],
+                        help="all: scheduler + outbox (default); reminders: one pass; outbox: outbox only")
+    parser.add_argument("--pool-size", type=int, default=WORKER_DB_POOL_SIZE, help="Database pool size")
+    parser.add_argument("--max-overflow", type=int, default=WORKER_DB_MAX_OVERFLOW, help="Database pool overflow")
+    parser.add_argument("--concurrency", type=int, default=WORKER_NOTIFY_CONCURRENCY, help="Concurrent email/SMS sends")
+    parser.add_argument("--outbox-workers", type=int, default=WORKER_OUTBOX_CONCURRENCY, help="Concurrent outbox pollers")
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE, help="Outbox messages per batch")
+    parser.add_argument("--poll-interval", type=float, default=OUTBOX_POLL_INTERVAL, help="Idle outbox poll interval (seconds)")
+    parser.add_argument("--interval-minutes", type=int, default=REMINDER_INTERVAL_MINUTES, help="Minutes between reminder passes")
+    parser.add_argument("--shards", type=int, default=REMINDER_SHARDS, help="Split reminders into this many user_id shards")
+    parser.add_argument("--shard", type=int, default=None, help="Run only this shard (0-based); default runs every shard")
+    parser.add_argument("--processes", type=int, default=None, help="Process pool size when running every shard")
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.shard is not None and not 0 <= args.shard < args.shards:
+        parser.error(f"--shard must be between 0 and {args.shards - 1}")
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parse_args()))
@@ -118,7 +118,7 @@ export const workerApi = {
   getDriveParticipants: async (driveId: string) => {
     try {
       const response = await axios.get(
-        `${process.env.NEXT_PUBLIC_API_URL}/workers/drive-participants/${driveId}`,
+        `${process.env.NEXT_PUBLIC_API_URL}/workers/drive-participants/${driveId}?all=true`,
         {
           headers: {
             Authorization: `Bearer ${localStorage.getItem('accessToken')}`,